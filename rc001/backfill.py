@@ -0,0 +1,339 @@
+"""Catch up on a long height range with worker processes, applied in chain order.
+
+Workers fetch and decode blocks in parallel and pick out the rc001 deploys and mints of each
+one as (height, tx_index, operation) records, along with the outpoints every transaction spends,
+the outputs it creates and the pieces of inscriptions split over several transactions (only
+this process knows which outpoints hold inscriptions or partial ones). This process applies
+them block by block through the scanner's transfer, reassembly, deploy and mint handlers,
+so collections, serial numbers, sequence numbers and owners come out exactly as a serial scan
+would produce them. The checkpoint is committed with the blocks, so an
+interrupted backfill resumes after the last committed block when run again.
+
+With CONTENT_STORE on, workers also write inscription bodies to the content store and this
+process records them. With BLOCK_CACHE on, workers read cached blocks from disk and compress the ones they fetch,
+which this process appends to the cache; a fully cached range backfills with the node offline.
+
+Stop the indexer first; both write all_collections.db. Run from rc001/ like the indexer:
+
+    python backfill.py --workers 8
+    python backfill.py --coin B1T --end 250000 --chunk 200
+"""
+import argparse
+import configparser
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from block_cache import BlockCache, compress_block
+from content_store import ContentStore
+from raw_block import address_params, parse_block
+from rpc_batch import BatchRPCClient
+from envelope import decode_continuation
+from reassembly import inscription_parts
+from rc001indexer import (BLOCK_CACHE, BLOCK_CACHE_DIR, BULK_COMMIT_BLOCKS, BULK_LAG_THRESHOLD, COMMIT_BLOCKS,
+                          CONTENT_DIR, CONTENT_STORE, RAW_BLOCK_MODE, RETRY_DELAY, RPC_BATCH_SIZE, RPC_CONFIG_FILE,
+                          BlockchainScanner, InputValuesUnavailable, configure_logging, extract_inscription,
+                          parse_operation)
+
+logger = logging.getLogger(__name__)
+
+FETCH_ATTEMPTS = 3
+PROGRESS_INTERVAL = 10  # Seconds between progress lines
+IN_FLIGHT_PER_WORKER = 2  # Chunks per worker scanned ahead of the one being applied
+
+# Per-process state of a worker, set up once by _init_worker
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(coin_ticker: str, rpc_config: Dict[str, str]) -> None:
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # The merger handles Ctrl-C and stops the pool
+    _worker['coin_ticker'] = coin_ticker
+    _worker['rpc'] = BatchRPCClient.from_config(rpc_config, timeout=60)
+    _worker['params'] = address_params(coin_ticker, rpc_config)
+    _worker['cache'] = BlockCache.open_readonly(BLOCK_CACHE_DIR, coin_ticker) if BLOCK_CACHE else None
+    _worker['content_store'] = ContentStore(CONTENT_DIR) if CONTENT_STORE else None
+
+
+def _fetch(heights: List[int]) -> List[Any]:
+    if not heights:
+        return []
+    rpc = _worker['rpc']
+    for attempt in range(FETCH_ATTEMPTS):
+        try:
+            return rpc.get_blocks(heights, 0 if RAW_BLOCK_MODE or BLOCK_CACHE else 2)
+        except Exception as e:
+            rpc.close()
+            if attempt == FETCH_ATTEMPTS - 1:
+                return [e] * len(heights)
+            time.sleep(RETRY_DELAY)
+
+
+def _strip_transaction(tx: Dict[str, Any]) -> Dict[str, Any]:
+    """The parts of a transaction the merger reads, to keep what workers send back small"""
+    vout = []
+    for output in tx['vout']:
+        spk = {'addresses': output['scriptPubKey']['addresses']} if 'addresses' in output.get('scriptPubKey', {}) else {}
+        vout.append({'value': output['value'], 'n': output['n'], 'scriptPubKey': spk})
+    return {'txid': tx['txid'], 'vin': [{'txid': entry['txid'], 'vout': entry['vout']} for entry in tx['vin'] if 'txid' in entry],
+            'vout': vout}
+
+
+def scan_chunk(first: int, last: int) -> Dict[str, Any]:
+    """Fetch blocks first..last and extract their operations (runs in a worker process).
+
+    Returns the blocks in height order as (height, hash, previousblockhash, transactions, compressed),
+    where transactions are (document, content, parts, tx) for every transaction: the operation and
+    the (content type, hash, size) of a body written to the content store when the transaction
+    holds a whole inscription, the split-envelope pieces it may carry (see reassembly.py; a whole
+    inscription's start has no body), and the tx stripped to its txid, spent outpoints and output values and addresses;
+    compressed is the block to add to the cache (None unless BLOCK_CACHE is on and the block
+    came from the node). A block that cannot be fetched ends the chunk early and is reported in 'error'.
+    """
+    coin_ticker = _worker['coin_ticker']
+    cache = _worker['cache']
+    content_store = _worker['content_store']
+    started = time.perf_counter()
+    fetch_seconds = 0.0
+    blocks: List[Tuple[int, str, Optional[str], List[Tuple[Any, Any, Any, Dict[str, Any]]], Optional[bytes]]] = []
+    txs = operations_found = 0
+    error = None
+    for batch_first in range(first, last + 1, RPC_BATCH_SIZE):
+        heights = list(range(batch_first, min(batch_first + RPC_BATCH_SIZE - 1, last) + 1))
+        cached = {}
+        if cache is not None:
+            for height in heights:
+                entry = cache.get(height)
+                if entry is not None:
+                    cached[height] = entry
+        missing = [height for height in heights if height not in cached]
+        fetch_started = time.perf_counter()
+        fetched = dict(zip(missing, _fetch(missing)))
+        fetch_seconds += time.perf_counter() - fetch_started
+        for height in heights:
+            result = cached.get(height) or fetched[height]
+            compressed = None
+            try:
+                if isinstance(result, Exception):
+                    raise result
+                block_hash, block = result
+                if RAW_BLOCK_MODE or BLOCK_CACHE:
+                    raw = bytes.fromhex(block) if isinstance(block, str) else block
+                    block = parse_block(raw, height, block_hash, _worker['params'])
+                    if BLOCK_CACHE and height in fetched:
+                        compressed = compress_block(raw)
+            except Exception as e:
+                error = (height, str(e))
+                break
+            transactions = []
+            for tx in block['tx']:
+                doc = content = parts = None
+                try:
+                    inscription = extract_inscription(tx)
+                    if inscription is not None:
+                        if content_store is not None:
+                            # Flushed once when the backfill ends
+                            content = (inscription[0], content_store.put(inscription[1], sync=False), len(inscription[1]))
+                        doc = parse_operation(*inscription)
+                        # The body stays here; the merger's reassembler only needs to see a complete envelope,
+                        # or the pieces continuing a partial one if the transaction turns out to spend it
+                        parts = ((inscription[0], None, 0), decode_continuation(bytes.fromhex(tx['vin'][0]['scriptSig']['hex'])))
+                    else:
+                        parts = inscription_parts(tx)
+                except Exception as e:
+                    logger.error(f"Error processing transaction {tx['txid']} on coin {coin_ticker}: {e}")
+                if doc is not None and doc.op in ('deploy', 'mint'):
+                    operations_found += 1
+                else:
+                    doc = None
+                transactions.append((doc, content, parts, _strip_transaction(tx)))
+            txs += len(block['tx'])
+            blocks.append((height, block_hash, block.get('previousblockhash'), transactions, compressed))
+        if error:
+            break
+    return {'pid': os.getpid(), 'blocks': blocks, 'txs': txs, 'operations': operations_found, 'error': error,
+            'seconds': time.perf_counter() - started, 'fetch_seconds': fetch_seconds}
+
+
+def _scan_chunk(chunk: Tuple[int, int]) -> Dict[str, Any]:
+    return scan_chunk(*chunk)
+
+
+def _scan_in_order(pool, chunks: List[Tuple[int, int]], window: int) -> Iterator[Dict[str, Any]]:
+    """Results of the chunks in order, with at most `window` of them queued, running or waiting to be
+    applied, so workers cannot run ahead of the merger and pile up results in this process"""
+    in_flight: Deque[Any] = deque()
+    for chunk in chunks:
+        in_flight.append(pool.apply_async(_scan_chunk, (chunk,)))
+        if len(in_flight) >= window:
+            yield in_flight.popleft().get()
+    while in_flight:
+        yield in_flight.popleft().get()
+
+
+class WorkerStats:
+    __slots__ = ('chunks', 'blocks', 'txs', 'operations', 'seconds', 'fetch_seconds')
+
+    def __init__(self):
+        self.chunks = self.blocks = self.txs = self.operations = 0
+        self.seconds = self.fetch_seconds = 0.0
+
+    def add(self, result: Dict[str, Any]) -> None:
+        self.chunks += 1
+        self.blocks += len(result['blocks'])
+        self.txs += result['txs']
+        self.operations += result['operations']
+        self.seconds += result['seconds']
+        self.fetch_seconds += result['fetch_seconds']
+
+
+def report(stats: Dict[int, WorkerStats], blocks: int, elapsed: float, merge_seconds: float) -> None:
+    """Log blocks/s and transactions/s of every worker and of the whole run"""
+    for number, (pid, worker) in enumerate(sorted(stats.items()), 1):
+        busy = worker.seconds or 1e-9
+        logger.info(f"Worker {number} (pid {pid}): {worker.chunks} chunks, {worker.blocks} blocks, "
+                    f"{worker.txs} txs, {worker.operations} operations, {worker.blocks / busy:.1f} blocks/s, "
+                    f"{worker.txs / busy:.0f} txs/s, {worker.fetch_seconds / busy:.0%} waiting on RPC")
+    logger.info(f"Backfill applied {blocks} blocks in {elapsed:.1f}s ({blocks / max(elapsed, 1e-9):.1f} blocks/s), "
+                f"merger busy {merge_seconds:.1f}s")
+
+
+def backfill(coin_ticker: str, end_height: Optional[int], workers: int, chunk_size: int) -> bool:
+    """Backfill from the stored checkpoint to end_height (default: the node's tip); False if it stopped early"""
+    config = configparser.ConfigParser()
+    config.read(RPC_CONFIG_FILE)
+    if coin_ticker not in config:
+        logger.error(f"No RPC configuration found for coin {coin_ticker}")
+        return False
+    rpc_config = dict(config[coin_ticker])
+
+    # Fork the workers before the scanner opens the database
+    with multiprocessing.Pool(workers, _init_worker, (coin_ticker, rpc_config)) as pool:
+        scanner = BlockchainScanner()
+        block_heights = scanner.load_last_block_heights()
+        if coin_ticker not in block_heights:
+            logger.error(f"{coin_ticker} is not scanned by the indexer")
+            return False
+        heights = block_heights[coin_ticker]
+        # Also kept for looking up input values of inscription transfers
+        with scanner.get_rpc_connection(coin_ticker) as rpc:
+            tip, offline = scanner.get_node_height(coin_ticker, rpc, heights["last_block_height"])
+            # Same check as the indexer: the checkpoint block may have been replaced since the last run
+            check_height = min(heights["last_block_height"], tip)
+            stored_hash = scanner._stored_block_hash(coin_ticker, check_height)
+            if not offline and stored_hash and rpc.getblockhash(check_height) != stored_hash:
+                scanner.rollback_to(coin_ticker, scanner.find_fork_height(coin_ticker, rpc, check_height), block_heights)
+        end_height = tip if end_height is None else min(end_height, tip)
+        start_height = max(heights["start_block_height"], heights["last_block_height"] + 1)
+        if start_height > end_height:
+            logger.info(f"{coin_ticker} is already scanned up to {heights['last_block_height']}")
+            return True
+        scanner._update_write_profile(coin_ticker, end_height - heights["last_block_height"])
+        chunks = [(first, min(first + chunk_size - 1, end_height)) for first in range(start_height, end_height + 1, chunk_size)]
+        logger.info(f"Backfilling {coin_ticker} blocks {start_height}-{end_height} "
+                    f"with {workers} workers in {len(chunks)} chunks")
+
+        stats: Dict[int, WorkerStats] = {}
+        applied = blocks_in_transaction = 0
+        merge_seconds = 0.0
+        started = last_progress = time.monotonic()
+        try:
+            for result in _scan_in_order(pool, chunks, IN_FLIGHT_PER_WORKER * workers):
+                stats.setdefault(result['pid'], WorkerStats()).add(result)
+                merge_started = time.monotonic()
+                for height, block_hash, previous_hash, transactions, compressed in result['blocks']:
+                    if scanner.write_profile == 'bulk' and tip - height < BULK_LAG_THRESHOLD:
+                        scanner.commit_blocks(coin_ticker, tip, block_heights)
+                        blocks_in_transaction = 0
+                        scanner._update_write_profile(coin_ticker, tip - height)
+                    stored_hash = scanner._stored_block_hash(coin_ticker, height - 1)
+                    if previous_hash and stored_hash and previous_hash != stored_hash:
+                        logger.error(f"Block {height} on {coin_ticker} does not extend block {height - 1} {stored_hash}; "
+                                     f"the chain reorganised during the backfill, run the indexer to roll it back")
+                        return False
+                    if compressed is not None:
+                        scanner._get_block_cache(coin_ticker).append_compressed(height, block_hash, compressed)
+                    block = {'height': height, 'hash': block_hash, 'tx': [tx for *_, tx in transactions]}
+                    try:
+                        scanner.resolve_input_values(coin_ticker, block, None if offline else rpc,
+                                                     {tx['txid'] for doc, _, parts, tx in transactions
+                                                      if doc is not None or parts is not None})
+                    except InputValuesUnavailable as e:
+                        logger.error(f"{e}; run the backfill again to resume from block {height}")
+                        return False
+
+                    def apply(block=block, transactions=transactions):
+                        for doc, content, parts, tx in transactions:
+                            scanner.process_transfers(coin_ticker, tx, block)
+                            try:
+                                # Every transaction goes through the reassembler, as in a serial scan: one
+                                # spending an open partial continues it even if it carries its own envelope
+                                inscription = scanner.reassemble(coin_ticker, tx, block, parts or (None, None))
+                                if inscription is None:
+                                    continue
+                                if inscription[1] is not None:
+                                    scanner.handle_inscription(coin_ticker, tx, block, inscription)
+                                    continue
+                                # Its own complete envelope, decoded by the worker
+                                if content is not None:
+                                    scanner.record_content(coin_ticker, f"{tx['txid']}i0", *content, block['height'])
+                                if doc is not None:
+                                    scanner.apply_operation(coin_ticker, doc, tx, block)
+                            except Exception as e:
+                                logger.error(f"Error processing transaction {tx['txid']} on coin {coin_ticker}: {e}")
+                        scanner.evict_partials(coin_ticker, block['height'])
+
+                    if not scanner.apply_block(coin_ticker, height, block_hash, apply, block_heights):
+                        continue
+                    applied += 1
+                    blocks_in_transaction += 1
+                    group_size = BULK_COMMIT_BLOCKS if scanner.write_profile == 'bulk' else COMMIT_BLOCKS
+                    if blocks_in_transaction >= group_size:
+                        scanner.commit_blocks(coin_ticker, tip, block_heights)
+                        blocks_in_transaction = 0
+                merge_seconds += time.monotonic() - merge_started
+                if result['error']:
+                    height, message = result['error']
+                    logger.error(f"Failed to fetch block {height} for {coin_ticker}: {message}; "
+                                 f"run the backfill again to resume from there")
+                    return False
+                if time.monotonic() - last_progress >= PROGRESS_INTERVAL:
+                    last_progress = time.monotonic()
+                    elapsed = last_progress - started
+                    logger.info(f"Backfill {coin_ticker} at block {heights['last_block_height']}/{end_height}, "
+                                f"{applied / elapsed:.1f} blocks/s")
+        finally:
+            if CONTENT_STORE:
+                os.sync()  # Before the blocks that reference the stored bodies are committed
+            # Only whole blocks are left in an open transaction; keep them so the next run resumes after them
+            scanner.commit_blocks(coin_ticker, tip, block_heights)
+            # Leave the database durable and with the indexes the web API reads
+            scanner.set_write_profile('tip')
+            scanner._record_status(coin_ticker, tip, heights["last_block_height"])
+            report(stats, applied, time.monotonic() - started, merge_seconds)
+        return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--coin', default='B1T')
+    parser.add_argument('--end', type=int, help='last height to backfill (default: the node tip)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk', type=int, default=100, help='blocks per worker task')
+    args = parser.parse_args()
+    configure_logging()
+    try:
+        completed = backfill(args.coin, args.end, max(1, args.workers), max(1, args.chunk))
+    except KeyboardInterrupt:
+        logger.warning("Backfill interrupted; run it again to resume after the last committed block")
+        sys.exit(130)
+    if not completed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
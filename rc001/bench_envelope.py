@@ -0,0 +1,188 @@
+"""Micro-benchmark: asm split + extract_inscription_data + hex/base64 chain vs decode_envelope.
+
+Record vin[0] scriptSigs from a node once, then benchmark offline:
+
+    python bench_envelope.py record 69000 69757 --out scriptsigs.jsonl
+    python bench_envelope.py run scriptsigs.jsonl --repeat 5
+"""
+import argparse
+import base64
+import binascii
+import configparser
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from envelope import ORD_PREFIX_HEX, decode_envelope
+from rpc_batch import BatchRPCClient
+from rc001indexer import RPC_CONFIG_FILE
+
+logger = logging.getLogger(__name__)
+
+
+def record(coin_ticker: str, start_height: int, end_height: int, out_file: str, batch_size: int = 8) -> None:
+    """Write the vin[0] scriptSig (asm and hex) of every transaction in a height range"""
+    config = configparser.ConfigParser()
+    config.read(RPC_CONFIG_FILE)
+    rpc = BatchRPCClient.from_config(dict(config[coin_ticker]))
+    count = 0
+    with open(out_file, 'w') as f:
+        for first in range(start_height, end_height + 1, batch_size):
+            heights = list(range(first, min(first + batch_size, end_height + 1)))
+            for result in rpc.get_blocks(heights, 2):
+                if isinstance(result, Exception):
+                    raise result
+                _, block = result
+                for tx in block['tx']:
+                    script_sig = tx['vin'][0].get('scriptSig') if tx.get('vin') else None
+                    if not script_sig:
+                        continue
+                    f.write(json.dumps({'txid': tx['txid'], 'asm': script_sig['asm'], 'hex': script_sig['hex']}) + '\n')
+                    count += 1
+    print(f"Recorded {count} scriptSigs from {coin_ticker} blocks {start_height}-{end_height} to {out_file}")
+
+
+# The indexer's decoding before envelope.py, the baseline the benchmark compares against
+
+def hex_to_base64(hex_str: str) -> Optional[str]:
+    """Convert hex string to base64"""
+    try:
+        if len(hex_str) % 2 != 0:
+            return None
+        return base64.b64encode(binascii.unhexlify(hex_str)).decode('utf-8')
+    except binascii.Error as e:
+        logger.error(f"Error decoding hex to base64: {e}")
+        return None
+
+
+def base64_to_text(base64_str: str) -> Optional[str]:
+    """Convert base64 string to text"""
+    try:
+        return base64.b64decode(base64_str).decode('utf-8')
+    except (binascii.Error, UnicodeDecodeError) as e:
+        logger.error(f"Error decoding base64 to text: {e}")
+        return None
+
+
+def hex_to_ascii(hex_string: str) -> Optional[str]:
+    """Convert hex string to ASCII"""
+    try:
+        if len(hex_string) % 2 != 0:
+            return None
+        return binascii.unhexlify(hex_string).decode('ascii')
+    except Exception as e:
+        logger.error(f"Error converting hex to ASCII: {e}")
+        return None
+
+
+def extract_inscription_data(asm_data: List[str]) -> Tuple[Optional[str], Optional[str]]:
+    """Extract inscription data from ASM"""
+    try:
+        data_string = ""
+        mime_type = None
+        index = 1
+        if index >= len(asm_data) or not asm_data[index].lstrip('-').isdigit():
+            return None, None
+        index += 1
+        if index >= len(asm_data):
+            return None, None
+        mime_type_hex = asm_data[index]
+        mime_type = hex_to_ascii(mime_type_hex)
+        index += 1
+        while index < len(asm_data):
+            part = asm_data[index]
+            if part.lstrip('-').isdigit():
+                index += 1
+                if index >= len(asm_data):
+                    return None, None
+                data_string += asm_data[index]
+                index += 1
+            else:
+                break
+        return data_string, mime_type
+    except Exception as e:
+        logger.error(f"Error extracting inscription data: {e}")
+        return None, None
+
+
+def legacy_decode(asm: str) -> Optional[str]:
+    asm_data = asm.split()
+    if not asm_data or asm_data[0] != '6582895':
+        return None
+    data_string, mime_type = extract_inscription_data(asm_data)
+    if not data_string or not mime_type or 'text/html' not in mime_type.lower():
+        return None
+    html_data_base64 = hex_to_base64(data_string)
+    if not html_data_base64:
+        return None
+    return base64_to_text(html_data_base64)
+
+
+def fast_decode(script_hex: str) -> Optional[str]:
+    if not script_hex.startswith(ORD_PREFIX_HEX):
+        return None
+    envelope = decode_envelope(bytes.fromhex(script_hex))
+    if not envelope:
+        return None
+    mime_type, body = envelope
+    if not body or not mime_type or 'text/html' not in mime_type.lower():
+        return None
+    try:
+        return body.decode('utf-8')
+    except UnicodeDecodeError:
+        return None
+
+
+def run(records: List[Dict[str, Any]], repeat: int) -> None:
+    legacy_results = [legacy_decode(r['asm']) for r in records]
+    fast_results = [fast_decode(r['hex']) for r in records]
+    mismatches = [r['txid'] for r, a, b in zip(records, legacy_results, fast_results) if a != b]
+    inscriptions = sum(1 for result in fast_results if result is not None)
+
+    timings = {}
+    for name, decode, field in (('legacy', legacy_decode, 'asm'), ('envelope', fast_decode, 'hex')):
+        inputs = [r[field] for r in records]
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for value in inputs:
+                decode(value)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        timings[name] = best
+
+    per_tx = {name: seconds / max(len(records), 1) * 1e6 for name, seconds in timings.items()}
+    print(f"{len(records)} transactions, {inscriptions} text/html inscriptions, best of {repeat}")
+    for name in ('legacy', 'envelope'):
+        print(f"  {name:<9} {timings[name] * 1000:9.2f} ms  {per_tx[name]:8.3f} us/tx")
+    if timings['envelope'] > 0:
+        print(f"  speedup   {timings['legacy'] / timings['envelope']:9.1f}x")
+    if mismatches:
+        print(f"  {len(mismatches)} transactions decode differently, e.g. {mismatches[:5]}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+    rec = sub.add_parser('record', help='record vin[0] scriptSigs from the node')
+    rec.add_argument('start_height', type=int)
+    rec.add_argument('end_height', type=int)
+    rec.add_argument('--coin', default='B1T')
+    rec.add_argument('--out', default='scriptsigs.jsonl')
+    bench = sub.add_parser('run', help='benchmark both decoders over recorded scriptSigs')
+    bench.add_argument('input')
+    bench.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        record(args.coin, args.start_height, args.end_height, args.out)
+    else:
+        logging.disable(logging.CRITICAL)  # the legacy helpers log every decode failure
+        with open(args.input) as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        run(records, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,418 @@
+"""Benchmark BlockchainScanner against a fake node serving synthetic blocks.
+
+Generate a fixture once (a JSON-lines file: a header with the mix and the outcome it
+should index, then the transactions of each block), run the scanner over it as often as
+needed, and compare the saved results of two runs:
+
+    python bench_indexer.py generate --blocks 2000 --txs 20 --mints 4 --invalid-mints 2 --out fixture.jsonl
+    python bench_indexer.py run fixture.jsonl --out before.json
+    python bench_indexer.py run fixture.jsonl --set RAW_BLOCK_MODE=True --out after.json
+    python bench_indexer.py compare before.json after.json
+
+Each run serves the fixture with fake_node.FakeNode on a local port, indexes it from
+scratch in a temporary directory and reports blocks/s, tx/s and the time spent per stage:
+fetch (RPC round trips), decode (JSON or raw block decoding), parse (envelopes and rc001
+documents) and db (everything else that applies a block, mostly SQLite). Fetch and decode
+run in the prefetch threads, so they overlap with the rest; they are summed thread time.
+compare exits with status 1 when the second run is slower than the first by more than
+--threshold.
+"""
+import argparse
+import ast
+import configparser
+import functools
+import json
+import logging
+import os
+import random
+import shutil
+import sqlite3
+import struct
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import rc001indexer
+import rpc_batch
+from fake_node import FakeNode, _varint
+from raw_block import address_params, base58check_encode
+from rpc_batch import BatchRPCClient
+
+CHUNK_LEN = 240  # Bytes per envelope piece, as getOrdTxsB1T.js splits bodies
+PARENT_INSCRIPTION_ID = 'ab' * 32 + 'i0'
+PAID_PRICE = 100000  # Satoshis, as deploys state mint_price
+STAGES = ('fetch', 'decode', 'parse', 'db')
+INVALID_MINTS = ('unknown collection', 'serial out of range', 'wrong payment', 'duplicate serial', 'wrong parent')
+
+
+def _push(data: bytes) -> bytes:
+    if len(data) < 0x4c:
+        return bytes([len(data)]) + data
+    if len(data) <= 0xff:
+        return b'\x4c' + bytes([len(data)]) + data
+    return b'\x4d' + struct.pack('<H', len(data)) + data
+
+
+def _push_number(n: int) -> bytes:
+    if n == 0:
+        return b'\x00'
+    if n <= 16:
+        return bytes([0x50 + n])
+    return _push(n.to_bytes((n.bit_length() + 8) // 8, 'little'))
+
+
+def _p2pkh(pubkey_hash: bytes) -> bytes:
+    return b'\x76\xa9\x14' + pubkey_hash + b'\x88\xac'
+
+
+def _transaction(script_sig: bytes, outputs: List[Tuple[int, bytes]], rng: random.Random) -> bytes:
+    """One input spending a random outpoint (the fake node never checks it) and `outputs`"""
+    raw = (struct.pack('<i', 1) + _varint(1) + rng.randbytes(32) + struct.pack('<I', rng.randrange(4))
+           + _varint(len(script_sig)) + script_sig + struct.pack('<I', 0xffffffff) + _varint(len(outputs)))
+    for value, script_pubkey in outputs:
+        raw += struct.pack('<q', value) + _varint(len(script_pubkey)) + script_pubkey
+    return raw + struct.pack('<I', 0)
+
+
+def _signature(rng: random.Random) -> bytes:
+    r = b'\x01' + rng.randbytes(31)
+    s = b'\x02' + rng.randbytes(31)
+    return b'\x30' + bytes([4 + len(r) + len(s)]) + b'\x02' + bytes([len(r)]) + r + b'\x02' + bytes([len(s)]) + s + b'\x01'
+
+
+def plain_transaction(rng: random.Random) -> bytes:
+    script_sig = _push(_signature(rng)) + _push(b'\x02' + rng.randbytes(32))
+    return _transaction(script_sig, [(rng.randrange(1, 10 ** 9), _p2pkh(rng.randbytes(20))) for _ in range(2)], rng)
+
+
+def inscription_transaction(content_type: str, body: bytes, rng: random.Random,
+                            payment: Optional[Tuple[int, bytes]] = None) -> bytes:
+    """A reveal transaction with the whole envelope in its scriptSig and the inscription on output 0"""
+    pieces = [body[i:i + CHUNK_LEN] for i in range(0, len(body), CHUNK_LEN)]
+    script_sig = _push(b'ord') + _push_number(len(pieces)) + _push(content_type.encode('ascii'))
+    for i, piece in enumerate(pieces):
+        script_sig += _push_number(len(pieces) - i - 1) + _push(piece)
+    script_sig += _push(_signature(rng)) + _push(b'\x51' * 40)
+    outputs = [(100000, _p2pkh(rng.randbytes(20)))]
+    if payment is not None:
+        outputs.append((payment[0], _p2pkh(payment[1])))
+    outputs.append((rng.randrange(1, 10 ** 9), _p2pkh(rng.randbytes(20))))
+    return _transaction(script_sig, outputs, rng)
+
+
+def deploy_html(title: str, mint_address: str, mint_price: str) -> str:
+    data = json.dumps({'sn': [{'range': '000001-999999'}], 'mint_address': mint_address, 'mint_price': mint_price,
+                       'parent_inscription_id': PARENT_INSCRIPTION_ID, 'emblem_inscription_id': PARENT_INSCRIPTION_ID,
+                       'website': 'https://example.com'})
+    return (f'<!DOCTYPE html><html><head><meta name="p" content="rc001"><meta name="op" content="deploy">'
+            f'<title>{title}</title></head><body><script type="application/json" id="json-data">{data}</script>'
+            f'</body></html>')
+
+
+def mint_html(title: str, sn: str, parent: str = PARENT_INSCRIPTION_ID) -> str:
+    return (f'<!DOCTYPE html><html lang="en"><head><meta charset="UTF-8"><meta name="p" content="rc001">'
+            f'<meta name="op" content="mint"><meta name="sn" content="{sn}"><title>{title}</title></head>'
+            f'<body><script src="/content/{parent}"></script></body></html>')
+
+
+def generate(out_file: str, coin_ticker: str = 'B1T', blocks: int = 1000, txs: int = 20, collections: int = 4,
+             mints: int = 4, invalid_mints: int = 1, large_every: int = 0, large_txs: int = 2000, seed: int = 1) -> None:
+    """Write a fixture of `blocks` blocks after the genesis block.
+
+    Block 1 deploys `collections` collections, every other one charging PAID_PRICE per mint.
+    Each later block holds `txs` plain transactions, `mints` valid mints and `invalid_mints`
+    mints that fail validation for one of INVALID_MINTS in turn. With `large_every`, every
+    such block also holds `large_txs` more plain transactions.
+    """
+    rng = random.Random(seed)
+    params = address_params(coin_ticker)
+    pubkey_hash = bytes(range(20))
+    mint_address = base58check_encode(bytes([params['pubkeyhash']]) + pubkey_hash)
+    titles = [f'Bench {i}' for i in range(collections)]
+    paid = {title: i % 2 == 1 for i, title in enumerate(titles)}
+    next_sn = {title: 1 for title in titles}
+    valid = invalid = transactions = 0
+
+    def mint(title: str, sn: str, pay: bool, parent: str = PARENT_INSCRIPTION_ID, price: int = PAID_PRICE) -> bytes:
+        payment = (price, pubkey_hash) if pay else None
+        return inscription_transaction('text/html;charset=utf-8', mint_html(title, sn, parent).encode(), rng, payment)
+
+    mix = {'blocks': blocks, 'txs': txs, 'collections': collections, 'mints': mints, 'invalid_mints': invalid_mints,
+           'large_every': large_every, 'large_txs': large_txs, 'seed': seed}
+    with open(out_file, 'w') as f:
+        block_lines = []
+        for height in range(1, blocks + 1):
+            block: List[bytes] = [plain_transaction(rng) for _ in range(txs)]
+            if large_every and height % large_every == 0:
+                block += [plain_transaction(rng) for _ in range(large_txs)]
+            if height == 1:
+                for title in titles:
+                    price = str(PAID_PRICE) if paid[title] else '0'
+                    block.append(inscription_transaction('text/html;charset=utf-8',
+                                                         deploy_html(title, mint_address, price).encode(), rng))
+            elif titles:
+                for _ in range(mints):
+                    title = rng.choice(titles)
+                    block.append(mint(title, f'{next_sn[title]:06d}', paid[title]))
+                    next_sn[title] += 1
+                    valid += 1
+                for _ in range(invalid_mints):
+                    reason = INVALID_MINTS[invalid % len(INVALID_MINTS)]
+                    title = rng.choice(titles)
+                    paid_titles = [t for t in titles if paid[t]]
+                    if reason == 'unknown collection':
+                        block.append(mint('No Such Collection', '000001', True))
+                    elif reason == 'serial out of range':
+                        block.append(mint(title, '0000000', paid[title]))
+                    elif reason == 'wrong payment' and paid_titles:
+                        title = rng.choice(paid_titles)
+                        block.append(mint(title, f'{next_sn[title]:06d}', True, price=PAID_PRICE - 1))
+                    elif reason == 'duplicate serial' and next_sn[title] > 1:
+                        block.append(mint(title, f'{rng.randrange(1, next_sn[title]):06d}', paid[title]))
+                    else:
+                        block.append(mint(title, f'{next_sn[title]:06d}', paid[title], parent='cd' * 32 + 'i0'))
+                    invalid += 1
+            rng.shuffle(block)
+            transactions += len(block) + 1  # and the coinbase
+            block_lines.append(json.dumps([tx.hex() for tx in block]))
+        header = {'coin': coin_ticker, 'mix': mix, 'transactions': transactions,
+                  'expected': {'collections': len(titles), 'items': valid}}
+        f.write(json.dumps(header) + '\n')
+        for line in block_lines:
+            f.write(line + '\n')
+    size = os.path.getsize(out_file)
+    print(f"Wrote {blocks} blocks, {transactions} transactions ({valid} valid and {invalid} invalid mints) "
+          f"to {out_file} ({size / 1e6:.1f} MB)")
+
+
+def load_fixture(fixture_file: str) -> Tuple[Dict[str, Any], Iterator[List[bytes]]]:
+    f = open(fixture_file)
+    header = json.loads(f.readline())
+
+    def blocks() -> Iterator[List[bytes]]:
+        with f:
+            for line in f:
+                if line.strip():
+                    yield [bytes.fromhex(tx) for tx in json.loads(line)]
+    return header, blocks()
+
+
+class StageTimer:
+    """Seconds spent per stage by wrapped callables, summed over threads.
+
+    A wrapped call running inside another one is only counted in its own stage, so the
+    stages never count the same second twice within a thread.
+    """
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = defaultdict(float)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def wrap(self, stage: str, func: Callable) -> Callable:
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            stack = getattr(self._local, 'stack', None)
+            if stack is None:
+                stack = self._local.stack = []
+            stack.append(0.0)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                nested = stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+                with self._lock:
+                    self.seconds[stage] += elapsed - nested
+        return timed
+
+
+def _instrument(scanner: rc001indexer.BlockchainScanner, timer: StageTimer) -> Callable[[], None]:
+    """Time the scanner's stages; returns the function that removes the module-level wrappers"""
+    originals = [(rc001indexer, 'parse_block'), (rc001indexer, 'parse_operation'), (BatchRPCClient, 'get_blocks'),
+                 (rpc_batch, 'json')]
+    saved = [(owner, name, getattr(owner, name)) for owner, name in originals]
+    rc001indexer.parse_block = timer.wrap('decode', rc001indexer.parse_block)
+    rc001indexer.parse_operation = timer.wrap('parse', rc001indexer.parse_operation)
+    BatchRPCClient.get_blocks = timer.wrap('fetch', BatchRPCClient.get_blocks)
+    # verbosity=2 blocks are decoded by the JSON-RPC client as they arrive
+    rpc_batch.json = SimpleNamespace(dumps=json.dumps, loads=timer.wrap('decode', json.loads))
+    scanner.reassemble = timer.wrap('parse', scanner.reassemble)
+    scanner.apply_block = timer.wrap('db', scanner.apply_block)
+    scanner.commit_blocks = timer.wrap('db', scanner.commit_blocks)
+
+    def restore() -> None:
+        for owner, name, value in saved:
+            setattr(owner, name, value)
+    return restore
+
+
+def run_once(header: Dict[str, Any], port: int, settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Index the served fixture from scratch in a temporary directory and measure it"""
+    coin_ticker = header['coin']
+    workdir = tempfile.mkdtemp(prefix='bench_indexer_')
+    cwd = os.getcwd()
+    saved = {name: getattr(rc001indexer, name) for name in settings}
+    try:
+        os.makedirs(os.path.join(workdir, 'config'))
+        os.makedirs(os.path.join(workdir, 'rc001'))
+        config = configparser.ConfigParser()
+        config[coin_ticker] = {'rpcuser': 'bench', 'rpcpassword': 'bench', 'rpchost': '127.0.0.1', 'rpcport': str(port)}
+        with open(os.path.join(workdir, 'config', 'rpc.conf'), 'w') as f:
+            config.write(f)
+        os.chdir(os.path.join(workdir, 'rc001'))  # The indexer's paths are relative to rc001/
+        for name, value in settings.items():
+            setattr(rc001indexer, name, value)
+        scanner = rc001indexer.BlockchainScanner()
+        block_heights = scanner.load_last_block_heights()
+        timer = StageTimer()
+        restore = _instrument(scanner, timer)
+        try:
+            started = time.perf_counter()
+            scanner.scan_chain(coin_ticker, block_heights)
+            seconds = time.perf_counter() - started
+        finally:
+            restore()
+        with sqlite3.connect(rc001indexer.DATABASE_FILE) as conn:
+            collections = conn.execute('SELECT COUNT(*) FROM collections').fetchone()[0]
+            items = conn.execute('SELECT COUNT(*) FROM items').fetchone()[0]
+        scanner.db.close()
+    finally:
+        os.chdir(cwd)
+        for name, value in saved.items():
+            setattr(rc001indexer, name, value)
+        shutil.rmtree(workdir, ignore_errors=True)
+    blocks = block_heights[coin_ticker]['last_block_height']
+    stages = {stage: timer.seconds.get(stage, 0.0) for stage in STAGES}
+    # Time the scanning thread spent outside parse and db: waiting for prefetched blocks, loop overhead
+    stages['other'] = max(seconds - stages['parse'] - stages['db'], 0.0)
+    return {'seconds': seconds, 'blocks': blocks, 'transactions': header['transactions'],
+            'blocks_per_sec': blocks / seconds, 'tx_per_sec': header['transactions'] / seconds,
+            'stages': stages, 'collections': collections, 'items': items}
+
+
+def run(fixture_file: str, repeat: int = 3, settings: Optional[Dict[str, Any]] = None,
+        out_file: Optional[str] = None) -> Dict[str, Any]:
+    """Serve a fixture and scan it `repeat` times, keeping the fastest run"""
+    settings = dict(settings or {})
+    settings.setdefault('MEMPOOL_INTERVAL', 0)
+    header, blocks = load_fixture(fixture_file)
+    node = FakeNode(header['coin'], 0)
+    for transactions in [[]] + list(blocks):  # The genesis block, then the fixture's
+        node.mine(transactions)
+    server = node.serve()
+    try:
+        runs = [run_once(header, server.server_port, settings) for _ in range(repeat)]
+    finally:
+        server.shutdown()
+        server.server_close()
+    result = min(runs, key=lambda r: r['seconds'])
+    result.update({'fixture': fixture_file, 'mix': header['mix'], 'repeat': repeat,
+                   'settings': {name: repr(value) for name, value in settings.items()}})
+    report(result)
+    expected = header['expected']
+    if (result['collections'], result['items']) != (expected['collections'], expected['items']):
+        print(f"  indexed {result['collections']} collections and {result['items']} items, "
+              f"the fixture holds {expected['collections']} and {expected['items']}")
+    if out_file:
+        with open(out_file, 'w') as f:
+            json.dump(result, f, indent=2)
+    return result
+
+
+def report(result: Dict[str, Any]) -> None:
+    print(f"{result['blocks']} blocks, {result['transactions']} transactions in {result['seconds']:.2f} s "
+          f"(best of {result['repeat']})")
+    print(f"  {result['blocks_per_sec']:10.1f} blocks/s  {result['tx_per_sec']:10.1f} tx/s")
+    for stage, seconds in result['stages'].items():
+        print(f"  {stage:<7} {seconds:9.3f} s  {seconds / max(result['blocks'], 1) * 1e3:8.3f} ms/block")
+
+
+def compare(before: Dict[str, Any], after: Dict[str, Any], threshold: float = 0.1) -> List[str]:
+    """Regressions of `after` against `before`: rates lower, or stages slower, by more than `threshold`"""
+    regressions = []
+    print(f"{'':<14}{'before':>12}{'after':>12}{'change':>9}")
+    for key in ('blocks_per_sec', 'tx_per_sec'):
+        change = after[key] / before[key] - 1 if before[key] else 0.0
+        flag = change < -threshold
+        print(f"{key:<14}{before[key]:12.1f}{after[key]:12.1f}{change:+9.1%}{'  REGRESSION' if flag else ''}")
+        if flag:
+            regressions.append(key)
+    for stage in before['stages']:
+        # Per block, so fixtures of different lengths compare; stages under 1% of the run are noise
+        old = before['stages'][stage] / max(before['blocks'], 1) * 1e3
+        new = after['stages'].get(stage, 0.0) / max(after['blocks'], 1) * 1e3
+        change = new / old - 1 if old else 0.0
+        flag = change > threshold and before['stages'][stage] > 0.01 * before['seconds']
+        print(f"{stage + ' ms/block':<14}{old:12.3f}{new:12.3f}{change:+9.1%}{'  REGRESSION' if flag else ''}")
+        if flag:
+            regressions.append(stage)
+    if before.get('fixture') != after.get('fixture') or before.get('mix') != after.get('mix'):
+        print("The runs used different fixtures")
+    if (before.get('collections'), before.get('items')) != (after.get('collections'), after.get('items')):
+        print(f"The runs indexed different results: {before.get('collections')}/{before.get('items')} "
+              f"collections/items before, {after.get('collections')}/{after.get('items')} after")
+    return regressions
+
+
+def _setting(value: str) -> Tuple[str, Any]:
+    name, _, literal = value.partition('=')
+    if not hasattr(rc001indexer, name):
+        raise argparse.ArgumentTypeError(f"rc001indexer has no setting {name}")
+    try:
+        return name, ast.literal_eval(literal)
+    except (ValueError, SyntaxError):
+        raise argparse.ArgumentTypeError(f"{literal!r} is not a Python literal")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+    gen = sub.add_parser('generate', help='write a fixture of synthetic blocks')
+    gen.add_argument('--coin', default='B1T')
+    gen.add_argument('--blocks', type=int, default=1000)
+    gen.add_argument('--txs', type=int, default=20, help='plain transactions per block')
+    gen.add_argument('--collections', type=int, default=4, help='collections deployed in block 1')
+    gen.add_argument('--mints', type=int, default=4, help='valid mints per block')
+    gen.add_argument('--invalid-mints', type=int, default=1, help='mints per block that fail validation')
+    gen.add_argument('--large-every', type=int, default=0, help='every Nth block is a large one (0 = none)')
+    gen.add_argument('--large-txs', type=int, default=2000, help='extra plain transactions in a large block')
+    gen.add_argument('--seed', type=int, default=1)
+    gen.add_argument('--out', default='fixture.jsonl')
+    bench = sub.add_parser('run', help='scan a fixture served by a fake node')
+    bench.add_argument('fixture')
+    bench.add_argument('--repeat', type=int, default=3, help='runs to take the fastest of')
+    bench.add_argument('--set', type=_setting, action='append', default=[], metavar='NAME=VALUE',
+                       help='override an rc001indexer setting, e.g. RAW_BLOCK_MODE=True')
+    bench.add_argument('--out', help='save the result as JSON for compare')
+    cmp = sub.add_parser('compare', help='compare two saved results and flag regressions')
+    cmp.add_argument('before')
+    cmp.add_argument('after')
+    cmp.add_argument('--threshold', type=float, default=0.1, help='relative slowdown flagged as a regression')
+    args = parser.parse_args()
+
+    if args.command == 'generate':
+        generate(args.out, args.coin, args.blocks, args.txs, args.collections, args.mints, args.invalid_mints,
+                 args.large_every, args.large_txs, args.seed)
+    elif args.command == 'run':
+        logging.disable(logging.WARNING)  # Every mint, valid or not, is logged
+        run(args.fixture, args.repeat, dict(args.set), args.out)
+    else:
+        with open(args.before) as f:
+            before = json.load(f)
+        with open(args.after) as f:
+            after = json.load(f)
+        regressions = compare(before, after, args.threshold)
+        if regressions:
+            print(f"Regressions: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""Append-only on-disk cache of compressed raw blocks, one directory per chain.
+
+Layout of <directory>/<coin>/:
+  blocks-00000.dat, ...  zlib-compressed serialized blocks, appended as they are cached; a new
+                         segment is started once the current one reaches SEGMENT_BYTES
+  index.dat              one fixed-size entry per height: block hash, segment, offset and
+                         length of the compressed block (length 0 = height not cached)
+
+Readers memory-map the segments and the index, so a cached block costs a copy out of the
+page cache and a decompress. Blocks orphaned by a reorg are only dropped from the index;
+their bytes stay in the segment. A damaged entry (e.g. after a power failure) fails to
+decompress and is reported as not cached.
+"""
+import mmap
+import os
+import re
+import struct
+import threading
+import zlib
+from typing import Dict, Optional, Tuple
+
+INDEX_ENTRY = struct.Struct('<32sIQI')  # block hash, segment, offset, length
+SEGMENT_BYTES = 256 * 1024 * 1024
+COMPRESS_LEVEL = 6
+_SEGMENT_NAME = re.compile(r'^blocks-(\d{5})\.dat$')
+
+
+def compress_block(raw: bytes) -> bytes:
+    """Compress a serialized block for append_compressed (zlib releases the GIL, so threads can share the work)"""
+    return zlib.compress(raw, COMPRESS_LEVEL)
+
+
+class BlockCache:
+    """Cached raw blocks of one chain, keyed by height.
+
+    A read-only instance (e.g. in a backfill worker) sees the blocks cached when it reads
+    them; it never opens files for writing. `get` may be called from several threads while
+    one thread appends or truncates.
+    """
+
+    def __init__(self, directory: str, coin_ticker: str, readonly: bool = False):
+        self.path = os.path.join(directory, coin_ticker)
+        self.readonly = readonly
+        self._lock = threading.Lock()
+        self._segment_maps: Dict[int, mmap.mmap] = {}
+        self._segment_fds: Dict[int, int] = {}
+        self._index_map: Optional[mmap.mmap] = None
+        if not readonly:
+            os.makedirs(self.path, exist_ok=True)
+        index_path = os.path.join(self.path, 'index.dat')
+        self._index_fd = os.open(index_path, os.O_RDONLY if readonly else os.O_RDWR | os.O_CREAT, 0o644)
+        # The index never shrinks (a shrinking mapped file faults readers), so truncated entries are zeroed
+        self.height = self._top_height(os.fstat(self._index_fd).st_size // INDEX_ENTRY.size - 1)
+        self._write_segment = self._write_fd = None
+        self._write_offset = 0
+        if not readonly:
+            segments = [int(m.group(1)) for m in map(_SEGMENT_NAME.match, os.listdir(self.path)) if m]
+            self._open_write_segment(max(segments, default=0))
+
+    @classmethod
+    def open_readonly(cls, directory: str, coin_ticker: str) -> Optional['BlockCache']:
+        """A read-only view of the chain's cache, or None when nothing was cached yet"""
+        if not os.path.exists(os.path.join(directory, coin_ticker, 'index.dat')):
+            return None
+        return cls(directory, coin_ticker, readonly=True)
+
+    def close(self) -> None:
+        with self._lock:
+            for mapped in self._segment_maps.values():
+                mapped.close()
+            self._segment_maps.clear()
+            for fd in self._segment_fds.values():
+                os.close(fd)
+            self._segment_fds.clear()
+            if self._index_map is not None:
+                self._index_map.close()
+                self._index_map = None
+            if self._write_fd is not None:
+                os.close(self._write_fd)
+                self._write_fd = None
+            os.close(self._index_fd)
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.path, f'blocks-{segment:05d}.dat')
+
+    def _open_write_segment(self, segment: int) -> None:
+        if self._write_fd is not None:
+            os.close(self._write_fd)
+        self._write_fd = os.open(self._segment_path(segment), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._write_segment = segment
+        self._write_offset = os.fstat(self._write_fd).st_size
+
+    def _read_entry(self, height: int) -> Optional[Tuple[bytes, int, int, int]]:
+        """The index entry for `height` (caller holds the lock), or None if the height is not cached"""
+        position = height * INDEX_ENTRY.size
+        if height < 0:
+            return None
+        if self._index_map is None or position + INDEX_ENTRY.size > len(self._index_map):
+            size = os.fstat(self._index_fd).st_size
+            if position + INDEX_ENTRY.size > size:
+                return None
+            if self._index_map is not None:
+                self._index_map.close()
+            self._index_map = mmap.mmap(self._index_fd, size, access=mmap.ACCESS_READ)
+        entry = INDEX_ENTRY.unpack_from(self._index_map, position)
+        return entry if entry[3] else None
+
+    def _top_height(self, height: int) -> int:
+        with self._lock:
+            while height >= 0 and self._read_entry(height) is None:
+                height -= 1
+        return height
+
+    def _read_segment(self, segment: int, offset: int, length: int) -> Optional[bytes]:
+        mapped = self._segment_maps.get(segment)
+        if mapped is None or offset + length > len(mapped):
+            fd = self._segment_fds.get(segment)
+            if fd is None:
+                try:
+                    fd = self._segment_fds[segment] = os.open(self._segment_path(segment), os.O_RDONLY)
+                except FileNotFoundError:
+                    return None
+            size = os.fstat(fd).st_size
+            if offset + length > size:
+                return None
+            if mapped is not None:
+                mapped.close()
+            mapped = self._segment_maps[segment] = mmap.mmap(fd, size, access=mmap.ACCESS_READ)
+        return mapped[offset:offset + length]
+
+    def get(self, height: int) -> Optional[Tuple[str, bytes]]:
+        """(block hash, serialized block) for `height`, or None when it is not cached or unreadable"""
+        with self._lock:
+            entry = self._read_entry(height)
+            if entry is None:
+                return None
+            block_hash, segment, offset, length = entry
+            data = self._read_segment(segment, offset, length)
+        if data is None:
+            return None
+        try:
+            return block_hash[::-1].hex(), zlib.decompress(data)
+        except zlib.error:
+            return None
+
+    def append(self, height: int, block_hash: str, raw: bytes) -> None:
+        self.append_compressed(height, block_hash, compress_block(raw))
+
+    def append_compressed(self, height: int, block_hash: str, data: bytes) -> None:
+        """Store a block compressed with compress_block, replacing any block cached at that height"""
+        if self.readonly:
+            raise ValueError('Block cache is read-only')
+        with self._lock:
+            if self._write_offset and self._write_offset + len(data) > SEGMENT_BYTES:
+                self._open_write_segment(self._write_segment + 1)
+            offset = self._write_offset
+            os.write(self._write_fd, data)
+            self._write_offset += len(data)
+            entry = INDEX_ENTRY.pack(bytes.fromhex(block_hash)[::-1], self._write_segment, offset, len(data))
+            os.pwrite(self._index_fd, entry, height * INDEX_ENTRY.size)
+        self.height = max(self.height, height)
+
+    def truncate(self, height: int) -> None:
+        """Forget every block above `height` (called when those blocks were orphaned)"""
+        if self.height <= height:
+            return
+        with self._lock:
+            first = max(height + 1, 0)
+            os.pwrite(self._index_fd, bytes(INDEX_ENTRY.size * (self.height + 1 - first)), first * INDEX_ENTRY.size)
+        self.height = self._top_height(height)
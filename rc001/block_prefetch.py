@@ -0,0 +1,98 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class BlockFetchError(Exception):
+    """Raised when a prefetched block could not be retrieved from the node"""
+
+    def __init__(self, height: int, cause: BaseException):
+        super().__init__(f"Failed to fetch block {height}: {cause}")
+        self.height = height
+        self.cause = cause
+
+
+class BlockPrefetcher:
+    """Fetch a range of blocks with a pool of threads and yield them in strict height order.
+
+    Heights are fetched in batches of `batch_size` consecutive blocks through
+    `fetch_blocks(heights)`, which returns one entry per height: the block, or an
+    exception for a height that failed. Up to `window` heights are kept in flight at
+    once. Fetched blocks that are waiting for the consumer count against `max_bytes`
+    (using `size_of`), and no new fetches are started while that limit is exceeded.
+    The batch holding the next height the consumer needs is always scheduled first,
+    so the pipeline cannot stall.
+    """
+
+    def __init__(self, fetch_blocks: Callable[[List[int]], List[Any]], start_height: int, end_height: int,
+                 window: int = 16, workers: int = 4, max_bytes: int = 64 * 1024 * 1024, batch_size: int = 1,
+                 size_of: Optional[Callable[[Dict[str, Any]], int]] = None):
+        self.fetch_blocks = fetch_blocks
+        self.start_height = start_height
+        self.end_height = end_height
+        self.batch_size = max(1, batch_size)
+        self.window = max(self.batch_size, window)
+        self.workers = max(1, workers)
+        self.max_bytes = max_bytes
+        self.size_of = size_of or (lambda block: int(block.get('size', 0)))
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._in_flight: Dict[int, Future] = {}
+        self._in_flight_blocks = 0
+        self._held_bytes = 0
+        self._lock = threading.Lock()
+        self._next_submit = start_height
+
+    def __enter__(self) -> 'BlockPrefetcher':
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='block-fetch')
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Cancel outstanding fetches and stop the worker pool"""
+        if self._executor is None:
+            return
+        for future in self._in_flight.values():
+            future.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        self._in_flight.clear()
+
+    def _fetch(self, heights: List[int]) -> List[Tuple[Any, int]]:
+        try:
+            results = self.fetch_blocks(heights)
+        except Exception as e:
+            results = [e] * len(heights)
+        sized = []
+        for result in results:
+            size = 0 if isinstance(result, Exception) else self.size_of(result)
+            sized.append((result, size))
+        with self._lock:
+            self._held_bytes += sum(size for _, size in sized)
+        return sized
+
+    def _fill(self) -> None:
+        while (self._next_submit <= self.end_height and self._in_flight_blocks < self.window
+               and (self._held_bytes < self.max_bytes or not self._in_flight)):
+            first = self._next_submit
+            last = min(first + self.batch_size - 1, self.end_height)
+            self._in_flight[first] = self._executor.submit(self._fetch, list(range(first, last + 1)))
+            self._in_flight_blocks += last - first + 1
+            self._next_submit = last + 1
+
+    def __iter__(self) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        if self._executor is None:
+            raise RuntimeError("BlockPrefetcher must be used as a context manager")
+        height = self.start_height
+        while height <= self.end_height:
+            self._fill()
+            batch = self._in_flight.pop(height).result()
+            self._in_flight_blocks -= len(batch)
+            for offset, (result, size) in enumerate(batch):
+                with self._lock:
+                    self._held_bytes -= size
+                if isinstance(result, Exception):
+                    raise BlockFetchError(height + offset, result) from result
+                yield height + offset, result
+            height += len(batch)
@@ -0,0 +1,114 @@
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+def _bounds(range_value: Optional[str]) -> Optional[Tuple[str, str, int]]:
+    """(low, high, width) of a "low-high" range, None if it has no upper bound"""
+    if not isinstance(range_value, str):
+        return None
+    parts = range_value.split('-')
+    if len(parts) < 2:
+        return None
+    return parts[0], parts[1], len(parts[1])
+
+
+def compile_sn_validator(ranges: List[Tuple[int, str]]) -> Callable[[str], bool]:
+    """Build the serial-number check for a collection from its (range_index, range_value) rows.
+
+    Same rules as the per-mint lookup it replaces:
+    - a first range with a bound longer than two digits is one plain range
+      ("000001-000500"), compared after zero-padding to the width of the upper bound;
+    - a single range of any width is also compared as a whole;
+    - otherwise the serial is read as two-character segments, segment i checked
+      against range i ("01-10", "01-05" accepts "0703").
+    Ranges without an upper bound reject every serial that reaches them.
+    """
+    by_index: Dict[int, Optional[str]] = {}
+    sn_range = None
+    for range_index, range_value in ranges:
+        if range_index == 0:
+            if not isinstance(range_value, str):
+                return lambda sn: False  # A NULL first range made every mint of the collection fail
+            if '-' in range_value and len(range_value.split('-')[0]) > 2:
+                sn_range = range_value
+        by_index[range_index] = range_value
+
+    if sn_range is not None:
+        low, high, width = _bounds(sn_range)
+        if len(low) > 2 and width > 2:
+            return lambda sn: low <= sn.zfill(width) <= high
+
+    if len(by_index) == 1:
+        bounds = _bounds(next(iter(by_index.values())))
+        if bounds is None:
+            return lambda sn: False
+        low, high, width = bounds
+        return lambda sn: low <= sn.zfill(width) <= high
+
+    segments = {index: _bounds(value) for index, value in by_index.items()}
+
+    def validate(sn: str) -> bool:
+        for i in range(0, len(sn), 2):
+            bounds = segments.get(i // 2)
+            if bounds is None:
+                return False
+            low, high, width = bounds
+            if not low <= sn[i:i + 2].zfill(width) <= high:
+                return False
+        return True
+
+    return validate
+
+
+class CollectionEntry:
+    """What a mint needs to know about its collection"""
+
+    __slots__ = ('collection_id', 'parent_inscription_id', 'mint_address', 'mint_price_sats',
+                 'mint_price_btc', 'is_valid_sn')
+
+    def __init__(self, collection_id: int, parent_inscription_id: Optional[str], mint_address: Optional[str],
+                 mint_price: Optional[str], ranges: List[Tuple[int, str]]):
+        self.collection_id = collection_id
+        self.parent_inscription_id = parent_inscription_id
+        self.mint_address = mint_address
+        # Deploys store whatever the JSON held; a price that is not a number makes every mint fail
+        try:
+            self.mint_price_sats: Optional[Decimal] = Decimal(float(mint_price))
+        except (TypeError, ValueError):
+            self.mint_price_sats = None
+        self.mint_price_btc = self.mint_price_sats / Decimal(100000000) if self.mint_price_sats is not None else None
+        self.is_valid_sn = compile_sn_validator(ranges)
+
+
+class CollectionRegistry:
+    """In-memory view of the collections table keyed by (coin_ticker, sanitized_name)"""
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, str], CollectionEntry] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, coin_ticker: str, sanitized_name: str) -> Optional[CollectionEntry]:
+        return self._entries.get((coin_ticker, sanitized_name))
+
+    def load(self, conn, collection_id: Optional[int] = None) -> None:
+        """Read all collections (or just one, after a deploy) from the database"""
+        if collection_id is None:
+            self._entries = {}
+            rows = conn.execute('''SELECT collection_id, coin_ticker, sanitized_name, mint_address, mint_price,
+                                   parent_inscription_id FROM collections''').fetchall()
+            range_rows = conn.execute('''SELECT collection_id, range_index, range_value FROM serial_ranges
+                                         ORDER BY collection_id, range_index''').fetchall()
+        else:
+            rows = conn.execute('''SELECT collection_id, coin_ticker, sanitized_name, mint_address, mint_price,
+                                   parent_inscription_id FROM collections WHERE collection_id = ?''',
+                                (collection_id,)).fetchall()
+            range_rows = conn.execute('''SELECT collection_id, range_index, range_value FROM serial_ranges
+                                         WHERE collection_id = ? ORDER BY range_index''', (collection_id,)).fetchall()
+        ranges: Dict[int, List[Tuple[int, str]]] = {}
+        for range_collection_id, range_index, range_value in range_rows:
+            ranges.setdefault(range_collection_id, []).append((range_index, range_value))
+        for row_id, coin_ticker, sanitized_name, mint_address, mint_price, parent_inscription_id in rows:
+            self._entries[(coin_ticker, sanitized_name)] = CollectionEntry(
+                row_id, parent_inscription_id, mint_address, mint_price, ranges.get(row_id, []))
@@ -0,0 +1,77 @@
+"""Per-collection supply counters, kept up to date by the indexer.
+
+The collection_stats table holds one row per collection, written in the same transaction as
+the deploy, mint or rollback that changes it, so the web app lists every collection's
+supply with one query instead of counting items per collection. left_to_mint and
+percent_minted only count confirmed mints; the web app subtracts pending ones itself.
+max_supply is NULL when a serial range is not "low-high" numbers.
+"""
+from typing import Iterable, Optional
+
+CREATE_STATS_TABLE = '''CREATE TABLE IF NOT EXISTS collection_stats (
+                        collection_id INTEGER PRIMARY KEY,
+                        coin_ticker TEXT,
+                        max_supply INTEGER,
+                        minted INTEGER NOT NULL DEFAULT 0,
+                        left_to_mint INTEGER,
+                        percent_minted REAL,
+                        last_mint_height INTEGER
+                        )'''
+
+
+def _derived(minted: str) -> str:
+    """Assignments of left_to_mint and percent_minted for `minted` items (an SQL expression)"""
+    return f'''left_to_mint = MAX(max_supply - ({minted}), 0),
+               percent_minted = CASE WHEN max_supply > 0 THEN ROUND(({minted}) * 100.0 / max_supply, 2)
+                                     WHEN max_supply IS NOT NULL THEN 0 END'''
+
+
+def max_supply(range_values: Iterable[Optional[str]]) -> Optional[int]:
+    """Serial numbers a collection's ranges allow: the product of their sizes, as /collections reported it"""
+    supply = 1
+    for range_value in range_values:
+        try:
+            start, end = map(int, range_value.split('-'))
+        except (AttributeError, ValueError):
+            return None
+        supply *= end - start + 1
+    return supply
+
+
+def insert_stats(conn, collection_id: int, coin_ticker: str, range_values: Iterable[Optional[str]]) -> None:
+    """Start the counters of a collection that was just deployed"""
+    supply = max_supply(range_values)
+    conn.execute('''INSERT OR REPLACE INTO collection_stats
+                    (collection_id, coin_ticker, max_supply, minted, left_to_mint, percent_minted) VALUES (?, ?, ?, 0, ?, ?)''',
+                 (collection_id, coin_ticker, supply, supply, None if supply is None else 0))
+
+
+def record_mint(conn, collection_id: int, height: int) -> None:
+    # The right-hand sides all read the row as it was before the update
+    conn.execute(f'''UPDATE collection_stats SET minted = minted + 1, last_mint_height = ?, {_derived('minted + 1')}
+                     WHERE collection_id = ?''', (height, collection_id))
+
+
+def refresh_stats(conn, coin_ticker: str) -> None:
+    """Recount a chain's collections from their items, after a rollback removed some"""
+    conn.execute('''DELETE FROM collection_stats WHERE coin_ticker = ?
+                    AND collection_id NOT IN (SELECT collection_id FROM collections)''', (coin_ticker,))
+    conn.execute('''UPDATE collection_stats SET
+                    minted = (SELECT COUNT(*) FROM items WHERE items.collection_id = collection_stats.collection_id),
+                    last_mint_height = (SELECT MAX(created_at) FROM items
+                                        WHERE items.collection_id = collection_stats.collection_id)
+                    WHERE coin_ticker = ?''', (coin_ticker,))
+    conn.execute(f"UPDATE collection_stats SET {_derived('minted')} WHERE coin_ticker = ?", (coin_ticker,))
+
+
+def fill_missing_stats(conn) -> int:
+    """Create the counters of collections deployed before the table existed; returns how many"""
+    missing = conn.execute('''SELECT collection_id, coin_ticker FROM collections
+                              WHERE collection_id NOT IN (SELECT collection_id FROM collection_stats)''').fetchall()
+    for collection_id, coin_ticker in missing:
+        ranges = conn.execute('SELECT range_value FROM serial_ranges WHERE collection_id = ? ORDER BY range_index',
+                              (collection_id,)).fetchall()
+        insert_stats(conn, collection_id, coin_ticker, [range_value for range_value, in ranges])
+    for coin_ticker in {coin_ticker for _, coin_ticker in missing}:
+        refresh_stats(conn, coin_ticker)
+    return len(missing)
@@ -0,0 +1,49 @@
+"""Content-addressed store of inscription bodies, shared by every chain.
+
+Each distinct body is one file named by its SHA-256, at <directory>/ab/cd/abcd..., written to
+a temporary name and renamed into place, so a reader never sees a partial file and identical
+bodies (re-inscriptions, common scripts) are stored once. Which inscription has which body
+and content type is recorded in the inscription_content table; the web app serves the files
+from there with the hash as their ETag.
+"""
+import hashlib
+import os
+import threading
+
+CREATE_CONTENT_TABLE = '''CREATE TABLE IF NOT EXISTS inscription_content (
+                        inscription_id TEXT PRIMARY KEY,
+                        coin_ticker TEXT,
+                        content_type TEXT,
+                        sha256 TEXT,
+                        size INTEGER,
+                        height INTEGER
+                        )'''
+
+
+class ContentStore:
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], digest[2:4], digest)
+
+    def put(self, body: bytes, sync: bool = True) -> str:
+        """Store a body unless it is already stored and return its hash.
+
+        With `sync`, the file is flushed to disk before it is renamed into place, so a stored
+        body survives a power failure along with the database row that references it.
+        """
+        digest = hashlib.sha256(body).hexdigest()
+        path = self.path(digest)
+        if os.path.exists(path):
+            return digest
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary, 'wb') as f:
+            f.write(body)
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temporary, path)
+        return digest
@@ -0,0 +1,143 @@
+from typing import Optional, Tuple
+
+# An inscription scriptSig starts with a 3-byte push of "ord" (asm "6582895")
+ORD_PREFIX = b'\x03ord'
+ORD_PREFIX_HEX = ORD_PREFIX.hex()
+
+OP_0 = 0x00
+OP_PUSHDATA1 = 0x4c
+OP_PUSHDATA2 = 0x4d
+OP_PUSHDATA4 = 0x4e
+OP_1NEGATE = 0x4f
+OP_1 = 0x51
+OP_16 = 0x60
+
+
+def _read_push(script, i: int, end: int) -> Tuple[int, Optional[int], Optional[int]]:
+    """Read the element at `i`; return (next offset, data start, data end).
+
+    data start/end are None for a non-push opcode. Raises IndexError on truncation.
+    """
+    opcode = script[i]
+    i += 1
+    if opcode > OP_PUSHDATA4:
+        return i, None, None
+    if opcode < OP_PUSHDATA1:
+        size = opcode
+    elif opcode == OP_PUSHDATA1:
+        size = script[i]
+        i += 1
+    elif opcode == OP_PUSHDATA2:
+        size = script[i] | script[i + 1] << 8
+        i += 2
+    else:
+        size = script[i] | script[i + 1] << 8 | script[i + 2] << 16 | script[i + 3] << 24
+        i += 4
+    if i + size > end:
+        raise IndexError("push past end of script")
+    return i + size, i, i + size
+
+
+def _is_number(opcode: int, start: Optional[int], stop: Optional[int]) -> bool:
+    # Elements that bitcoind renders as a decimal in asm: small pushes and OP_1NEGATE..OP_16
+    if start is None:
+        return opcode == OP_1NEGATE or OP_1 <= opcode <= OP_16
+    return stop - start <= 4
+
+
+def is_inscription_script(script) -> bool:
+    """Cheap prefilter: does this scriptSig start with the "ord" push?"""
+    return script[:4] == ORD_PREFIX
+
+
+def _number_value(script, opcode: int, start: Optional[int], stop: Optional[int]) -> int:
+    """Value of an element that _is_number accepted (a minimal script number or OP_1NEGATE..OP_16)"""
+    if start is None:
+        return -1 if opcode == OP_1NEGATE else opcode - OP_1 + 1
+    data = bytes(script[start:stop])
+    if not data:
+        return 0
+    value = int.from_bytes(data, 'little')
+    if data[-1] & 0x80:
+        return -(value & ~(0x80 << 8 * (len(data) - 1)))
+    return value
+
+
+def _read_pieces(script, i: int, end: int) -> Optional[Tuple[bytes, Optional[int]]]:
+    """Read (number, data) pairs from `i` until the first element that is not a number.
+
+    Returns the concatenated data and the last number read (the countdown of pieces still
+    to come; None when there was no pair), or None when a pair is malformed.
+    """
+    body = bytearray()
+    remaining = None
+    while i < end:
+        opcode = script[i]
+        try:
+            after_number, start, stop = _read_push(script, i, end)
+        except IndexError:
+            break  # bitcoind renders a truncated tail as "[error]", which ends the envelope
+        if not _is_number(opcode, start, stop):
+            break
+        if after_number >= end:
+            return None
+        number = _number_value(script, opcode, start, stop)
+        i, start, stop = _read_push(script, after_number, end)
+        if start is None:
+            return None
+        body += script[start:stop]
+        remaining = number
+    return bytes(body), remaining
+
+
+def decode_envelope_part(script) -> Optional[Tuple[Optional[str], bytes, int]]:
+    """Decode the start of an ord envelope from raw scriptSig bytes in a single pass.
+
+    Mirrors the asm-based extract_inscription_data of bench_envelope.py: "ord", a chunk
+    count, the content type, then (number, data) pairs until the first element that is
+    not a number (the signature). Returns (content_type, body, remaining) or None when the
+    script is not a well-formed envelope. content_type is None if it is not ASCII.
+    remaining is the countdown of the last pair: 0 when the envelope is complete, more
+    when it continues in the next transaction of a chain (see reassembly.py).
+    """
+    if script[:4] != ORD_PREFIX:
+        return None
+    end = len(script)
+    try:
+        i = 4
+        opcode = script[i]
+        i, start, stop = _read_push(script, i, end)
+        if not _is_number(opcode, start, stop):
+            return None
+        i, start, stop = _read_push(script, i, end)
+        if start is None:
+            return None
+        try:
+            content_type = bytes(script[start:stop]).decode('ascii')
+        except UnicodeDecodeError:
+            content_type = None
+        pieces = _read_pieces(script, i, end)
+        if pieces is None:
+            return None
+        body, remaining = pieces
+        return content_type, body, remaining or 0
+    except IndexError:
+        return None
+
+
+def decode_continuation(script) -> Optional[Tuple[bytes, int]]:
+    """(data, remaining) of the pairs that open the scriptSig of a follow-up transaction
+    in a split envelope, None when it does not start with a pair"""
+    try:
+        pieces = _read_pieces(script, 0, len(script))
+    except IndexError:
+        return None
+    if pieces is None or pieces[1] is None:
+        return None
+    return pieces
+
+
+def decode_envelope(script) -> Optional[Tuple[Optional[str], bytes]]:
+    """(content_type, body) of an ord envelope, complete or not; see decode_envelope_part"""
+    part = decode_envelope_part(script)
+    return part[:2] if part else None
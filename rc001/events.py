@@ -0,0 +1,72 @@
+"""Append-only feed of the indexer's changes, for consumers that keep their own copy up to date.
+
+Every deploy, mint, transfer and rollback adds one row to the events table in the same
+transaction as the change itself, so a reader never sees one without the other. event_id
+only grows (AUTOINCREMENT never reuses an id, not even after a rollback), so a consumer keeps
+the last id it handled and asks for what came after it:
+
+    with sqlite3.connect('collections/all_collections.db') as conn:
+        for event in read_events(conn, after_id=last_id):
+            ...
+            last_id = event['event_id']
+
+A rollback does not remove the events of the orphaned blocks. It adds a `rollback` event
+with the fork height, after which a consumer drops what it derived from the blocks above it.
+"""
+import json
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+EVENT_TYPES = ('deploy', 'mint', 'transfer', 'rollback')
+MAX_EVENTS = 1000  # Most events returned by one read_events call
+
+CREATE_EVENTS_TABLE = '''CREATE TABLE IF NOT EXISTS events (
+                        event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        coin_ticker TEXT,
+                        event_type TEXT,
+                        height INTEGER,
+                        collection_id INTEGER,
+                        inscription_id TEXT,
+                        txid TEXT,
+                        data TEXT,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                        )'''
+
+
+def record_event(conn: sqlite3.Connection, coin_ticker: str, event_type: str, height: Optional[int],
+                 collection_id: Optional[int] = None, inscription_id: Optional[str] = None,
+                 txid: Optional[str] = None, data: Optional[Dict[str, Any]] = None) -> int:
+    """Append an event in the caller's transaction and return its id"""
+    if event_type not in EVENT_TYPES:
+        raise ValueError(f"Unknown event type {event_type!r}")
+    cursor = conn.execute('''INSERT INTO events (coin_ticker, event_type, height, collection_id, inscription_id, txid, data)
+                             VALUES (?, ?, ?, ?, ?, ?, ?)''',
+                          (coin_ticker, event_type, height, collection_id, inscription_id, txid,
+                           json.dumps(data) if data else None))
+    return cursor.lastrowid
+
+
+def read_events(conn: sqlite3.Connection, after_id: int = 0, limit: int = 100,
+                coin_ticker: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Events with an id above `after_id`, oldest first, at most `limit` (capped at MAX_EVENTS)"""
+    query = '''SELECT event_id, coin_ticker, event_type, height, collection_id, inscription_id, txid, data, created_at
+               FROM events WHERE event_id > ?'''
+    params: List[Any] = [after_id]
+    if coin_ticker:
+        query += ' AND coin_ticker = ?'
+        params.append(coin_ticker)
+    query += ' ORDER BY event_id LIMIT ?'
+    params.append(max(1, min(limit, MAX_EVENTS)))
+    columns = ('event_id', 'coin_ticker', 'event_type', 'height', 'collection_id', 'inscription_id', 'txid', 'data',
+               'created_at')
+    events = []
+    for row in conn.execute(query, params):
+        event = dict(zip(columns, row))
+        event['data'] = json.loads(event['data']) if event['data'] else {}
+        events.append(event)
+    return events
+
+
+def last_event_id(conn: sqlite3.Connection) -> int:
+    """Id of the newest event, 0 when there is none; a new consumer can start from here"""
+    return conn.execute('SELECT COALESCE(MAX(event_id), 0) FROM events').fetchone()[0]
@@ -0,0 +1,241 @@
+"""Minimal bitcoind stand-in for running the indexer without a real node.
+
+Serves a chain of generated blocks over JSON-RPC (getblockcount, getblockhash, getbestblockhash,
+getblock at verbosity 0/1/2, waitfornewblock, getrawmempool, getrawtransaction as with
+-txindex) and mines a new block every
+--interval seconds, announcing it to waitfornewblock callers and, with pyzmq installed,
+on a ZMQ `hashblock` feed:
+
+    python fake_node.py --port 33318 --blocks 100 --interval 10 --zmq tcp://127.0.0.1:28332
+
+Point a [B1T] section of rpc.conf at it (any rpcuser/rpcpassword is accepted). Other scripts
+can import FakeNode and mine blocks with their own transactions, or `broadcast` them to the
+mempool for the next block.
+"""
+import argparse
+import hashlib
+import json
+import struct
+import threading
+import time
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Sequence
+
+from raw_block import address_params, parse_block
+
+try:
+    import zmq  # pyzmq is optional; without it blocks are only announced to waitfornewblock
+except ImportError:
+    zmq = None
+
+
+class RPCError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def _sha256d(data: bytes) -> bytes:
+    return hashlib.sha256(hashlib.sha256(data).digest()).digest()
+
+
+def _varint(n: int) -> bytes:
+    if n < 0xfd:
+        return bytes([n])
+    if n <= 0xffff:
+        return b'\xfd' + struct.pack('<H', n)
+    return b'\xfe' + struct.pack('<I', n)
+
+
+def _push(data: bytes) -> bytes:
+    return _varint(len(data)) + data if len(data) < 0x4c else b'\x4c' + bytes([len(data)]) + data
+
+
+def coinbase_tx(height: int, value: int = 5000000000) -> bytes:
+    """A coinbase paying `value` to an empty P2PKH, with the height in its scriptSig"""
+    script_sig = _push(struct.pack('<I', height))
+    script_pubkey = b'\x76\xa9\x14' + b'\x00' * 20 + b'\x88\xac'
+    return (struct.pack('<i', 1) + _varint(1) + b'\x00' * 32 + struct.pack('<I', 0xffffffff)
+            + _varint(len(script_sig)) + script_sig + struct.pack('<I', 0xffffffff)
+            + _varint(1) + struct.pack('<q', value) + _varint(len(script_pubkey)) + script_pubkey
+            + struct.pack('<I', 0))
+
+
+def _merkle_root(hashes: List[bytes]) -> bytes:
+    while len(hashes) > 1:
+        if len(hashes) % 2:
+            hashes.append(hashes[-1])
+        hashes = [_sha256d(hashes[i] + hashes[i + 1]) for i in range(0, len(hashes), 2)]
+    return hashes[0]
+
+
+def build_block(previous_hash: bytes, height: int, transactions: Sequence[bytes] = ()) -> bytes:
+    """Serialize a block of a coinbase plus `transactions` (raw, without witness data)"""
+    txs = [coinbase_tx(height)] + list(transactions)
+    header = (struct.pack('<i', 0x20000000) + previous_hash + _merkle_root([_sha256d(tx) for tx in txs])
+              + struct.pack('<III', 1600000000 + height * 60, 0x207fffff, height))
+    return header + _varint(len(txs)) + b''.join(txs)
+
+
+class FakeNode:
+    """An in-memory chain that only grows; `mine()` appends a block and announces it"""
+
+    def __init__(self, coin_ticker: str = 'B1T', blocks: int = 1, zmq_endpoint: Optional[str] = None):
+        self.params = address_params(coin_ticker)
+        self._raw: List[bytes] = []
+        self._hashes: List[str] = []
+        self._heights: Dict[str, int] = {}
+        self._mempool: Dict[str, bytes] = {}
+        self._transactions: Dict[str, bytes] = {}  # Mined transactions by txid
+        self._tip_changed = threading.Condition()
+        self._publisher = None
+        self._zmq_sequence = 0
+        if zmq_endpoint:
+            if zmq is None:
+                raise RuntimeError('pyzmq is required for --zmq')
+            self._publisher = zmq.Context.instance().socket(zmq.PUB)
+            self._publisher.bind(zmq_endpoint)
+        for _ in range(blocks):
+            self.mine()
+
+    @property
+    def height(self) -> int:
+        return len(self._raw) - 1
+
+    def broadcast(self, raw: bytes) -> str:
+        """Add a transaction to the mempool and return its txid"""
+        txid = _sha256d(raw)[::-1].hex()
+        with self._tip_changed:
+            self._mempool[txid] = raw
+        return txid
+
+    def mine(self, transactions: Optional[Sequence[bytes]] = None) -> str:
+        """Append a block on top of the tip and return its hash; by default it includes the mempool"""
+        with self._tip_changed:
+            if transactions is None:
+                transactions = list(self._mempool.values())
+                self._mempool.clear()
+            previous = bytes.fromhex(self._hashes[-1])[::-1] if self._hashes else b'\x00' * 32
+            raw = build_block(previous, len(self._raw), transactions)
+            for tx in transactions:
+                self._transactions[_sha256d(tx)[::-1].hex()] = tx
+            block_hash = _sha256d(raw[:80])[::-1].hex()
+            self._heights[block_hash] = len(self._raw)
+            self._raw.append(raw)
+            self._hashes.append(block_hash)
+            self._tip_changed.notify_all()
+        if self._publisher is not None:
+            self._publisher.send_multipart([b'hashblock', bytes.fromhex(block_hash),
+                                            struct.pack('<I', self._zmq_sequence)])
+            self._zmq_sequence += 1
+        return block_hash
+
+    def call(self, method: str, params: List[Any]) -> Any:
+        if method == 'getblockcount':
+            return self.height
+        if method == 'getbestblockhash':
+            return self._hashes[-1]
+        if method == 'getblockhash':
+            if not 0 <= params[0] <= self.height:
+                raise RPCError(-8, 'Block height out of range')
+            return self._hashes[params[0]]
+        if method == 'getblock':
+            height = self._heights.get(params[0])
+            if height is None:
+                raise RPCError(-5, 'Block not found')
+            verbosity = params[1] if len(params) > 1 else 1
+            if verbosity == 0:
+                return self._raw[height].hex()
+            block = parse_block(self._raw[height], height, params[0], self.params)
+            block['confirmations'] = self.height - height + 1
+            if verbosity == 1:
+                block['tx'] = [tx['txid'] for tx in block['tx']]
+            return block
+        if method == 'waitfornewblock':
+            timeout = params[0] / 1000 if params and params[0] else None
+            with self._tip_changed:
+                height = self.height
+                self._tip_changed.wait_for(lambda: self.height != height, timeout=timeout)
+                return {'hash': self._hashes[-1], 'height': self.height}
+        if method == 'getrawmempool':
+            with self._tip_changed:
+                return list(self._mempool)
+        if method == 'getrawtransaction':
+            raw = self._mempool.get(params[0]) or self._transactions.get(params[0])
+            if raw is None:
+                raise RPCError(-5, 'No such mempool or blockchain transaction')
+            return raw.hex()
+        raise RPCError(-32601, 'Method not found')
+
+    def serve(self, host: str = '127.0.0.1', port: int = 0) -> ThreadingHTTPServer:
+        """Start the JSON-RPC server in a daemon thread; port 0 picks a free port"""
+        server = ThreadingHTTPServer((host, port), _make_handler(self))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+class _DecimalEncoder(json.JSONEncoder):
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return float(o)
+        return super().default(o)
+
+
+def _make_handler(node: FakeNode):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _answer(self, request: Dict[str, Any]) -> Dict[str, Any]:
+            try:
+                result = node.call(request['method'], request.get('params', []))
+            except RPCError as e:
+                return {'result': None, 'error': {'code': e.code, 'message': e.message}, 'id': request.get('id')}
+            return {'result': result, 'error': None, 'id': request.get('id')}
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            if isinstance(request, list):
+                response, status = [self._answer(r) for r in request], 200
+            else:
+                response = self._answer(request)
+                status = 200 if response['error'] is None else 500
+            body = json.dumps(response, cls=_DecimalEncoder).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--coin', default='B1T')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=33318)
+    parser.add_argument('--blocks', type=int, default=1, help='blocks to generate before serving')
+    parser.add_argument('--interval', type=float, default=10, help='seconds between mined blocks (0 = never)')
+    parser.add_argument('--zmq', help='endpoint to publish hashblock notifications on')
+    args = parser.parse_args()
+
+    node = FakeNode(args.coin, args.blocks, args.zmq)
+    node.serve(args.host, args.port)
+    print(f"Serving {args.coin} blocks 0-{node.height} on {args.host}:{args.port}")
+    while True:
+        if args.interval <= 0:
+            time.sleep(3600)
+            continue
+        time.sleep(args.interval)
+        block_hash = node.mine()
+        print(f"Mined block {node.height} {block_hash}", flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from raw_block import parse_raw_transaction
+from rpc_batch import BatchRPCClient
+
+logger = logging.getLogger(__name__)
+
+FETCH_CHUNK = 100  # getrawtransaction calls per JSON-RPC batch
+
+
+class MempoolWatcher:
+    """Records a chain's unconfirmed RC-001 mints as pending items.
+
+    Every `interval` seconds, while the scanner is at the chain's tip, it diffs the node's
+    mempool against the transactions seen on the previous poll, decodes only the new ones
+    and hands their mints to `scanner.update_pending_items`. Transactions that left the
+    mempool (mined or dropped) release their claim; a mined mint is then recorded by the
+    scanner as an item. `extract` is the indexer's operation decoder (passed in, since the
+    indexer imports this module).
+    """
+
+    def __init__(self, scanner, coin_ticker: str, extract: Callable[[Dict[str, Any]], Any], interval: float = 10):
+        self.scanner = scanner
+        self.coin_ticker = coin_ticker
+        self.extract = extract
+        self.interval = interval
+        self.known: Set[str] = set(scanner.pending_txids(coin_ticker))
+        self._rpc: Optional[BatchRPCClient] = None
+
+    def _fetch_transactions(self, txids: List[str]) -> List[Dict[str, Any]]:
+        params = self.scanner._address_params(self.coin_ticker)
+        transactions = []
+        for i in range(0, len(txids), FETCH_CHUNK):
+            chunk = txids[i:i + FETCH_CHUNK]
+            results = self._rpc.batch([('getrawtransaction', [txid, 0]) for txid in chunk])
+            for txid, raw in zip(chunk, results):
+                if isinstance(raw, Exception):
+                    continue  # Mined or evicted since getrawmempool
+                try:
+                    transactions.append(parse_raw_transaction(raw, params))
+                except Exception as e:
+                    logger.debug(f"Undecodable mempool transaction {txid} on {self.coin_ticker}: {e}")
+        return transactions
+
+    def poll(self) -> int:
+        """Diff the mempool once and return the number of new pending mints"""
+        if self._rpc is None:
+            self._rpc = BatchRPCClient.from_config(self.scanner.rpc_configs[self.coin_ticker], timeout=60)
+        try:
+            current = set(self._rpc.getrawmempool())
+            new_txids = sorted(current - self.known)
+            mints: List[Tuple[Any, Dict[str, Any]]] = []
+            for tx in self._fetch_transactions(new_txids):
+                doc = self.extract(tx)
+                if doc is not None and doc.op == 'mint':
+                    mints.append((doc, tx))
+        except Exception:
+            self._rpc.close()
+            raise
+        recorded = self.scanner.update_pending_items(self.coin_ticker, mints, sorted(self.known - current), current)
+        self.known = current
+        return recorded
+
+    def run(self) -> None:
+        failing = False
+        while True:
+            if self.scanner.is_near_tip(self.coin_ticker):
+                try:
+                    recorded = self.poll()
+                    if recorded:
+                        logger.info(f"Recorded {recorded} pending mints from the {self.coin_ticker} mempool")
+                    if failing:
+                        logger.info(f"Mempool polling of {self.coin_ticker} recovered")
+                        failing = False
+                except Exception as e:
+                    if not failing:
+                        logger.error(f"Error polling the {self.coin_ticker} mempool: {e}")
+                        failing = True
+            time.sleep(self.interval)
@@ -0,0 +1,288 @@
+import hashlib
+import struct
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Address version bytes per chain (see bitcore-libs/<coin>/.../lib/networks.js).
+# Chains not listed here can set pubkeyhash / scripthash / bech32_hrp in rpc.conf.
+ADDRESS_PARAMS: Dict[str, Dict[str, Any]] = {
+    'B1T': {'pubkeyhash': 0x19, 'scripthash': 0x16, 'bech32_hrp': 'bc'},
+}
+
+OP_PUSHDATA1 = 0x4c
+OP_PUSHDATA2 = 0x4d
+OP_PUSHDATA4 = 0x4e
+OP_1 = 0x51
+OP_16 = 0x60
+
+_B58_ALPHABET = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+_BECH32_CHARSET = 'qpzry9x8gf2tvdw0s3jn54khce6mua7l'
+_COINBASE_PREVOUT = b'\x00' * 32
+
+
+class RawBlockError(ValueError):
+    """Raised when serialized block data is truncated or malformed"""
+
+
+def address_params(coin_ticker: str, rpc_config: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Address encoding parameters for a chain, with rpc.conf overrides applied"""
+    params = dict(ADDRESS_PARAMS.get(coin_ticker, {}))
+    for key in ('pubkeyhash', 'scripthash'):
+        if rpc_config and rpc_config.get(key):
+            params[key] = int(rpc_config[key], 0)
+    if rpc_config and rpc_config.get('bech32_hrp'):
+        params['bech32_hrp'] = rpc_config['bech32_hrp']
+    return params
+
+
+def _sha256d(data) -> bytes:
+    return hashlib.sha256(hashlib.sha256(data).digest()).digest()
+
+
+def _hash160(data) -> bytes:
+    return hashlib.new('ripemd160', hashlib.sha256(data).digest()).digest()
+
+
+def base58check_encode(payload: bytes) -> str:
+    data = payload + _sha256d(payload)[:4]
+    number = int.from_bytes(data, 'big')
+    encoded = ''
+    while number:
+        number, remainder = divmod(number, 58)
+        encoded = _B58_ALPHABET[remainder] + encoded
+    return '1' * (len(data) - len(data.lstrip(b'\x00'))) + encoded
+
+
+def _bech32_polymod(values: List[int]) -> int:
+    generator = (0x3b6a57b2, 0x26508e6d, 0x1ea119fa, 0x3d4233dd, 0x2a1462b3)
+    checksum = 1
+    for value in values:
+        top = checksum >> 25
+        checksum = (checksum & 0x1ffffff) << 5 ^ value
+        for i in range(5):
+            checksum ^= generator[i] if ((top >> i) & 1) else 0
+    return checksum
+
+
+def segwit_address(hrp: str, witness_version: int, program: bytes) -> str:
+    """Encode a witness program (bech32 for v0, bech32m for v1+)"""
+    data = [witness_version]
+    accumulator, bits = 0, 0
+    for byte in program:
+        accumulator = (accumulator << 8) | byte
+        bits += 8
+        while bits >= 5:
+            bits -= 5
+            data.append((accumulator >> bits) & 31)
+    if bits:
+        data.append((accumulator << (5 - bits)) & 31)
+    const = 1 if witness_version == 0 else 0x2bc830a3
+    expanded = [ord(c) >> 5 for c in hrp] + [0] + [ord(c) & 31 for c in hrp]
+    polymod = _bech32_polymod(expanded + data + [0] * 6) ^ const
+    checksum = [(polymod >> 5 * (5 - i)) & 31 for i in range(6)]
+    return hrp + '1' + ''.join(_BECH32_CHARSET[d] for d in data + checksum)
+
+
+def iter_script(script) -> Iterator[Tuple[Optional[int], Any]]:
+    """Yield (opcode, push data or None) for each script element.
+
+    Push data is a slice of `script` (a memoryview stays zero-copy). A truncated
+    push yields (None, None) and stops, like GetOp failing in bitcoind.
+    """
+    i, end = 0, len(script)
+    while i < end:
+        opcode = script[i]
+        i += 1
+        if opcode > OP_PUSHDATA4:
+            yield opcode, None
+            continue
+        if opcode < OP_PUSHDATA1:
+            size = opcode
+        elif opcode == OP_PUSHDATA1:
+            if i + 1 > end:
+                yield None, None
+                return
+            size = script[i]
+            i += 1
+        elif opcode == OP_PUSHDATA2:
+            if i + 2 > end:
+                yield None, None
+                return
+            size = script[i] | script[i + 1] << 8
+            i += 2
+        else:
+            if i + 4 > end:
+                yield None, None
+                return
+            size = int.from_bytes(script[i:i + 4], 'little')
+            i += 4
+        if i + size > end:
+            yield None, None
+            return
+        yield opcode, script[i:i + size]
+        i += size
+
+
+def script_pubkey_addresses(script, params: Dict[str, Any]) -> Tuple[str, Optional[List[str]]]:
+    """Return (type, addresses) for a scriptPubKey, matching the verbose getblock fields"""
+    size = len(script)
+    pubkeyhash = params.get('pubkeyhash')
+    scripthash = params.get('scripthash')
+    if size == 25 and script[0] == 0x76 and script[1] == 0xa9 and script[2] == 20 and script[23] == 0x88 and script[24] == 0xac:
+        if pubkeyhash is None:
+            return 'pubkeyhash', None
+        return 'pubkeyhash', [base58check_encode(bytes([pubkeyhash]) + bytes(script[3:23]))]
+    if size == 23 and script[0] == 0xa9 and script[1] == 20 and script[22] == 0x87:
+        if scripthash is None:
+            return 'scripthash', None
+        return 'scripthash', [base58check_encode(bytes([scripthash]) + bytes(script[2:22]))]
+    if size in (35, 67) and script[0] == size - 2 and script[-1] == 0xac:
+        if pubkeyhash is None:
+            return 'pubkey', None
+        return 'pubkey', [base58check_encode(bytes([pubkeyhash]) + _hash160(script[1:-1]))]
+    if size and script[0] == 0x6a:
+        return 'nulldata', None
+    if 4 <= size <= 42 and (script[0] == 0 or OP_1 <= script[0] <= OP_16) and script[1] == size - 2:
+        version = 0 if script[0] == 0 else script[0] - OP_1 + 1
+        program = bytes(script[2:])
+        if version == 0 and len(program) == 20:
+            script_type = 'witness_v0_keyhash'
+        elif version == 0 and len(program) == 32:
+            script_type = 'witness_v0_scripthash'
+        elif version == 1 and len(program) == 32:
+            script_type = 'witness_v1_taproot'
+        else:
+            script_type = 'witness_unknown'
+        hrp = params.get('bech32_hrp')
+        return script_type, [segwit_address(hrp, version, program)] if hrp else None
+    if size > 3 and script[-1] == 0xae and OP_1 <= script[0] <= OP_16 and pubkeyhash is not None:
+        keys = [data for opcode, data in iter_script(script[1:-2]) if data is not None]
+        if keys and len(keys) == script[-2] - OP_1 + 1 and all(len(key) in (33, 65) for key in keys):
+            return 'multisig', [base58check_encode(bytes([pubkeyhash]) + _hash160(key)) for key in keys]
+    return 'nonstandard', None
+
+
+class _Reader:
+    """Cursor over a memoryview; every read returns a view, never a copy"""
+
+    __slots__ = ('view', 'pos')
+
+    def __init__(self, view: memoryview, pos: int = 0):
+        self.view = view
+        self.pos = pos
+
+    def read(self, size: int) -> memoryview:
+        end = self.pos + size
+        if end > len(self.view):
+            raise RawBlockError(f"unexpected end of data at offset {self.pos} (+{size})")
+        data = self.view[self.pos:end]
+        self.pos = end
+        return data
+
+    def u32(self) -> int:
+        return struct.unpack_from('<I', self.read(4))[0]
+
+    def i64(self) -> int:
+        return struct.unpack_from('<q', self.read(8))[0]
+
+    def varint(self) -> int:
+        first = self.read(1)[0]
+        if first < 0xfd:
+            return first
+        if first == 0xfd:
+            return struct.unpack_from('<H', self.read(2))[0]
+        if first == 0xfe:
+            return struct.unpack_from('<I', self.read(4))[0]
+        return struct.unpack_from('<Q', self.read(8))[0]
+
+    def skip_varbytes(self) -> None:
+        self.read(self.varint())
+
+
+def parse_transaction(reader: _Reader, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Read one transaction, keeping only the fields rc001 uses.
+
+    vin entries carry the spent outpoint; only vin[0] keeps its scriptSig hex.
+    vout entries carry value, n and scriptPubKey hex/type/addresses. The txid is the
+    double SHA-256 of the non-witness serialization.
+    """
+    start = reader.pos
+    reader.read(4)
+    segwit = reader.pos + 1 < len(reader.view) and reader.view[reader.pos] == 0 and reader.view[reader.pos + 1] == 1
+    if segwit:
+        reader.pos += 2
+    body_start = reader.pos
+
+    vin = []
+    for index in range(reader.varint()):
+        prev_hash = reader.read(32)
+        prev_index = reader.u32()
+        script_size = reader.varint()
+        script_sig = reader.read(script_size)
+        reader.pos += 4  # sequence
+        if prev_hash == _COINBASE_PREVOUT and prev_index == 0xffffffff:
+            vin.append({'coinbase': bytes(script_sig).hex()})
+            continue
+        entry: Dict[str, Any] = {'txid': bytes(prev_hash[::-1]).hex(), 'vout': prev_index}
+        if index == 0:
+            entry['scriptSig'] = {'hex': script_sig.hex()}
+        vin.append(entry)
+
+    vout = []
+    for n in range(reader.varint()):
+        value = reader.i64()
+        script_pubkey = reader.read(reader.varint())
+        script_type, addresses = script_pubkey_addresses(script_pubkey, params)
+        spk: Dict[str, Any] = {'hex': bytes(script_pubkey).hex(), 'type': script_type}
+        if addresses:
+            spk['addresses'] = addresses
+        vout.append({'value': Decimal(value).scaleb(-8), 'n': n, 'scriptPubKey': spk})
+    body_end = reader.pos
+
+    if segwit:
+        for _ in vin:
+            for _ in range(reader.varint()):
+                reader.skip_varbytes()
+    reader.read(4)  # locktime
+
+    digest = hashlib.sha256(reader.view[start:start + 4])
+    digest.update(reader.view[body_start:body_end])
+    digest.update(reader.view[reader.pos - 4:reader.pos])
+    txid = hashlib.sha256(digest.digest()).digest()[::-1].hex()
+    return {'txid': txid, 'vin': vin, 'vout': vout}
+
+
+def parse_raw_transaction(raw, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Decode one serialized transaction (getrawtransaction verbose=0) like parse_transaction.
+
+    `raw` may be bytes or a hex string.
+    """
+    if isinstance(raw, str):
+        raw = bytes.fromhex(raw)
+    return parse_transaction(_Reader(memoryview(raw)), params or {})
+
+
+def parse_block(raw, height: int, block_hash: Optional[str] = None,
+                params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Decode a serialized block (getblock verbosity=0) into the subset of the
+    verbosity=2 structure that the indexer reads.
+
+    `raw` may be bytes or a hex string. The block hash is taken from the caller when
+    known, since not every chain identifies blocks by the SHA-256d header hash.
+    """
+    if isinstance(raw, str):
+        raw = bytes.fromhex(raw)
+    view = memoryview(raw)
+    reader = _Reader(view)
+    header = reader.read(80)
+    params = params or {}
+    block: Dict[str, Any] = {
+        'hash': block_hash or _sha256d(header)[::-1].hex(),
+        'height': height,
+        'size': len(view),
+    }
+    previous = bytes(header[4:36])
+    if previous != _COINBASE_PREVOUT:
+        block['previousblockhash'] = previous[::-1].hex()
+    block['tx'] = [parse_transaction(reader, params) for _ in range(reader.varint())]
+    return block
@@ -0,0 +1,212 @@
+from html.parser import HTMLParser
+from typing import Any, List, Optional, Tuple
+
+# Elements BeautifulSoup closes as soon as they open (they never take children)
+VOID_ELEMENTS = frozenset([
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen', 'link',
+    'menuitem', 'meta', 'param', 'source', 'track', 'wbr', 'basefont', 'bgsound',
+    'command', 'frame', 'image', 'isindex', 'nextid', 'spacer',
+])
+PRESERVE_WHITESPACE = frozenset(['pre', 'textarea'])
+ASCII_SPACES = '\x20\x0a\x09\x0c\x0d'
+
+
+class Rc001Document:
+    """The rc001 fields of an inscription, with the values the former soup lookups produced.
+
+    op          content of the first <meta name="op">, None if missing
+    sn          content of the first <meta name="sn">, 'Unknown' if there is none,
+                None if it has no content attribute
+    title       string of the first <title>, 'Untitled' if there is none, None when
+                the title has no single string (soup.find('title').string is None)
+    script_src  src of the first <script> that has one, None if missing
+    json_data   text of the first <script type="application/json" id="json-data">
+    """
+
+    __slots__ = ('op', 'sn', 'title', 'script_src', 'json_data')
+
+    def __init__(self):
+        self.op: Optional[str] = None
+        self.sn: Optional[str] = 'Unknown'
+        self.title: Optional[str] = 'Untitled'
+        self.script_src: Optional[str] = None
+        self.json_data: Optional[str] = None
+
+
+class _Done(Exception):
+    pass
+
+
+def _collapse(text: str) -> str:
+    # BeautifulSoup stores a whitespace-only string as a single newline or space
+    if text.strip(ASCII_SPACES):
+        return text
+    return '\n' if '\n' in text else ' '
+
+
+class _Node:
+    __slots__ = ('tag', 'children', 'preserve')
+
+    def __init__(self, tag: str, preserve: bool):
+        self.tag = tag
+        self.children: List[Any] = []
+        self.preserve = preserve
+
+    def string(self) -> Optional[str]:
+        # Same rule as bs4's Tag.string: a single child string, recursing into a single child tag
+        if len(self.children) != 1:
+            return None
+        child = self.children[0]
+        if isinstance(child, _Node):
+            return child.string()
+        return child if self.preserve else _collapse(child)
+
+
+class Rc001MetaParser(HTMLParser):
+    """Streaming extractor for the rc001 fields; stops as soon as the operation has what it needs.
+
+    Tag, text and comment events are handled the way BeautifulSoup's html.parser
+    tree builder handles them, so the first <title> ends up with the same .string.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.doc = Rc001Document()
+        self._seen_op = self._seen_sn = self._seen_title = False
+        self._seen_script_src = self._seen_json = False
+        # Open elements as (tag, node); nodes are only built inside the first <title>
+        self._open: List[Tuple[str, Optional[_Node]]] = []
+        self._already_closed: List[str] = []
+        self._preserve = 0
+        self._title: Optional[_Node] = None
+        self._title_depth: Optional[int] = None
+        self._text_open = False
+        self._json_parts: Optional[List[str]] = None
+
+    def _complete(self) -> bool:
+        if not self._seen_op:
+            return False
+        if self.doc.op == 'mint':
+            return self._seen_title and self._seen_sn and self._seen_script_src
+        if self.doc.op == 'deploy':
+            return self._seen_title and self._seen_json
+        return True  # Nothing else is read for other operations
+
+    def handle_starttag(self, tag, attrs, handle_empty_element=True):
+        self._text_open = False
+        attributes = {key: '' if value is None else value for key, value in attrs}
+        if tag in PRESERVE_WHITESPACE:
+            self._preserve += 1
+        node = None
+        if self._title_depth is not None:
+            node = _Node(tag, self._preserve > 0)
+            self._open[-1][1].children.append(node)
+        elif tag == 'title' and not self._seen_title:
+            node = self._title = _Node(tag, self._preserve > 0)
+            self._title_depth = len(self._open)
+        self._open.append((tag, node))
+
+        if tag == 'meta':
+            name = attributes.get('name')
+            if name == 'op' and not self._seen_op:
+                self._seen_op = True
+                self.doc.op = attributes.get('content')
+            elif name == 'sn' and not self._seen_sn:
+                self._seen_sn = True
+                self.doc.sn = attributes.get('content')
+        elif tag == 'script':
+            if 'src' in attributes and not self._seen_script_src:
+                self._seen_script_src = True
+                self.doc.script_src = attributes['src']
+            if (attributes.get('type') == 'application/json' and attributes.get('id') == 'json-data'
+                    and not self._seen_json and self._json_parts is None):
+                self._json_parts = []
+
+        if tag in VOID_ELEMENTS and handle_empty_element:
+            self._close(tag)
+            self._already_closed.append(tag)
+        if self._complete():
+            raise _Done()
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs, handle_empty_element=False)
+        self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in self._already_closed:
+            # Redundant end tag of a void element that was closed when it opened
+            self._already_closed.remove(tag)
+            return
+        self._close(tag)
+        if tag == 'script' and self._json_parts is not None:
+            self._finish_json()
+        if self._complete():
+            raise _Done()
+
+    def _close(self, tag: str) -> None:
+        # Close the most recent open element with this name and everything opened inside it
+        self._text_open = False
+        for index in range(len(self._open) - 1, -1, -1):
+            if self._open[index][0] == tag:
+                self._preserve -= sum(1 for name, _ in self._open[index:] if name in PRESERVE_WHITESPACE)
+                del self._open[index:]
+                if self._title_depth is not None and index <= self._title_depth:
+                    self._finish_title()
+                break
+
+    def handle_data(self, data):
+        if self._title_depth is not None:
+            children = self._open[-1][1].children
+            if self._text_open:
+                children[-1] += data
+            else:
+                children.append(data)
+        self._text_open = True
+        if self._json_parts is not None:
+            self._json_parts.append(data)
+
+    def handle_comment(self, data):
+        if self._title_depth is not None:
+            self._open[-1][1].children.append(data)
+        self._text_open = False
+
+    def handle_decl(self, decl):
+        self.handle_comment(decl[len('DOCTYPE '):])
+
+    def unknown_decl(self, data):
+        self.handle_comment(data[len('CDATA['):] if data.upper().startswith('CDATA[') else data)
+
+    handle_pi = handle_comment
+
+    def _finish_title(self) -> None:
+        self.doc.title = self._title.string()
+        self._title_depth = None
+        self._seen_title = True
+
+    def _finish_json(self) -> None:
+        text = ''.join(self._json_parts)
+        self.doc.json_data = (text if self._preserve else _collapse(text)) if text else None
+        self._json_parts = None
+        self._seen_json = True
+
+    def finish(self) -> Rc001Document:
+        """Flush buffered text and close anything left open at the end of the document"""
+        try:
+            self.close()
+        except _Done:
+            return self.doc
+        if self._title_depth is not None:
+            self._finish_title()
+        if self._json_parts is not None:
+            self._finish_json()
+        return self.doc
+
+
+def extract_rc001(html: str) -> Rc001Document:
+    """Parse just enough of an rc001 inscription to read its operation fields"""
+    parser = Rc001MetaParser()
+    try:
+        parser.feed(html)
+    except _Done:
+        return parser.doc
+    return parser.finish()
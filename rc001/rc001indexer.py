@@ -1,9 +1,5 @@
 import json
-import base64
-import binascii
 import sqlite3
-from bitcoinrpc.authproxy import AuthServiceProxy, JSONRPCException
-from bs4 import BeautifulSoup
 import time
 import os
 import re
@@ -12,31 +8,163 @@ import logging
 from logging.handlers import RotatingFileHandler
 from contextlib import contextmanager
 import configparser
-from typing import Optional, Tuple, List, Dict, Any
+import threading
+from typing import Callable, Optional, Set, Tuple, List, Dict, Any
+
+from block_cache import BlockCache, compress_block
+from block_prefetch import BlockPrefetcher
+from content_store import CREATE_CONTENT_TABLE, ContentStore
+from rpc_batch import BatchRPCClient
+from raw_block import address_params, parse_block, parse_raw_transaction
+from envelope import ORD_PREFIX_HEX, decode_envelope_part
+from rc001_meta import Rc001Document, extract_rc001
+from reassembly import CREATE_PARTIALS_TABLE, InscriptionReassembler, Parts, inscription_parts
+from collection_registry import CollectionEntry, CollectionRegistry
+from collection_stats import CREATE_STATS_TABLE, fill_missing_stats, insert_stats, record_mint, refresh_stats
+from events import CREATE_EVENTS_TABLE, record_event
+from mempool import MempoolWatcher
+from tip_follow import TipFollower
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
-handler = RotatingFileHandler('blockchain_scanner.log', maxBytes=5*1024*1024, backupCount=3)
-logger.addHandler(handler)
+
+
+def configure_logging() -> None:
+    """Log to the console and to blockchain_scanner.log in the working directory, for the command-line tools"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+    handler = RotatingFileHandler('blockchain_scanner.log', maxBytes=5*1024*1024, backupCount=3)
+    logger.addHandler(handler)
+
 
 # Configuration constants
 CONFIG_DIR = "./collections"
 LAST_BLOCK_FILE = "./last_block_scanned.json"
 RPC_CONFIG_FILE = "../config/rpc.conf"
 DATABASE_FILE = "./collections/all_collections.db"
-SCAN_INTERVAL = 30
+SCAN_INTERVAL = 30  # Longest wait for a new block before checking the node again
+TIP_FOLLOW_MODE = 'auto'  # auto, zmq, longpoll or poll; rpc.conf can set tip_follow per chain
 RETRY_DELAY = 5
+MAX_RETRY_DELAY = 300  # A chain whose node keeps failing is retried after RETRY_DELAY, doubling up to this
+DEFAULT_CHAINS = ('B1T',)  # Scanned unless their rpc.conf section sets `scan = no`; other chains need `scan = yes`
+PREFETCH_WINDOW = 16  # Blocks kept in flight while catching up (1 = fetch sequentially)
+PREFETCH_WORKERS = 4  # Concurrent RPC fetchers
+PREFETCH_MAX_BYTES = 64 * 1024 * 1024  # Serialized size of fetched blocks allowed to wait for the consumer
+RPC_BATCH_SIZE = 8  # Heights per JSON-RPC batch (getblockhash batch + getblock batch)
+RAW_BLOCK_MODE = False  # Fetch serialized blocks (verbosity=0) and decode them locally instead of verbosity=2 JSON
+BLOCK_CACHE = False  # Keep fetched blocks under BLOCK_CACHE_DIR and read them from there before asking the node (implies raw blocks)
+BLOCK_CACHE_DIR = "./blockcache"
+COMMIT_BLOCKS = 100  # Blocks per transaction while catching up; within this many blocks of the tip every block commits
+BLOCK_HASH_HISTORY = 288  # Recent block hashes kept per chain; bounds how deep a reorg can be rolled back
+BULK_LAG_THRESHOLD = 1000  # Blocks behind the node's tip at which catch-up switches to the bulk-load write profile
+BULK_COMMIT_BLOCKS = 2000  # Blocks per transaction in the bulk-load profile
+BULK_CACHE_KB = 256 * 1024  # SQLite page cache in the bulk-load profile
+CONTENT_STORE = True  # Keep the body of every inscription found for the web app's /content route
+CONTENT_DIR = "./content"
+PARTIAL_MAX_AGE = 144  # Blocks a partial inscription waits for its next transaction before it is evicted
+PARTIAL_MAX_BYTES = 4 * 1024 * 1024  # Largest body reassembled from a chain of transactions
+STATUS_RATE_WINDOW = 10  # Seconds over which the blocks/s in indexer_status is averaged
+MEMPOOL_INTERVAL = 10  # Seconds between mempool polls of a chain that is at its tip (0 = don't watch the mempool)
+PENDING_TTL = 6 * 3600  # A pending mint no watcher has seen in the mempool for this long stops claiming its serial
+# Indexes that only serve reads (web API, rollbacks); dropped while bulk loading and rebuilt at the tip
+SECONDARY_INDEXES = {
+    'idx_items_collection_sequence': 'items (collection_id, sequence_number)',
+    'idx_items_collection_address': 'items (collection_id, inscription_address)',
+    'idx_items_created_at': 'items (created_at)',
+    'idx_serial_ranges_collection': 'serial_ranges (collection_id, range_index)',
+    'idx_item_transfers_height': 'item_transfers (coin_ticker, height)',
+    'idx_inscription_content_height': 'inscription_content (coin_ticker, height)',
+}
+
+def _sats(value) -> int:
+    return int(Decimal(value).scaleb(8))
+
+
+class InputValuesUnavailable(Exception):
+    """The node could not serve the input values an inscription transfer needs; the block is retried"""
+
+
+def _output_address(vout: Dict[str, Any]) -> Optional[str]:
+    addresses = vout.get('scriptPubKey', {}).get('addresses')
+    return addresses[0] if addresses else None
+
+
+def extract_inscription(tx: Dict[str, Any]) -> Optional[Tuple[Optional[str], bytes]]:
+    """(content type, body) inscribed by a transaction's first input, None if there is none.
+
+    Only envelopes complete in this one transaction; a split one is put together by the
+    scanner's reassembler.
+    """
+    if not tx.get('vin'):
+        return None
+    script_hex = tx['vin'][0].get('scriptSig', {}).get('hex')
+    if not script_hex or not script_hex.startswith(ORD_PREFIX_HEX):
+        return None
+    part = decode_envelope_part(bytes.fromhex(script_hex))
+    if part is None or part[2]:
+        return None
+    return part[:2]
+
+
+def extract_operation(tx: Dict[str, Any]) -> Optional[Rc001Document]:
+    """The rc001 document inscribed by a transaction's first input, None if there is none.
+
+    Depends on nothing but the transaction, so it can run in any thread or process.
+    """
+    inscription = extract_inscription(tx)
+    return parse_operation(*inscription) if inscription else None
+
+
+def parse_operation(mime_type: Optional[str], body: bytes) -> Optional[Rc001Document]:
+    """The rc001 document in an inscription body, None if it is not one"""
+    if not body or not mime_type or 'text/html' not in mime_type.lower():
+        return None
+    try:
+        html_data_text = body.decode('utf-8')
+    except UnicodeDecodeError as e:
+        logger.error(f"Error decoding inscription body to text: {e}")
+        return None
+    if not html_data_text or '<meta name="p" content="rc001">' not in html_data_text:
+        return None
+    return extract_rc001(html_data_text)
+
 
 class BlockchainScanner:
     def __init__(self):
         self.rpc_configs = self._load_rpc_configs()
         self.rpc_connections = {}
+        self._thread_rpc = threading.local()
+        self._address_params_cache: Dict[str, Dict[str, Any]] = {}
+        self._tip_hashes: Dict[str, Tuple[int, str]] = {}  # Last processed (height, hash) per chain
+        self._tip_followers: Dict[str, TipFollower] = {}
+        # Chains run in their own threads and share the connection below; every database section
+        # (a block with its savepoint, a commit, a rollback, a status write) holds this lock
+        self._db_lock = threading.RLock()
+        self._chain_lags: Dict[str, int] = {}
+        self._node_heights: Dict[str, int] = {}
+        self._chain_errors: Dict[str, Optional[str]] = {}
+        self._block_caches: Dict[str, BlockCache] = {}
+        self._block_caches_lock = threading.Lock()
+        # Per chain: the inscriptions held by each unspent outpoint, mirroring items.location
+        self._tracked_outpoints: Dict[str, Dict[Tuple[str, int], Set[str]]] = {}
+        self.content_store = ContentStore(CONTENT_DIR) if CONTENT_STORE else None
+        self._reassemblers: Dict[str, InscriptionReassembler] = {}
+        # Hashes and checkpoints of the blocks applied in the open transaction, written when it commits
+        self._pending_block_hashes: Dict[Tuple[str, int], str] = {}
+        self._pending_checkpoints: Dict[str, Dict[str, int]] = {}
+        # Per chain: time and height the scan rate is measured from, and the last measured rate
+        self._status_marks: Dict[str, Tuple[float, int, Optional[float]]] = {}
         os.makedirs(CONFIG_DIR, exist_ok=True)
+        # One connection for the scanner's lifetime; transactions are opened explicitly (BEGIN/SAVEPOINT)
+        self.db = sqlite3.connect(DATABASE_FILE, timeout=10, isolation_level=None, check_same_thread=False)
+        # WAL lets the web API read while the scanner writes; durability is set by the write profile
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.write_profile: Optional[str] = None
         self._initialize_database()
+        self.set_write_profile('tip')
+        self.collections = CollectionRegistry()
+        self.collections.load(self.db)
 
     def _load_rpc_configs(self) -> Dict[str, Dict[str, str]]:
         """Load RPC configurations from RPC.conf"""
@@ -64,6 +192,8 @@ class BlockchainScanner:
                         deploy_txid TEXT,
                         deploy_address TEXT,
                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        minted_count INTEGER NOT NULL DEFAULT 0,
+                        deploy_height INTEGER,
                         UNIQUE(coin_ticker, sanitized_name)
                         )''')
             c.execute('''CREATE TABLE IF NOT EXISTS serial_ranges (
@@ -82,45 +212,284 @@ class BlockchainScanner:
                         inscription_address TEXT,
                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                         sequence_number INTEGER,
+                        location TEXT,
+                        location_offset INTEGER NOT NULL DEFAULT 0,
                         UNIQUE(collection_id, sn),
                         FOREIGN KEY (collection_id) REFERENCES collections(collection_id)
                         )''')
-            conn.commit()
+            c.execute('''CREATE TABLE IF NOT EXISTS scan_state (
+                        coin_ticker TEXT PRIMARY KEY,
+                        start_block_height INTEGER,
+                        last_block_height INTEGER
+                        )''')
+            c.execute('''CREATE TABLE IF NOT EXISTS block_hashes (
+                        coin_ticker TEXT,
+                        height INTEGER,
+                        block_hash TEXT,
+                        PRIMARY KEY (coin_ticker, height)
+                        )''')
+            # Inscriptions that moved: where each one was before, so a reorg can move it back
+            c.execute('''CREATE TABLE IF NOT EXISTS item_transfers (
+                        transfer_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        inscription_id TEXT,
+                        coin_ticker TEXT,
+                        height INTEGER,
+                        txid TEXT,
+                        old_location TEXT,
+                        old_offset INTEGER,
+                        old_address TEXT
+                        )''')
+            c.execute(CREATE_CONTENT_TABLE)
+            c.execute(CREATE_PARTIALS_TABLE)
+            # Supply counters per collection for the web app's /collections, see collection_stats.py
+            c.execute(CREATE_STATS_TABLE)
+            # Change feed for downstream caches, see events.py
+            c.execute(CREATE_EVENTS_TABLE)
+            # Mints seen in the mempool; they claim their serial number until they confirm, leave the
+            # mempool or expire (expires_at is in Unix seconds and renewed on every mempool poll)
+            c.execute('''CREATE TABLE IF NOT EXISTS pending_items (
+                        inscription_id TEXT PRIMARY KEY,
+                        coin_ticker TEXT,
+                        collection_id INTEGER,
+                        sn TEXT,
+                        inscription_address TEXT,
+                        first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        expires_at INTEGER
+                        )''')
+            c.execute('CREATE INDEX IF NOT EXISTS idx_pending_items_collection_sn ON pending_items (collection_id, sn)')
+            c.execute('''CREATE TABLE IF NOT EXISTS indexer_status (
+                        coin_ticker TEXT PRIMARY KEY,
+                        write_profile TEXT,
+                        node_height INTEGER,
+                        last_block_height INTEGER,
+                        lag INTEGER,
+                        blocks_per_second REAL,
+                        last_error TEXT,
+                        updated_at TIMESTAMP
+                        )''')
+            # Databases created before the counter existed: fill it once from the items table
+            self._add_column('collections', 'minted_count', 'INTEGER NOT NULL DEFAULT 0',
+                             '''UPDATE collections SET minted_count =
+                                (SELECT COUNT(*) FROM items WHERE items.collection_id = collections.collection_id)''')
+            # Height of the deploy block, so a reorg can remove the deploy; NULL for older deploys
+            self._add_column('collections', 'deploy_height', 'INTEGER')
+            self._add_column('indexer_status', 'last_error', 'TEXT')
+            # Current outpoint of each inscription; older items start from their mint output
+            self._add_column('items', 'location', 'TEXT',
+                             "UPDATE items SET location = substr(inscription_id, 1, 64) || ':0' WHERE inscription_id IS NOT NULL")
+            self._add_column('items', 'location_offset', 'INTEGER NOT NULL DEFAULT 0')
+            with self.savepoint('rc001_migrate'):
+                filled = fill_missing_stats(conn)
+            if filled:
+                logger.info(f"Filled collection_stats for {filled} collections")
+
+    def _add_column(self, table: str, column: str, definition: str, backfill: Optional[str] = None) -> None:
+        """Add a column to an existing table once, filling it in the same transaction"""
+        with self.get_db_connection() as conn:
+            columns = {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+            if column in columns:
+                return
+            with self.savepoint('rc001_migrate'):
+                conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+                if backfill:
+                    conn.execute(backfill)
+            logger.info(f"Added {column} to {table}")
+
+    def set_write_profile(self, profile: str) -> None:
+        """Switch between the bulk-load profile used far behind the tip and the durable tip profile.
+
+        bulk: no fsync (synchronous=OFF), a large page cache and no secondary indexes. A crash of
+              the process loses nothing; a power or OS failure can lose recent transactions
+              together with their checkpoint, or in the worst case corrupt the file.
+        tip:  synchronous=FULL, default cache, every secondary index built.
+        """
+        with self._db_lock:
+            if profile == self.write_profile:
+                return
+            if self.db.in_transaction:
+                self._flush_block_records()
+                self.db.execute('COMMIT')
+            if profile == 'bulk':
+                self.db.execute('PRAGMA synchronous=OFF')
+                self.db.execute(f'PRAGMA cache_size=-{BULK_CACHE_KB}')
+                self.db.execute('PRAGMA temp_store=MEMORY')
+                for name in SECONDARY_INDEXES:
+                    self.db.execute(f'DROP INDEX IF EXISTS {name}')
+            else:
+                self.db.execute('PRAGMA synchronous=FULL')
+                self.db.execute('PRAGMA cache_size=-2000')
+                self.db.execute('PRAGMA temp_store=DEFAULT')
+                started = time.monotonic()
+                for name, definition in SECONDARY_INDEXES.items():
+                    self.db.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {definition}')
+                if self.write_profile == 'bulk':
+                    logger.info(f"Built secondary indexes in {time.monotonic() - started:.1f}s")
+                    if self.content_store is not None:
+                        os.sync()  # Content stored without flushing while bulk loading
+            self.write_profile = profile
+
+    def _update_write_profile(self, coin_ticker: str, lag: int) -> None:
+        """Record a chain's lag; bulk loading only pays off while every chain is far behind its node"""
+        with self._db_lock:
+            self._chain_lags[coin_ticker] = lag
+            profile = 'bulk' if min(self._chain_lags.values()) >= BULK_LAG_THRESHOLD else 'tip'
+            if profile != self.write_profile:
+                logger.info(f"{coin_ticker} is {lag} blocks behind the node, switching to the {profile} write profile")
+                self.set_write_profile(profile)
 
     @contextmanager
     def get_rpc_connection(self, coin_ticker: str):
-        """Context manager for chain-specific RPC connection"""
+        """Context manager for the chain-specific RPC client of the chain's scanning thread.
+
+        The client is kept between calls so its keep-alive connection is reused.
+        """
         if coin_ticker not in self.rpc_configs:
             logger.error(f"No RPC configuration found for coin {coin_ticker}")
             raise ValueError(f"No RPC configuration found for coin {coin_ticker}")
-        rpc_config = self.rpc_configs[coin_ticker]
-        rpc_url = f"http://{rpc_config['rpcuser']}:{rpc_config['rpcpassword']}@{rpc_config['rpchost']}:{rpc_config['rpcport']}"
+        if coin_ticker not in self.rpc_connections:
+            self.rpc_connections[coin_ticker] = BatchRPCClient.from_config(self.rpc_configs[coin_ticker], timeout=60)
+        rpc = self.rpc_connections[coin_ticker]
         try:
-            rpc = AuthServiceProxy(rpc_url, timeout=60)
             yield rpc
         except Exception as e:
             logger.error(f"Error connecting to RPC server for {coin_ticker}: {e}")
+            rpc.close()
             raise
-        finally:
-            pass
+
+    def _get_thread_rpc(self, coin_ticker: str) -> BatchRPCClient:
+        """Return an RPC client owned by the calling thread (clients are not thread-safe)"""
+        clients = getattr(self._thread_rpc, 'clients', None)
+        if clients is None:
+            clients = self._thread_rpc.clients = {}
+        if coin_ticker not in clients:
+            clients[coin_ticker] = BatchRPCClient.from_config(self.rpc_configs[coin_ticker], timeout=60)
+        return clients[coin_ticker]
+
+    def fetch_blocks(self, coin_ticker: str, heights: List[int]) -> List[Any]:
+        """Fetch blocks with one getblockhash batch and one getblock batch.
+
+        Safe to call from prefetch threads. Returns one entry per height, either the
+        block or the exception raised for that height. In RAW_BLOCK_MODE the node sends
+        serialized blocks and they are decoded here, in the fetch thread. With BLOCK_CACHE,
+        cached heights are read from disk without asking the node, and blocks fetched from
+        the node carry their compressed form in 'compressed' for _scan_blocks to cache.
+        """
+        cache = self._get_block_cache(coin_ticker)
+        raw_blocks = RAW_BLOCK_MODE or cache is not None
+        cached = {}
+        if cache is not None:
+            for height in heights:
+                entry = cache.get(height)
+                if entry is not None:
+                    cached[height] = entry
+        missing = [height for height in heights if height not in cached]
+        fetched: Dict[int, Any] = {}
+        if missing:
+            rpc = self._get_thread_rpc(coin_ticker)
+            try:
+                fetched = dict(zip(missing, rpc.get_blocks(missing, 0 if raw_blocks else 2)))
+            except Exception:
+                rpc.close()
+                raise
+        blocks: List[Any] = []
+        for height in heights:
+            result = cached.get(height) or fetched[height]
+            if isinstance(result, Exception):
+                blocks.append(result)
+                continue
+            block_hash, block = result
+            if raw_blocks:
+                try:
+                    raw = bytes.fromhex(block) if isinstance(block, str) else block
+                    block = parse_block(raw, height, block_hash, self._address_params(coin_ticker))
+                    if height in fetched and cache is not None:
+                        block['compressed'] = compress_block(raw)
+                except Exception as e:
+                    block = e
+            blocks.append(block)
+        return blocks
+
+    def _get_block_cache(self, coin_ticker: str) -> Optional[BlockCache]:
+        """The chain's block cache when BLOCK_CACHE is on (opened on first use, from any thread)"""
+        if not BLOCK_CACHE:
+            return None
+        with self._block_caches_lock:
+            if coin_ticker not in self._block_caches:
+                self._block_caches[coin_ticker] = BlockCache(BLOCK_CACHE_DIR, coin_ticker)
+            return self._block_caches[coin_ticker]
+
+    def get_node_height(self, coin_ticker: str, rpc: BatchRPCClient, last_height: int) -> Tuple[int, bool]:
+        """The node's block count, or the top of the block cache when the node cannot be reached.
+
+        Returns (height, offline). Offline, only cached blocks above `last_height` can be indexed,
+        so the node's error is raised again when there are none.
+        """
+        try:
+            return rpc.getblockcount(), False
+        except Exception as e:
+            cache = self._get_block_cache(coin_ticker)
+            if cache is None or cache.height <= last_height:
+                raise
+            logger.warning(f"{coin_ticker} node unreachable ({e}), indexing cached blocks up to {cache.height}")
+            return cache.height, True
+
+    def _address_params(self, coin_ticker: str) -> Dict[str, Any]:
+        if coin_ticker not in self._address_params_cache:
+            self._address_params_cache[coin_ticker] = address_params(coin_ticker, self.rpc_configs.get(coin_ticker))
+        return self._address_params_cache[coin_ticker]
 
     @contextmanager
     def get_db_connection(self):
-        """Context manager for database connection"""
-        conn = None
+        """Context manager for the scanner's long-lived database connection"""
         try:
-            conn = sqlite3.connect(DATABASE_FILE, timeout=10)
-            yield conn
+            yield self.db
         except sqlite3.Error as e:
             logger.error(f"Database error: {e}")
             raise
-        finally:
-            if conn:
-                conn.close()
+
+    @contextmanager
+    def savepoint(self, name: str):
+        """Apply a group of writes as a unit: all of them or none.
+
+        Nested inside the block transaction while scanning; on its own it is a transaction.
+        """
+        self.db.execute(f'SAVEPOINT {name}')
+        try:
+            yield self.db
+        except BaseException:
+            self.db.execute(f'ROLLBACK TO {name}')
+            self.db.execute(f'RELEASE {name}')
+            raise
+        self.db.execute(f'RELEASE {name}')
+
+    def enabled_chains(self) -> List[str]:
+        """Sections of rpc.conf to scan: those with `scan = yes`, plus DEFAULT_CHAINS unless they set `scan = no`"""
+        chains = []
+        for coin_ticker, rpc_config in self.rpc_configs.items():
+            value = rpc_config.get('scan')
+            if value is None:
+                enabled = coin_ticker in DEFAULT_CHAINS
+            else:
+                enabled = configparser.ConfigParser.BOOLEAN_STATES.get(value.strip().lower())
+                if enabled is None:
+                    logger.error(f"Invalid scan value {value!r} for {coin_ticker} in {RPC_CONFIG_FILE}, not scanning it")
+                    enabled = False
+            if enabled:
+                chains.append(coin_ticker)
+        return chains
 
     def load_last_block_heights(self) -> Dict[str, Dict[str, int]]:
-        """Load the last scanned block heights, restricted to B1T only"""
-        allowed_ticker = "B1T"
+        """Load the checkpoints of the chains enabled in rpc.conf, creating them for newly enabled chains"""
+        chains = self.enabled_chains()
+        with self.get_db_connection() as conn:
+            rows = conn.execute('SELECT coin_ticker, start_block_height, last_block_height FROM scan_state').fetchall()
+        stored = {row[0]: {"start_block_height": row[1], "last_block_height": row[2]} for row in rows}
+        block_heights = {coin_ticker: stored[coin_ticker] for coin_ticker in chains if coin_ticker in stored}
+        new_chains = [coin_ticker for coin_ticker in chains if coin_ticker not in stored]
+        if not new_chains:
+            return block_heights
+
+        # Chains new to this database: take over the checkpoint of the old JSON file if there is one
         data: Dict[str, Dict[str, int]] = {}
         try:
             with open(LAST_BLOCK_FILE, 'r') as f:
@@ -133,203 +502,253 @@ class BlockchainScanner:
             logger.warning("Last block file not found or invalid, using defaults")
             data = {}
 
-        # Ensure B1T exists with sane defaults and prune all others
-        if allowed_ticker not in data or not isinstance(data.get(allowed_ticker), dict):
-            data[allowed_ticker] = {"start_block_height": 0, "last_block_height": 0}
-
-        return {allowed_ticker: data[allowed_ticker]}
+        # Otherwise start where rpc.conf says (start_block_height), or at the genesis block
+        for coin_ticker in new_chains:
+            if not isinstance(data.get(coin_ticker), dict):
+                start_height = int(self.rpc_configs[coin_ticker].get('start_block_height', 0))
+                data[coin_ticker] = {"start_block_height": start_height, "last_block_height": 0}
+            block_heights[coin_ticker] = data[coin_ticker]
+            logger.info(f"Scanning {coin_ticker} from block {block_heights[coin_ticker]['start_block_height']}")
+        self.update_last_block_heights({coin_ticker: block_heights[coin_ticker] for coin_ticker in new_chains})
+        return block_heights
 
     def update_last_block_heights(self, block_heights: Dict[str, Dict[str, int]]) -> None:
-        """Update the last scanned block heights for all coins"""
+        """Update the last scanned block heights for all coins (part of the current transaction)"""
         try:
-            with open(LAST_BLOCK_FILE, 'w') as f:
-                json.dump(block_heights, f, indent=4)
+            with self.get_db_connection() as conn:
+                conn.executemany('''INSERT OR REPLACE INTO scan_state (coin_ticker, start_block_height, last_block_height)
+                                    VALUES (?, ?, ?)''',
+                                 [(coin_ticker, heights["start_block_height"], heights["last_block_height"])
+                                  for coin_ticker, heights in block_heights.items()])
         except Exception as e:
             logger.error(f"Error updating last block heights: {e}")
             raise
 
-    @staticmethod
-    def hex_to_base64(hex_str: str) -> Optional[str]:
-        """Convert hex string to base64"""
-        try:
-            if len(hex_str) % 2 != 0:
-                return None
-            return base64.b64encode(binascii.unhexlify(hex_str)).decode('utf-8')
-        except binascii.Error as e:
-            logger.error(f"Error decoding hex to base64: {e}")
-            return None
-
-    @staticmethod
-    def base64_to_text(base64_str: str) -> Optional[str]:
-        """Convert base64 string to text"""
-        try:
-            return base64.b64decode(base64_str).decode('utf-8')
-        except (binascii.Error, UnicodeDecodeError) as e:
-            logger.error(f"Error decoding base64 to text: {e}")
-            return None
-
-    @staticmethod
-    def hex_to_ascii(hex_string: str) -> Optional[str]:
-        """Convert hex string to ASCII"""
-        try:
-            if len(hex_string) % 2 != 0:
-                return None
-            return binascii.unhexlify(hex_string).decode('ascii')
-        except Exception as e:
-            logger.error(f"Error converting hex to ASCII: {e}")
-            return None
-
     @staticmethod
     def sanitize_filename(name: str) -> str:
         """Sanitize filename to prevent injection"""
         return re.sub(r'[^\w\-]', '', name)
 
-    def _get_collection_id(self, coin_ticker: str, sanitized_name: str) -> Optional[int]:
-        """Get collection ID from coin ticker and sanitized name"""
-        with self.get_db_connection() as conn:
-            c = conn.cursor()
-            c.execute('SELECT collection_id FROM collections WHERE coin_ticker = ? AND sanitized_name = ?', 
-                     (coin_ticker, sanitized_name))
-            result = c.fetchone()
-            return result[0] if result else None
-
-    def _get_collection_config(self, collection_id: int) -> Dict[str, Any]:
-        """Get collection configuration from database"""
-        config = {}
-        with self.get_db_connection() as conn:
-            c = conn.cursor()
-            c.execute('SELECT * FROM collections WHERE collection_id = ?', (collection_id,))
-            collection_data = c.fetchone()
-            if not collection_data:
-                return {}
-            c.execute('SELECT range_index, range_value FROM serial_ranges WHERE collection_id = ? ORDER BY range_index', 
-                     (collection_id,))
-            ranges = c.fetchall()
-            config['coin_ticker'] = collection_data[1]
-            config['mint_address'] = collection_data[4]
-            config['mint_price'] = collection_data[5]
-            config['parent_inscription_id'] = collection_data[6]
-            for range_index, range_value in ranges:
-                if range_index == 0 and '-' in range_value and len(range_value.split('-')[0]) > 2:
-                    config['sn_range'] = range_value
-                config[f'sn_index_{range_index}'] = range_value
-        return config
-
     def is_valid_sn(self, sn: str, coin_ticker: str, collection_name: str) -> bool:
         """Validate serial number against collection configuration"""
+        collection = self.collections.get(coin_ticker, collection_name)
+        if not collection:
+            logger.error(f"Collection {collection_name} not found on coin {coin_ticker}")
+            return False
+        return collection.is_valid_sn(sn)
+
+    def process_transaction(self, coin_ticker: str, tx: Dict[str, Any], block: Dict[str, Any]) -> None:
+        """Process a single transaction"""
         try:
-            collection_id = self._get_collection_id(coin_ticker, collection_name)
-            if not collection_id:
-                logger.error(f"Collection {collection_name} not found on coin {coin_ticker}")
-                return False
-            config = self._get_collection_config(collection_id)
-            if not config:
-                logger.error(f"Configuration for collection {collection_name} on coin {coin_ticker} not found")
-                return False
-            if 'sn_range' in config:
-                valid_range = config['sn_range'].split('-')
-                if len(valid_range[0]) > 2 and len(valid_range[1]) > 2:
-                    padded_sn = sn.zfill(len(valid_range[1]))
-                    if valid_range[0] <= padded_sn <= valid_range[1]:
-                        return True
-                    return False
-            sn_index_keys = [key for key in config if key.startswith('sn_index_')]
-            if len(sn_index_keys) == 1:
-                valid_range = config[sn_index_keys[0]].split('-')
-                padded_sn = sn.zfill(len(valid_range[1]))
-                if valid_range[0] <= padded_sn <= valid_range[1]:
-                    return True
-                return False
-            segments = [sn[i:i+2] for i in range(0, len(sn), 2)]
-            for i, segment in enumerate(segments):
-                range_key = f'sn_index_{i}'
-                if range_key in config:
-                    valid_range = config[range_key].split('-')
-                    padded_segment = segment.zfill(len(valid_range[1]))
-                    if not (valid_range[0] <= padded_segment <= valid_range[1]):
-                        return False
-                else:
-                    return False
-            return True
+            inscription = self.reassemble(coin_ticker, tx, block)
+            if inscription is not None:
+                self.handle_inscription(coin_ticker, tx, block, inscription)
         except Exception as e:
-            logger.error(f"Error validating serial number: {e}")
-            return False
+            logger.error(f"Error processing transaction {tx['txid']} on coin {coin_ticker}: {e}")
 
-    def extract_inscription_data(self, asm_data: List[str]) -> Tuple[Optional[str], Optional[str]]:
-        """Extract inscription data from ASM"""
+    def _reassembler(self, coin_ticker: str) -> InscriptionReassembler:
+        reassembler = self._reassemblers.get(coin_ticker)
+        if reassembler is None:
+            reassembler = InscriptionReassembler(coin_ticker, PARTIAL_MAX_AGE, PARTIAL_MAX_BYTES)
+            with self._db_lock:
+                reassembler.load(self.db)
+            self._reassemblers[coin_ticker] = reassembler
+        return reassembler
+
+    def reassemble(self, coin_ticker: str, tx: Dict[str, Any], block: Dict[str, Any],
+                   parts: Optional[Parts] = None) -> Optional[Tuple[Optional[str], bytes]]:
+        """(content_type, body) of the inscription a transaction completes, alone or as the last of a chain"""
+        return self._reassembler(coin_ticker).feed(self.db, tx, block['height'], parts)
+
+    def evict_partials(self, coin_ticker: str, height: int) -> None:
+        self._reassembler(coin_ticker).evict(self.db, height)
+
+    def handle_inscription(self, coin_ticker: str, tx: Dict[str, Any], block: Dict[str, Any],
+                           inscription: Tuple[Optional[str], bytes]) -> None:
+        """Store an inscription's body and apply the rc001 operation it holds, if any"""
+        if self.content_store is not None:
+            self.store_content(coin_ticker, f"{tx['txid']}i0", *inscription, block.get('height'))
+        doc = parse_operation(*inscription)
+        if doc is not None:
+            self.apply_operation(coin_ticker, doc, tx, block)
+
+    def store_content(self, coin_ticker: str, inscription_id: str, content_type: Optional[str], body: bytes,
+                      height: Optional[int]) -> None:
+        """Keep an inscription's body in the content store; it is flushed to disk unless bulk loading"""
         try:
-            data_string = ""
-            mime_type = None
-            index = 1
-            if index >= len(asm_data) or not asm_data[index].lstrip('-').isdigit():
-                return None, None
-            index += 1
-            if index >= len(asm_data):
-                return None, None
-            mime_type_hex = asm_data[index]
-            mime_type = self.hex_to_ascii(mime_type_hex)
-            index += 1
-            while index < len(asm_data):
-                part = asm_data[index]
-                if part.lstrip('-').isdigit():
-                    index += 1
-                    if index >= len(asm_data):
-                        return None, None
-                    data_string += asm_data[index]
-                    index += 1
-                else:
-                    break
-            return data_string, mime_type
+            digest = self.content_store.put(body, sync=self.write_profile != 'bulk')
+            self.record_content(coin_ticker, inscription_id, content_type, digest, len(body), height)
         except Exception as e:
-            logger.error(f"Error extracting inscription data: {e}")
-            return None, None
+            logger.error(f"Error storing the content of {inscription_id} on coin {coin_ticker}: {e}")
 
-    def process_transaction(self, coin_ticker: str, tx: Dict[str, Any], rpc_connection: AuthServiceProxy, block: Dict[str, Any]) -> None:
-        """Process a single transaction"""
+    def record_content(self, coin_ticker: str, inscription_id: str, content_type: Optional[str], digest: str,
+                       size: int, height: Optional[int]) -> None:
+        """Record which stored body an inscription has (in the block's transaction)"""
+        self.db.execute('''INSERT OR REPLACE INTO inscription_content
+                           (inscription_id, coin_ticker, content_type, sha256, size, height) VALUES (?, ?, ?, ?, ?, ?)''',
+                        (inscription_id, coin_ticker, content_type, digest, size, height))
+
+    def process_block(self, coin_ticker: str, block: Dict[str, Any]) -> None:
+        """Process every transaction of a block in order"""
+        for tx in block['tx']:
+            self.process_transfers(coin_ticker, tx, block)
+            self.process_transaction(coin_ticker, tx, block)
+        self.evict_partials(coin_ticker, block['height'])
+
+    def _tracked(self, coin_ticker: str) -> Dict[Tuple[str, int], Set[str]]:
+        """The chain's inscriptions by the outpoint that holds them, loaded from the items table once"""
+        tracked = self._tracked_outpoints.get(coin_ticker)
+        if tracked is None:
+            tracked = {}
+            with self._db_lock:
+                rows = self.db.execute('''SELECT items.inscription_id, items.location FROM items
+                                          JOIN collections ON collections.collection_id = items.collection_id
+                                          WHERE collections.coin_ticker = ? AND items.location IS NOT NULL''',
+                                       (coin_ticker,)).fetchall()
+            for inscription_id, location in rows:
+                txid, vout = location.split(':')
+                tracked.setdefault((txid, int(vout)), set()).add(inscription_id)
+            self._tracked_outpoints[coin_ticker] = tracked
+        return tracked
+
+    @staticmethod
+    def _may_inscribe(tx: Dict[str, Any]) -> bool:
+        """Whether a transaction may complete an inscription, which then sits on its output 0"""
+        script_hex = tx['vin'][0].get('scriptSig', {}).get('hex') if tx.get('vin') else None
+        return bool(script_hex) and (script_hex.startswith(ORD_PREFIX_HEX) or inscription_parts(tx) is not None)
+
+    def resolve_input_values(self, coin_ticker: str, block: Dict[str, Any], rpc: Optional[BatchRPCClient],
+                             inscribing: Optional[Set[str]] = None) -> None:
+        """Look up the input values the block's inscription transfers need, before the block is applied.
+
+        Runs outside the database lock. A transfer from an input after the first needs the values
+        of the inputs before it. Transactions spending a tracked outpoint, or an output of this
+        block that may receive an inscription, get them in block['input_values'] as
+        {txid: [sats, ...]}, in one getrawtransaction batch. Raises InputValuesUnavailable when
+        the node cannot serve them, so the block is retried instead of applied with a guess.
+        `inscribing` are the txids that may complete an inscription, for transactions stripped of
+        their scriptSigs; by default they are told from the transactions.
+        """
+        tracked = self._tracked(coin_ticker)
+        in_block = {tx['txid']: tx for tx in block['tx']}
+        # Earlier transactions of the block whose outputs later ones spend
+        referenced = {entry['txid'] for tx in block['tx'] for entry in tx['vin'] if entry.get('txid') in in_block}
+        created: Set[Tuple[str, int]] = set()  # Outputs of this block that may receive an inscription
+        needed: Dict[str, int] = {}  # txid -> inputs whose values it needs
+        for tx in block['tx']:
+            spent = [index for index, entry in enumerate(tx['vin'])
+                     if 'txid' in entry and ((entry['txid'], entry['vout']) in tracked
+                                             or (entry['txid'], entry['vout']) in created)]
+            if spent and spent[-1] > 0:
+                needed[tx['txid']] = spent[-1]
+            if tx['txid'] in referenced:
+                if spent:
+                    created.update((tx['txid'], vout['n']) for vout in tx['vout'])
+                elif (tx['txid'] in inscribing) if inscribing is not None else self._may_inscribe(tx):
+                    created.add((tx['txid'], 0))
+        if not needed:
+            return
+        lookups = sorted({entry['txid'] for txid, count in needed.items() for entry in in_block[txid]['vin'][:count]
+                          if entry['txid'] not in in_block})
+        outputs = {txid: tx['vout'] for txid, tx in in_block.items()}
+        if lookups:
+            if rpc is None:
+                raise InputValuesUnavailable(f"Node of {coin_ticker} is offline")
+            try:
+                results = rpc.batch([('getrawtransaction', [txid, 0]) for txid in lookups])
+            except Exception as e:
+                raise InputValuesUnavailable(f"Cannot look up spent outputs on {coin_ticker}: {e}") from e
+            for txid, raw in zip(lookups, results):
+                if isinstance(raw, Exception):
+                    raise InputValuesUnavailable(f"Cannot look up transaction {txid} on {coin_ticker}: {raw}")
+                outputs[txid] = parse_raw_transaction(raw, self._address_params(coin_ticker))['vout']
+        block['input_values'] = {txid: [_sats(outputs[entry['txid']][entry['vout']]['value'])
+                                        for entry in in_block[txid]['vin'][:count]]
+                                 for txid, count in needed.items()}
+
+    def _locate_sat(self, tx: Dict[str, Any], position: int, block: Dict[str, Any]) -> Tuple[str, int, Optional[str]]:
+        """(location, offset, address) of the output that receives the sat at `position` of the inputs"""
+        for vout in tx['vout']:
+            value = _sats(vout['value'])
+            if position < value:
+                return f"{tx['txid']}:{vout['n']}", position, _output_address(vout)
+            position -= value
+        # Spent as fee: it goes to the miner, taken to be the coinbase's first output
+        coinbase = block['tx'][0]
+        return f"{coinbase['txid']}:0", 0, _output_address(coinbase['vout'][0])
+
+    def process_transfers(self, coin_ticker: str, tx: Dict[str, Any], block: Dict[str, Any]) -> None:
+        """Move the inscriptions held by outpoints this transaction spends to their new outputs.
+
+        An inscription sits on a sat, which passes from inputs to outputs in order (the ord
+        first-in-first-out rule). Spending an inscription from a later input needs the values
+        of the inputs before it, which resolve_input_values put in the block; without them
+        InputValuesUnavailable fails the block.
+        """
+        tracked = self._tracked(coin_ticker)
+        if not tracked:
+            return
+        spent = [(index, (entry['txid'], entry['vout'])) for index, entry in enumerate(tx['vin'])
+                 if 'txid' in entry and (entry['txid'], entry['vout']) in tracked]
+        if not spent:
+            return
+        txid = tx['txid']
+        input_values = block.get('input_values', {}).get(txid)
+        if spent[-1][0] > 0 and input_values is None:
+            raise InputValuesUnavailable(f"Values of the inputs of {txid} on {coin_ticker} were not looked up")
         try:
-            if not tx.get('vin') or not tx['vin'][0].get('scriptSig', {}).get('asm'):
-                return
-            asm_data = tx['vin'][0]['scriptSig']['asm'].split()
-            if not asm_data or asm_data[0] != '6582895':
-                return
-            data_string, mime_type = self.extract_inscription_data(asm_data)
-            if not data_string or not mime_type or 'text/html' not in mime_type.lower():
-                return
-            html_data_base64 = self.hex_to_base64(data_string)
-            if not html_data_base64:
-                return
-            html_data_text = self.base64_to_text(html_data_base64)
-            if not html_data_text or '<meta name="p" content="rc001">' not in html_data_text:
-                return
-            soup = BeautifulSoup(html_data_text, 'html.parser')
-            op_meta = soup.find('meta', attrs={'name': 'op'})
-            if not op_meta:
-                return
-            operation = op_meta.get('content')
-            if operation == 'deploy':
-                self.handle_deploy_operation(coin_ticker, soup, tx['txid'], tx)
-            elif operation == 'mint':
-                self.handle_mint_operation(coin_ticker, soup, tx['txid'], tx, block)
+            moves = []
+            with self.savepoint('rc001_transfer') as conn:
+                for index, outpoint in spent:
+                    for inscription_id in sorted(tracked[outpoint]):
+                        old_location = f"{outpoint[0]}:{outpoint[1]}"
+                        collection_id, old_offset, old_address = conn.execute(
+                            'SELECT collection_id, location_offset, inscription_address FROM items WHERE inscription_id = ?',
+                            (inscription_id,)).fetchone()
+                        position = old_offset if index == 0 else sum(input_values[:index]) + old_offset
+                        location, offset, address = self._locate_sat(tx, position, block)
+                        conn.execute('''UPDATE items SET location = ?, location_offset = ?, inscription_address = ?
+                                        WHERE inscription_id = ?''', (location, offset, address, inscription_id))
+                        conn.execute('''INSERT INTO item_transfers
+                                        (inscription_id, coin_ticker, height, txid, old_location, old_offset, old_address)
+                                        VALUES (?, ?, ?, ?, ?, ?, ?)''',
+                                     (inscription_id, coin_ticker, block['height'], txid, old_location, old_offset,
+                                      old_address))
+                        record_event(conn, coin_ticker, 'transfer', block['height'], collection_id, inscription_id,
+                                     txid, {'from': old_location, 'to': location, 'from_address': old_address,
+                                            'address': address})
+                        moves.append((inscription_id, outpoint, location))
+            for inscription_id, outpoint, location in moves:
+                holders = tracked[outpoint]
+                holders.discard(inscription_id)
+                if not holders:
+                    del tracked[outpoint]
+                new_txid, vout = location.split(':')
+                tracked.setdefault((new_txid, int(vout)), set()).add(inscription_id)
+                logger.info(f"Inscription {inscription_id} moved to {location} on {coin_ticker} in {txid}")
         except Exception as e:
-            logger.error(f"Error processing transaction {tx['txid']} on coin {coin_ticker}: {e}")
+            logger.error(f"Error tracking transfers of transaction {txid} on coin {coin_ticker}: {e}")
+
+    def apply_operation(self, coin_ticker: str, doc: Rc001Document, tx: Dict[str, Any], block: Dict[str, Any]) -> None:
+        """Apply a deploy or mint found in a transaction; other operations are ignored"""
+        if doc.op == 'deploy':
+            self.handle_deploy_operation(coin_ticker, doc, tx['txid'], tx, block)
+        elif doc.op == 'mint':
+            self.handle_mint_operation(coin_ticker, doc, tx['txid'], tx, block)
 
-    def handle_deploy_operation(self, coin_ticker: str, soup: BeautifulSoup, txid: str, tx: Dict[str, Any]) -> None:
+    def handle_deploy_operation(self, coin_ticker: str, doc: Rc001Document, txid: str, tx: Dict[str, Any],
+                                block: Optional[Dict[str, Any]] = None) -> None:
         """Handle deploy operation"""
         try:
-            title = soup.find('title').string if soup.find('title') else 'Untitled'
+            title = doc.title
             sanitized_title = self.sanitize_filename(title)
-            with self.get_db_connection() as conn:
-                c = conn.cursor()
-                c.execute('SELECT collection_id FROM collections WHERE coin_ticker = ? AND sanitized_name = ?', 
-                         (coin_ticker, sanitized_title))
-                if c.fetchone():
-                    logger.warning(f"Collection {sanitized_title} already exists on coin {coin_ticker} with txid {txid}")
-                    return
-            json_script = soup.find('script', attrs={'type': 'application/json', 'id': 'json-data'})
-            if not json_script or not json_script.string:
+            if self.collections.get(coin_ticker, sanitized_title):
+                logger.warning(f"Collection {sanitized_title} already exists on coin {coin_ticker} with txid {txid}")
+                return
+            if not doc.json_data:
                 logger.error(f"No valid JSON data found in deploy operation with txid {txid}")
                 return
-            json_data = json.loads(json_script.string.strip().replace('\xa0', ' '))
+            json_data = json.loads(doc.json_data.strip().replace('\xa0', ' '))
             sn_ranges = json_data.get('sn', [])
             mint_address = json_data.get('mint_address', 'Unknown')
             mint_price = json_data.get('mint_price', 'Unknown')
@@ -339,58 +758,72 @@ class BlockchainScanner:
             inscription_address = None
             if tx['vout'] and tx['vout'][0].get('scriptPubKey', {}).get('addresses'):
                 inscription_address = tx['vout'][0]['scriptPubKey']['addresses'][0]
-            with self.get_db_connection() as conn:
+            with self.savepoint('rc001_op') as conn:
                 c = conn.cursor()
                 c.execute('''INSERT INTO collections (
                             coin_ticker, name, sanitized_name, mint_address, mint_price, parent_inscription_id,
-                            emblem_inscription_id, website, deploy_txid, deploy_address
-                            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                            emblem_inscription_id, website, deploy_txid, deploy_address, deploy_height
+                            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
                          (coin_ticker, title, sanitized_title, mint_address, mint_price, parent_inscription_id,
-                          emblem_inscription_id, website, txid, inscription_address))
+                          emblem_inscription_id, website, txid, inscription_address,
+                          block.get('height') if block else None))
                 collection_id = c.lastrowid
                 for i, sn in enumerate(sn_ranges):
                     c.execute('INSERT INTO serial_ranges (collection_id, range_index, range_value) VALUES (?, ?, ?)',
                              (collection_id, i, sn["range"]))
-                conn.commit()
+                insert_stats(conn, collection_id, coin_ticker, [sn["range"] for sn in sn_ranges])
+                self.collections.load(conn, collection_id)
+                record_event(conn, coin_ticker, 'deploy', block.get('height') if block else None, collection_id,
+                             f"{txid}i0", txid, {'collection': sanitized_title, 'deploy_address': inscription_address})
             logger.info(f"Deployed collection {sanitized_title} on coin {coin_ticker} with txid {txid}")
         except Exception as e:
             logger.error(f"Error handling deploy operation on coin {coin_ticker} with txid {txid}: {e}")
 
-    def handle_mint_operation(self, coin_ticker: str, soup: BeautifulSoup, txid: str, tx: Dict[str, Any], block: Dict[str, Any]) -> None:
+    def validate_mint(self, coin_ticker: str, doc: Rc001Document,
+                      tx: Dict[str, Any]) -> Tuple[Optional[CollectionEntry], Optional[str]]:
+        """The collection a mint belongs to, or None and the reason the mint is invalid.
+
+        Checks the collection, the serial number against its ranges, the parent script and the
+        payment. Whether the serial number is still free is left to the caller.
+        """
+        if doc.title is None:
+            return None, f"Title without a single string in mint {tx['txid']} on coin {coin_ticker}"
+        sanitized_title = self.sanitize_filename(doc.title)
+        collection = self.collections.get(coin_ticker, sanitized_title)
+        if not collection:
+            return None, f"Collection {sanitized_title} not found on coin {coin_ticker}"
+        sn = doc.sn
+        if sn is None:
+            return None, f"Serial number meta tag without content in mint {tx['txid']} on coin {coin_ticker}"
+        if not collection.is_valid_sn(sn):
+            return None, f"Invalid serial number {sn} for collection {sanitized_title} on coin {coin_ticker}"
+        parent_inscription_id = collection.parent_inscription_id
+        if doc.script_src is None or doc.script_src.split('/')[-1] != parent_inscription_id:
+            return None, f"Parent inscription ID mismatch or no script tag found for {sanitized_title} on {coin_ticker}"
+        mint_price_btc = collection.mint_price_btc
+        mint_address = collection.mint_address
+        if mint_price_btc is None:
+            return None, f"Mint price of collection {sanitized_title} on coin {coin_ticker} is not a number"
+        if mint_price_btc > 0:
+            valid_payment = any(
+                Decimal(vout['value']) == mint_price_btc and mint_address in vout['scriptPubKey']['addresses']
+                for vout in tx['vout']
+                if 'value' in vout and 'scriptPubKey' in vout and 'addresses' in vout['scriptPubKey']
+            )
+            if not valid_payment:
+                return None, f"Invalid payment for mint: {mint_price_btc} to {mint_address} on {coin_ticker}"
+        return collection, None
+
+    def handle_mint_operation(self, coin_ticker: str, doc: Rc001Document, txid: str, tx: Dict[str, Any], block: Dict[str, Any]) -> None:
         """Handle mint operation"""
         try:
-            title = soup.find('title').string if soup.find('title') else 'Untitled'
-            sanitized_title = self.sanitize_filename(title)
-            collection_id = self._get_collection_id(coin_ticker, sanitized_title)
-            if not collection_id:
-                logger.error(f"Collection {sanitized_title} not found on coin {coin_ticker}")
-                return
-            config = self._get_collection_config(collection_id)
-            if not config:
-                logger.error(f"Configuration for collection {sanitized_title} on coin {coin_ticker} not found")
-                return
-            sn_meta = soup.find('meta', attrs={'name': 'sn'})
-            sn = sn_meta['content'] if sn_meta else 'Unknown'
-            if not self.is_valid_sn(sn, coin_ticker, sanitized_title):
-                logger.warning(f"Invalid serial number {sn} for collection {sanitized_title} on coin {coin_ticker}")
+            collection, reason = self.validate_mint(coin_ticker, doc, tx)
+            if collection is None:
+                logger.warning(reason)
                 return
-            parent_inscription_id = config.get('parent_inscription_id', 'Unknown')
-            script_tag = soup.find('script', src=True)
-            if not script_tag or script_tag['src'].split('/')[-1] != parent_inscription_id:
-                logger.warning(f"Parent inscription ID mismatch or no script tag found for {sanitized_title} on {coin_ticker}")
-                return
-            mint_price_sats = float(config.get('mint_price', '0'))
-            mint_price_btc = Decimal(mint_price_sats) / Decimal(100000000)
-            mint_address = config.get('mint_address', 'Unknown')
-            if mint_price_btc > 0:
-                valid_payment = any(
-                    Decimal(vout['value']) == mint_price_btc and mint_address in vout['scriptPubKey']['addresses']
-                    for vout in tx['vout']
-                    if 'value' in vout and 'scriptPubKey' in vout and 'addresses' in vout['scriptPubKey']
-                )
-                if not valid_payment:
-                    logger.warning(f"Invalid payment for mint: {mint_price_btc} to {mint_address} on {coin_ticker}")
-                    return
+            sanitized_title = self.sanitize_filename(doc.title)
+            collection_id = collection.collection_id
+            sn = doc.sn
 
             # Retrieve the block height from the block data
             block_height = block.get('height', None)
@@ -398,7 +831,7 @@ class BlockchainScanner:
                 logger.error(f"Block height not found for transaction {txid} on coin {coin_ticker}")
                 return
 
-            with self.get_db_connection() as conn:
+            with self.savepoint('rc001_op') as conn:
                 c = conn.cursor()
                 c.execute('SELECT item_id FROM items WHERE collection_id = ? AND sn = ?', (collection_id, sn))
                 if c.fetchone():
@@ -409,54 +842,394 @@ class BlockchainScanner:
                 if tx['vout'] and tx['vout'][0].get('scriptPubKey', {}).get('addresses'):
                     inscription_address = tx['vout'][0]['scriptPubKey']['addresses'][0]
 
-                # Calculate the next sequence number
-                c.execute('SELECT COUNT(*) FROM items WHERE collection_id = ?', (collection_id,))
+                # The next sequence number comes from the collection's mint counter
+                c.execute('SELECT minted_count FROM collections WHERE collection_id = ?', (collection_id,))
                 sequence_number = c.fetchone()[0] + 1
 
                 c.execute('''INSERT INTO items (
-                            collection_id, inscription_id, sn, inscription_status, inscription_address, created_at, sequence_number
-                            ) VALUES (?, ?, ?, ?, ?, ?, ?)''',
-                         (collection_id, inscription_id, sn, 'minted', inscription_address, block_height, sequence_number))
-                conn.commit()
+                            collection_id, inscription_id, sn, inscription_status, inscription_address, created_at, sequence_number,
+                            location
+                            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+                         (collection_id, inscription_id, sn, 'minted', inscription_address, block_height, sequence_number,
+                          f"{txid}:0"))
+                c.execute('UPDATE collections SET minted_count = ? WHERE collection_id = ?', (sequence_number, collection_id))
+                record_mint(conn, collection_id, block_height)
+                # The mint confirmed, so it no longer claims its serial number from the mempool
+                c.execute('DELETE FROM pending_items WHERE inscription_id = ?', (inscription_id,))
+                record_event(conn, coin_ticker, 'mint', block_height, collection_id, inscription_id, txid,
+                             {'collection': sanitized_title, 'sn': sn, 'address': inscription_address,
+                              'sequence_number': sequence_number})
+            self._tracked(coin_ticker).setdefault((txid, 0), set()).add(inscription_id)
             logger.info(f"Minted item with SN {sn} for collection {sanitized_title} on coin {coin_ticker} with txid {txid}")
         except Exception as e:
             logger.error(f"Error handling mint operation on coin {coin_ticker}: {e}")
 
+    def _stored_block_hash(self, coin_ticker: str, height: int) -> Optional[str]:
+        with self._db_lock:
+            tip = self._tip_hashes.get(coin_ticker)
+            if tip and tip[0] == height:
+                return tip[1]
+            pending = self._pending_block_hashes.get((coin_ticker, height))
+            if pending:
+                return pending
+            with self.get_db_connection() as conn:
+                row = conn.execute('SELECT block_hash FROM block_hashes WHERE coin_ticker = ? AND height = ?',
+                                   (coin_ticker, height)).fetchone()
+            return row[0] if row else None
+
+    def _flush_block_records(self) -> None:
+        """Write the hashes and checkpoints of the blocks applied in the open transaction, forgetting old hashes"""
+        if not self._pending_checkpoints:
+            return
+        with self.get_db_connection() as conn:
+            oldest_kept = {coin_ticker: heights["last_block_height"] - BLOCK_HASH_HISTORY
+                           for coin_ticker, heights in self._pending_checkpoints.items()}
+            conn.executemany('INSERT OR REPLACE INTO block_hashes (coin_ticker, height, block_hash) VALUES (?, ?, ?)',
+                             [(coin_ticker, height, block_hash)
+                              for (coin_ticker, height), block_hash in self._pending_block_hashes.items()
+                              if height > oldest_kept[coin_ticker]])
+            conn.executemany('DELETE FROM block_hashes WHERE coin_ticker = ? AND height <= ?', oldest_kept.items())
+            self.update_last_block_heights(self._pending_checkpoints)
+        self._pending_block_hashes.clear()
+        self._pending_checkpoints.clear()
+
+    def _record_status(self, coin_ticker: str, node_height: int, last_height: int) -> None:
+        """Store a chain's write profile, lag, scan rate and last error in indexer_status"""
+        now = time.monotonic()
+        mark_time, mark_height, rate = self._status_marks.get(coin_ticker, (now, last_height, None))
+        if last_height < mark_height:
+            mark_time, mark_height = now, last_height  # Rolled back; start measuring again
+        elif now - mark_time >= STATUS_RATE_WINDOW:
+            rate = round((last_height - mark_height) / (now - mark_time), 2)
+            mark_time, mark_height = now, last_height
+        with self._db_lock:
+            self._status_marks[coin_ticker] = (mark_time, mark_height, rate)
+            with self.get_db_connection() as conn:
+                conn.execute('''INSERT OR REPLACE INTO indexer_status (coin_ticker, write_profile, node_height,
+                                last_block_height, lag, blocks_per_second, last_error, updated_at)
+                                VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)''',
+                             (coin_ticker, self.write_profile, node_height, last_height,
+                              max(node_height - last_height, 0), rate, self._chain_errors.get(coin_ticker)))
+
+    def commit_blocks(self, coin_ticker: str, node_height: int, block_heights: Dict[str, Dict[str, int]]) -> None:
+        """Write the queued block records and the chain's status, then commit the open transaction"""
+        with self._db_lock:
+            if not self.db.in_transaction:
+                return
+            self._flush_block_records()
+            self._record_status(coin_ticker, node_height, block_heights[coin_ticker]["last_block_height"])
+            self.db.execute('COMMIT')
+
+    def is_near_tip(self, coin_ticker: str) -> bool:
+        """Whether the chain's last pass ended within a commit group of the node's tip"""
+        lag = self._chain_lags.get(coin_ticker)
+        return lag is not None and lag < COMMIT_BLOCKS
+
+    def pending_txids(self, coin_ticker: str) -> Set[str]:
+        """Transactions of the chain's recorded pending mints"""
+        with self._db_lock, self.get_db_connection() as conn:
+            rows = conn.execute('SELECT inscription_id FROM pending_items WHERE coin_ticker = ?', (coin_ticker,)).fetchall()
+        return {inscription_id[:-2] for inscription_id, in rows}
+
+    def update_pending_items(self, coin_ticker: str, mints: List[Tuple[Rc001Document, Dict[str, Any]]],
+                             gone_txids: List[str], mempool_txids: Set[str]) -> int:
+        """Apply one mempool poll and return how many new pending mints were recorded.
+
+        Forgets the mints of transactions that left the mempool, renews the expiry of the claims
+        whose transaction is still in it (`mempool_txids`), drops expired ones and records the
+        valid `mints` whose serial number is not minted yet. A claim no poll sees in the mempool
+        any more, even one whose departure was missed, thus ages out after PENDING_TTL.
+        """
+        now = int(time.time())
+        recorded = 0
+        with self._db_lock, self.savepoint('rc001_mempool') as conn:
+            conn.executemany('DELETE FROM pending_items WHERE inscription_id = ?', [(f"{txid}i0",) for txid in gone_txids])
+            # The chain's claims are few, unlike the mempool: renew them one by one
+            claims = conn.execute('SELECT inscription_id FROM pending_items WHERE coin_ticker = ?',
+                                  (coin_ticker,)).fetchall()
+            conn.executemany('UPDATE pending_items SET expires_at = ? WHERE inscription_id = ?',
+                             [(now + PENDING_TTL, inscription_id) for inscription_id, in claims
+                              if inscription_id[:-2] in mempool_txids])
+            conn.execute('DELETE FROM pending_items WHERE expires_at <= ?', (now,))
+            for doc, tx in mints:
+                # One malformed transaction must not keep the rest of the mempool from being recorded
+                try:
+                    collection, reason = self.validate_mint(coin_ticker, doc, tx)
+                    if collection is None:
+                        logger.debug(f"Ignoring pending mint {tx['txid']}: {reason}")
+                        continue
+                    if conn.execute('SELECT 1 FROM items WHERE collection_id = ? AND sn = ?',
+                                    (collection.collection_id, doc.sn)).fetchone():
+                        continue  # Will be rejected as a duplicate when it confirms
+                    inscription_address = None
+                    if tx['vout'] and tx['vout'][0].get('scriptPubKey', {}).get('addresses'):
+                        inscription_address = tx['vout'][0]['scriptPubKey']['addresses'][0]
+                    conn.execute('''INSERT OR REPLACE INTO pending_items
+                                    (inscription_id, coin_ticker, collection_id, sn, inscription_address, expires_at)
+                                    VALUES (?, ?, ?, ?, ?, ?)''',
+                                 (f"{tx['txid']}i0", coin_ticker, collection.collection_id, doc.sn, inscription_address,
+                                  now + PENDING_TTL))
+                    recorded += 1
+                except Exception as e:
+                    logger.error(f"Error recording pending mint {tx.get('txid')} on coin {coin_ticker}: {e}")
+        return recorded
+
+    def find_fork_height(self, coin_ticker: str, rpc: BatchRPCClient, height: int) -> int:
+        """Highest recorded height at or below `height` whose block is still on the node's best chain"""
+        with self._db_lock:
+            self._flush_block_records()
+            with self.get_db_connection() as conn:
+                recorded = conn.execute('''SELECT height, block_hash FROM block_hashes
+                                           WHERE coin_ticker = ? AND height <= ?
+                                           ORDER BY height DESC''', (coin_ticker, height)).fetchall()
+        for recorded_height, block_hash in recorded:
+            if rpc.getblockhash(recorded_height) == block_hash:
+                return recorded_height
+        oldest = recorded[-1][0] if recorded else height + 1
+        logger.error(f"Reorg on {coin_ticker} goes deeper than the {len(recorded)} recorded block hashes, "
+                     f"rolling back to {oldest - 1}")
+        return oldest - 1
+
+    def rollback_to(self, coin_ticker: str, fork_height: int, block_heights: Dict[str, Dict[str, int]]) -> None:
+        """Undo every deploy, mint and transfer above `fork_height` and move the checkpoint back to it"""
+        with self._db_lock:
+            with self.savepoint('rc001_rollback') as conn:
+                collection_ids = 'SELECT collection_id FROM collections WHERE coin_ticker = ?'
+                # Move inscriptions back to where they were, newest transfer first
+                transfers = conn.execute('''SELECT inscription_id, old_location, old_offset, old_address FROM item_transfers
+                                            WHERE coin_ticker = ? AND height > ? ORDER BY transfer_id DESC''',
+                                         (coin_ticker, fork_height)).fetchall()
+                conn.executemany('''UPDATE items SET location = ?, location_offset = ?, inscription_address = ?
+                                    WHERE inscription_id = ?''',
+                                 [(location, offset, address, inscription_id)
+                                  for inscription_id, location, offset, address in transfers])
+                conn.execute('DELETE FROM item_transfers WHERE coin_ticker = ? AND height > ?', (coin_ticker, fork_height))
+                removed_items = conn.execute(f'''DELETE FROM items WHERE created_at > ?
+                                                 AND collection_id IN ({collection_ids})''',
+                                             (fork_height, coin_ticker)).rowcount
+                conn.execute(f'DELETE FROM serial_ranges WHERE collection_id IN ({collection_ids} AND deploy_height > ?)',
+                             (coin_ticker, fork_height))
+                conn.execute(f'DELETE FROM pending_items WHERE collection_id IN ({collection_ids} AND deploy_height > ?)',
+                             (coin_ticker, fork_height))
+                removed_collections = conn.execute('DELETE FROM collections WHERE coin_ticker = ? AND deploy_height > ?',
+                                                   (coin_ticker, fork_height)).rowcount
+                # Items are removed newest first, so the survivors keep sequence numbers 1..count
+                conn.execute('''UPDATE collections SET minted_count =
+                                (SELECT COUNT(*) FROM items WHERE items.collection_id = collections.collection_id)
+                                WHERE coin_ticker = ?''', (coin_ticker,))
+                refresh_stats(conn, coin_ticker)
+                conn.execute('DELETE FROM block_hashes WHERE coin_ticker = ? AND height > ?', (coin_ticker, fork_height))
+                # Stored bodies stay; another inscription may share them, and a re-mined block reuses them
+                conn.execute('DELETE FROM inscription_content WHERE coin_ticker = ? AND height > ?', (coin_ticker, fork_height))
+                self._reassembler(coin_ticker).rollback(conn, fork_height)
+                record_event(conn, coin_ticker, 'rollback', fork_height,
+                             data={'removed_items': removed_items, 'removed_collections': removed_collections,
+                                   'undone_transfers': len(transfers)})
+                checkpoint = dict(block_heights[coin_ticker], last_block_height=fork_height)
+                self.update_last_block_heights({coin_ticker: checkpoint})
+            block_heights[coin_ticker]["last_block_height"] = fork_height
+            self._tip_hashes.pop(coin_ticker, None)
+            self._tracked_outpoints.pop(coin_ticker, None)
+            cache = self._get_block_cache(coin_ticker)
+            if cache is not None:
+                cache.truncate(fork_height)
+            self.collections.load(self.db)
+        logger.warning(f"Rolled back {coin_ticker} to block {fork_height}: removed {removed_items} items "
+                       f"and {removed_collections} collections, undid {len(transfers)} transfers")
+
+    def apply_block(self, coin_ticker: str, block_height: int, block_hash: str, apply_operations: Callable[[], None],
+                    block_heights: Dict[str, Dict[str, int]]) -> bool:
+        """Run a block's operations as one unit and queue its checkpoint and hash; False if the block failed.
+
+        Opens the group transaction if none is open. commit_blocks writes the queued records
+        and commits, so a block and its checkpoint are still stored together or not at all.
+        """
+        with self._db_lock:
+            if not self.db.in_transaction:
+                self.db.execute('BEGIN')
+            try:
+                with self.savepoint('rc001_block'):
+                    apply_operations()
+            except Exception as e:
+                logger.error(f"Error processing block {block_height} for {coin_ticker}: {e}")
+                self.collections.load(self.db)  # Drop deploys of the rolled-back block
+                self._tracked_outpoints.pop(coin_ticker, None)  # and its mints and transfers
+                self._reassemblers.pop(coin_ticker, None)  # and its partial inscriptions
+                if isinstance(e, InputValuesUnavailable):
+                    raise  # Retried on the next pass rather than skipped
+                return False
+            block_heights[coin_ticker]["last_block_height"] = block_height
+            self._tip_hashes[coin_ticker] = (block_height, block_hash)
+            self._pending_block_hashes[(coin_ticker, block_height)] = block_hash
+            self._pending_checkpoints[coin_ticker] = dict(block_heights[coin_ticker])
+            return True
+
+    def scan_range(self, coin_ticker: str, start_height: int, end_height: int,
+                   block_heights: Dict[str, Dict[str, int]], rpc: BatchRPCClient) -> None:
+        """Process blocks in strict height order while the next ones are prefetched.
+
+        A block that cannot be fetched aborts the range (BlockFetchError), as does one whose
+        transfers' input values cannot be looked up (InputValuesUnavailable), so it is retried
+        on the next pass instead of being skipped, which keeps mint ordering deterministic.
+        When a block does not build on the last processed one, the orphaned blocks are
+        rolled back and the range continues from the fork point.
+        """
+        while start_height <= end_height:
+            fork_height = self._scan_blocks(coin_ticker, start_height, end_height, block_heights, rpc)
+            if fork_height is None:
+                return
+            self.rollback_to(coin_ticker, fork_height, block_heights)
+            start_height = max(block_heights[coin_ticker]["start_block_height"], fork_height + 1)
+            end_height = rpc.getblockcount()
+            logger.info(f"Rescanning {coin_ticker} from {start_height} to {end_height} after reorg")
+
+    def _scan_blocks(self, coin_ticker: str, start_height: int, end_height: int,
+                     block_heights: Dict[str, Dict[str, int]], rpc: BatchRPCClient) -> Optional[int]:
+        """Apply blocks until the range ends (None) or a reorg is found (returns the fork height)"""
+        blocks_in_transaction = 0
+        self._update_write_profile(coin_ticker, end_height - block_heights[coin_ticker]["last_block_height"])
+        try:
+            with BlockPrefetcher(lambda heights: self.fetch_blocks(coin_ticker, heights), start_height, end_height,
+                                 window=PREFETCH_WINDOW, workers=PREFETCH_WORKERS,
+                                 max_bytes=PREFETCH_MAX_BYTES, batch_size=RPC_BATCH_SIZE) as blocks:
+                for block_height, block in blocks:
+                    lag = end_height - block_height
+                    if self.write_profile == 'bulk' and lag < BULK_LAG_THRESHOLD:
+                        self.commit_blocks(coin_ticker, end_height, block_heights)
+                        blocks_in_transaction = 0
+                        self._update_write_profile(coin_ticker, lag)
+                    previous_hash = block.get('previousblockhash')
+                    stored_hash = self._stored_block_hash(coin_ticker, block_height - 1)
+                    if previous_hash and stored_hash and previous_hash != stored_hash:
+                        logger.warning(f"Block {block_height} on {coin_ticker} does not extend block {block_height - 1} "
+                                       f"{stored_hash}, looking for the fork point")
+                        return self.find_fork_height(coin_ticker, rpc, block_height - 1)
+                    compressed = block.pop('compressed', None)
+                    if compressed is not None:
+                        self._get_block_cache(coin_ticker).append_compressed(block_height, block['hash'], compressed)
+                    # Before taking the database lock: a slow node must not hold up other chains' writes
+                    self.resolve_input_values(coin_ticker, block, rpc)
+                    if not self.apply_block(coin_ticker, block_height, block['hash'],
+                                            lambda: self.process_block(coin_ticker, block), block_heights):
+                        continue  # Skip to next block if one fails
+                    blocks_in_transaction += 1
+                    if self.write_profile == 'bulk':
+                        commit = blocks_in_transaction >= BULK_COMMIT_BLOCKS
+                    else:
+                        commit = blocks_in_transaction >= COMMIT_BLOCKS or lag < COMMIT_BLOCKS
+                    if commit:
+                        self.commit_blocks(coin_ticker, end_height, block_heights)
+                        blocks_in_transaction = 0
+            return None
+        finally:
+            # Only whole blocks are left in an open transaction, so keep them when a fetch fails mid-range
+            self.commit_blocks(coin_ticker, end_height, block_heights)
+
     def run(self) -> None:
-        """Main scanning loop for multiple blockchains"""
+        """Scan every chain enabled in rpc.conf; with several chains each one runs in its own thread.
+
+        With MEMPOOL_INTERVAL set, a watcher thread per chain records its pending mints.
+        """
         block_heights = self.load_last_block_heights()
+        if not block_heights:
+            logger.error(f"No chain is enabled for scanning in {RPC_CONFIG_FILE}")
+            return
+        if MEMPOOL_INTERVAL:
+            for coin_ticker in block_heights:
+                watcher = MempoolWatcher(self, coin_ticker, extract_operation, MEMPOOL_INTERVAL)
+                threading.Thread(target=watcher.run, name=f'mempool-{coin_ticker}', daemon=True).start()
+        if len(block_heights) == 1:
+            self.run_chain(next(iter(block_heights)), block_heights)
+            return
+        threads = [threading.Thread(target=self.run_chain, args=(coin_ticker, block_heights),
+                                    name=f'scan-{coin_ticker}', daemon=True)
+                   for coin_ticker in block_heights]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def run_chain(self, coin_ticker: str, block_heights: Dict[str, Dict[str, int]]) -> None:
+        """Scan one chain forever, following its tip and backing off while its node keeps failing.
+
+        Uses only this chain's RPC clients, checkpoint and tip follower, so a stalled or
+        unreachable node delays nobody else; only database writes are shared.
+        """
+        failures = 0
         while True:
-            for coin_ticker, heights in block_heights.items():
+            try:
+                node_height = self.scan_chain(coin_ticker, block_heights)
+            except Exception as e:
+                failures += 1
+                delay = min(RETRY_DELAY * 2 ** (failures - 1), MAX_RETRY_DELAY)
+                logger.error(f"Error in RPC connection or block retrieval for {coin_ticker}: {e}; "
+                             f"retrying in {delay}s")
+                self._chain_errors[coin_ticker] = str(e)
                 try:
-                    if coin_ticker not in self.rpc_configs:
-                        logger.warning(f"Skipping coin {coin_ticker}: No RPC configuration found")
-                        continue
-                    with self.get_rpc_connection(coin_ticker) as rpc:
-                        current_block_height = rpc.getblockcount()
-                        start_height = heights["start_block_height"]
-                        last_height = heights["last_block_height"]
-                        scan_start_height = max(start_height, last_height + 1)
-                        if scan_start_height > current_block_height:
-                            logger.info(f"No new blocks to process for {coin_ticker} at height {current_block_height}")
-                            continue
-                        logger.info(f"Processing blocks for {coin_ticker} from {scan_start_height} to {current_block_height}")
-                        for block_height in range(scan_start_height, current_block_height + 1):
-                            try:
-                                block_hash = rpc.getblockhash(block_height)
-                                block = rpc.getblock(block_hash, 2)
-                                for tx in block['tx']:
-                                    self.process_transaction(coin_ticker, tx, rpc, block)
-                                block_heights[coin_ticker]["last_block_height"] = block_height
-                                self.update_last_block_heights(block_heights)
-                            except Exception as e:
-                                logger.error(f"Error processing block {block_height} for {coin_ticker}: {e}")
-                                continue  # Skip to next block if one fails
-                except Exception as e:
-                    logger.error(f"Error in RPC connection or block retrieval for {coin_ticker}: {e}")
-                    time.sleep(RETRY_DELAY)
-                    continue  # Skip to next coin if RPC fails
-            time.sleep(SCAN_INTERVAL)
+                    last_height = block_heights[coin_ticker]["last_block_height"]
+                    self._record_status(coin_ticker, self._node_heights.get(coin_ticker, last_height), last_height)
+                except Exception as status_error:
+                    logger.error(f"Error recording the status of {coin_ticker}: {status_error}")
+                time.sleep(delay)
+                continue
+            if failures:
+                logger.info(f"{coin_ticker} recovered after {failures} failed attempts")
+                failures = 0
+            self.wait_for_new_block(coin_ticker, node_height)
+
+    def scan_chain(self, coin_ticker: str, block_heights: Dict[str, Dict[str, int]]) -> int:
+        """One pass over a chain: roll back a replaced tip, then scan up to the node's height (returned)"""
+        heights = block_heights[coin_ticker]
+        with self.get_rpc_connection(coin_ticker) as rpc:
+            start_height = heights["start_block_height"]
+            last_height = heights["last_block_height"]
+            current_block_height, offline = self.get_node_height(coin_ticker, rpc, last_height)
+            self._node_heights[coin_ticker] = current_block_height
+            # The blocks we stopped at may have been replaced while we waited. A node that is
+            # behind us (e.g. reindexing) is only compared at its own tip, so it is not a reorg
+            check_height = min(last_height, current_block_height)
+            stored_hash = self._stored_block_hash(coin_ticker, check_height)
+            if not offline and stored_hash and rpc.getblockhash(check_height) != stored_hash:
+                logger.warning(f"Block {check_height} on {coin_ticker} is no longer on the best chain")
+                self.rollback_to(coin_ticker, self.find_fork_height(coin_ticker, rpc, check_height), block_heights)
+                last_height = heights["last_block_height"]
+            self._chain_errors[coin_ticker] = None
+            scan_start_height = max(start_height, last_height + 1)
+            if scan_start_height > current_block_height:
+                logger.info(f"No new blocks to process for {coin_ticker} at height {current_block_height}")
+                self._update_write_profile(coin_ticker, 0)
+                self._record_status(coin_ticker, current_block_height, last_height)
+                return current_block_height
+            logger.info(f"Processing blocks for {coin_ticker} from {scan_start_height} to {current_block_height}")
+            self.scan_range(coin_ticker, scan_start_height, current_block_height, block_heights, rpc)
+        return current_block_height
+
+    def _get_tip_follower(self, coin_ticker: str) -> TipFollower:
+        if coin_ticker not in self._tip_followers:
+            follower = TipFollower(self.rpc_configs[coin_ticker], TIP_FOLLOW_MODE, SCAN_INTERVAL)
+            if follower.fallback_reason:
+                logger.warning(f"Tip follow for {coin_ticker} falls back to {follower.mode}: {follower.fallback_reason}")
+            logger.info(f"Following the {coin_ticker} tip in {follower.mode} mode")
+            self._tip_followers[coin_ticker] = follower
+        return self._tip_followers[coin_ticker]
+
+    def wait_for_new_block(self, coin_ticker: str, node_height: int) -> None:
+        """Block until the chain has a block above `node_height`, or SCAN_INTERVAL has passed.
+
+        Compared with the node's height rather than the checkpoint, so a block that failed to
+        process at the tip is retried on the next block instead of in a busy loop.
+        """
+        try:
+            follower = self._get_tip_follower(coin_ticker)
+            mode = follower.mode
+            follower.wait(node_height)
+            if follower.mode != mode:
+                logger.warning(f"Tip follow for {coin_ticker} falls back to {follower.mode}: {follower.fallback_reason}")
+        except Exception as e:
+            logger.error(f"Error waiting for a new {coin_ticker} block: {e}")
+            time.sleep(RETRY_DELAY)
 
 if __name__ == "__main__":
+    configure_logging()
     scanner = BlockchainScanner()
     scanner.run()
\ No newline at end of file
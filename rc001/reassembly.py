@@ -0,0 +1,160 @@
+"""Reassembly of inscriptions split over a chain of transactions.
+
+getOrdTxsB1T.js splits an envelope that does not fit one scriptSig (MAX_PAYLOAD_LEN): the
+first transaction's input carries "ord", the piece count, the content type and the first
+(countdown, data) pieces, and locks its output 0 with a P2SH script. Each following
+transaction spends that output with the next pieces, until a piece counts down to 0. The
+inscription is the last transaction's (its id, owner and payment outputs).
+
+Partial envelopes live in the partial_inscriptions table, keyed by the outpoint the next
+transaction has to spend, and are written in the block's transaction; only those outpoints
+are held in memory. A continued partial is kept (marked consumed) so a rollback can reopen
+it. Partials not continued within max_age blocks are evicted, as are consumed ones that
+old, and a partial growing past max_bytes is dropped.
+"""
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from envelope import ORD_PREFIX_HEX, decode_continuation, decode_envelope_part
+
+logger = logging.getLogger(__name__)
+
+CREATE_PARTIALS_TABLE = '''CREATE TABLE IF NOT EXISTS partial_inscriptions (
+                        coin_ticker TEXT,
+                        txid TEXT,
+                        vout INTEGER,
+                        content_type TEXT,
+                        body BLOB,
+                        remaining INTEGER,
+                        height INTEGER,
+                        consumed_height INTEGER,
+                        PRIMARY KEY (coin_ticker, txid, vout)
+                        )'''
+
+# (start, continuation): an envelope start that is not complete, as (content_type, body, remaining),
+# and the pieces opening the scriptSig, as (body, remaining); either may be None. A start with
+# remaining 0 and body None stands for a complete envelope whose body the caller kept, and feed()
+# hands it back as (content_type, None) unless the transaction continues an open partial
+Parts = Tuple[Optional[Tuple[Optional[str], Optional[bytes], int]], Optional[Tuple[bytes, int]]]
+
+
+def inscription_parts(tx: Dict[str, Any]) -> Optional[Parts]:
+    """The pieces of a split envelope a transaction may carry, None if it carries none.
+
+    Depends on nothing but the transaction, so backfill workers decode them; whether a
+    continuation really continues a partial is only known in chain order.
+    """
+    if not tx.get('vin'):
+        return None
+    script_hex = tx['vin'][0].get('scriptSig', {}).get('hex')
+    if not script_hex:
+        return None
+    script = bytes.fromhex(script_hex)
+    if script_hex.startswith(ORD_PREFIX_HEX):
+        start = decode_envelope_part(script)
+        return (start, None) if start and start[2] else None
+    continuation = decode_continuation(script)
+    return (None, continuation) if continuation else None
+
+
+class InscriptionReassembler:
+    """Open partial envelopes of one chain"""
+
+    def __init__(self, coin_ticker: str, max_age: int, max_bytes: int):
+        self.coin_ticker = coin_ticker
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.open: Dict[Tuple[str, int], int] = {}  # Outpoint to continue from -> height of the partial
+        self._oldest: Optional[int] = None  # Lowest height any stored row is evicted by
+
+    def load(self, conn) -> None:
+        rows = conn.execute('''SELECT txid, vout, height FROM partial_inscriptions
+                               WHERE coin_ticker = ? AND consumed_height IS NULL''', (self.coin_ticker,)).fetchall()
+        self.open = {(txid, vout): height for txid, vout, height in rows}
+        self._oldest = conn.execute('''SELECT MIN(COALESCE(consumed_height, height)) FROM partial_inscriptions
+                                       WHERE coin_ticker = ?''', (self.coin_ticker,)).fetchone()[0]
+
+    def feed(self, conn, tx: Dict[str, Any], height: int,
+             parts: Optional[Parts] = None) -> Optional[Tuple[Optional[str], Optional[bytes]]]:
+        """(content_type, body) of the inscription a transaction completes, None if it completes none.
+
+        Transactions must be fed in chain order. Without `parts` they are decoded from the
+        transaction; a complete single-transaction envelope is returned as it is.
+        """
+        vin = tx.get('vin')
+        if not vin:
+            return None
+        spent = (vin[0].get('txid'), vin[0].get('vout'))
+        if self.open and spent in self.open:
+            if parts is None:
+                script_hex = vin[0].get('scriptSig', {}).get('hex')
+                parts = (None, decode_continuation(bytes.fromhex(script_hex)) if script_hex else None)
+            return self._continue(conn, spent, tx['txid'], parts[1], height)
+        if parts is None:
+            script_hex = vin[0].get('scriptSig', {}).get('hex')
+            if not script_hex or not script_hex.startswith(ORD_PREFIX_HEX):
+                return None
+            start = decode_envelope_part(bytes.fromhex(script_hex))
+        else:
+            start = parts[0]
+        if start is None:
+            return None
+        content_type, body, remaining = start
+        if not remaining:
+            return content_type, body
+        self._store(conn, tx['txid'], content_type, body, remaining, height)
+        return None
+
+    def _continue(self, conn, spent: Tuple[str, int], txid: str, continuation: Optional[Tuple[bytes, int]],
+                  height: int) -> Optional[Tuple[Optional[str], bytes]]:
+        del self.open[spent]
+        content_type, body = conn.execute('''SELECT content_type, body FROM partial_inscriptions
+                                             WHERE coin_ticker = ? AND txid = ? AND vout = ?''',
+                                          (self.coin_ticker, *spent)).fetchone()
+        conn.execute('''UPDATE partial_inscriptions SET consumed_height = ?
+                        WHERE coin_ticker = ? AND txid = ? AND vout = ?''', (height, self.coin_ticker, *spent))
+        if continuation is None:
+            logger.warning(f"Partial inscription at {spent[0]}:{spent[1]} on {self.coin_ticker} "
+                           f"was spent by {txid} without continuing it")
+            return None
+        pieces, remaining = continuation
+        body = bytes(body) + pieces
+        if not remaining:
+            return content_type, body
+        if len(body) > self.max_bytes:
+            logger.warning(f"Dropping partial inscription continued in {txid} on {self.coin_ticker}: "
+                           f"over {self.max_bytes} bytes")
+            return None
+        self._store(conn, txid, content_type, body, remaining, height)
+        return None
+
+    def _store(self, conn, txid: str, content_type: Optional[str], body: bytes, remaining: int, height: int) -> None:
+        # The next piece spends the P2SH output 0 of this transaction
+        conn.execute('''INSERT OR REPLACE INTO partial_inscriptions
+                        (coin_ticker, txid, vout, content_type, body, remaining, height) VALUES (?, ?, 0, ?, ?, ?, ?)''',
+                     (self.coin_ticker, txid, content_type, body, remaining, height))
+        self.open[(txid, 0)] = height
+        if self._oldest is None or height < self._oldest:
+            self._oldest = height
+
+    def evict(self, conn, height: int) -> None:
+        """Forget partials, open or consumed, last touched more than max_age blocks before `height`"""
+        cutoff = height - self.max_age
+        if self._oldest is None or self._oldest >= cutoff:
+            return
+        stale = [outpoint for outpoint, partial_height in self.open.items() if partial_height < cutoff]
+        for outpoint in stale:
+            del self.open[outpoint]
+            logger.info(f"Evicted partial inscription at {outpoint[0]}:{outpoint[1]} on {self.coin_ticker}")
+        conn.execute('''DELETE FROM partial_inscriptions
+                        WHERE coin_ticker = ? AND COALESCE(consumed_height, height) < ?''', (self.coin_ticker, cutoff))
+        self._oldest = conn.execute('''SELECT MIN(COALESCE(consumed_height, height)) FROM partial_inscriptions
+                                       WHERE coin_ticker = ?''', (self.coin_ticker,)).fetchone()[0]
+
+    def rollback(self, conn, fork_height: int) -> None:
+        """Drop the partials of blocks above `fork_height` and reopen the ones they continued"""
+        conn.execute('DELETE FROM partial_inscriptions WHERE coin_ticker = ? AND height > ?',
+                     (self.coin_ticker, fork_height))
+        conn.execute('''UPDATE partial_inscriptions SET consumed_height = NULL
+                        WHERE coin_ticker = ? AND consumed_height > ?''', (self.coin_ticker, fork_height))
+        self.load(conn)
@@ -0,0 +1,123 @@
+import base64
+import decimal
+import http.client
+import json
+from typing import Any, Dict, List, Sequence, Tuple
+
+from bitcoinrpc.authproxy import JSONRPCException
+
+
+class BatchRPCClient:
+    """JSON-RPC client that keeps one keep-alive connection and supports batch requests.
+
+    Plain calls work like AuthServiceProxy (`client.getblockcount()`). `batch()` sends a
+    JSON-RPC batch array in a single HTTP request and returns one entry per call, where a
+    failed call is returned as a JSONRPCException instead of failing the whole batch.
+    Instances are not thread-safe; use one client per thread.
+    """
+
+    def __init__(self, host: str, port: int, user: str, password: str, timeout: int = 60):
+        self.host = host
+        self.port = int(port)
+        self.timeout = timeout
+        credentials = f"{user}:{password}".encode('utf-8')
+        self._auth_header = b'Basic ' + base64.b64encode(credentials)
+        self._conn = None
+        self._id_count = 0
+
+    @classmethod
+    def from_config(cls, rpc_config: Dict[str, str], timeout: int = 60) -> 'BatchRPCClient':
+        return cls(rpc_config['rpchost'], rpc_config['rpcport'], rpc_config['rpcuser'],
+                   rpc_config['rpcpassword'], timeout=timeout)
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _post(self, payload: Any) -> Any:
+        body = json.dumps(payload).encode('utf-8')
+        headers = {
+            'Host': self.host,
+            'Authorization': self._auth_header,
+            'Content-Type': 'application/json',
+            'Connection': 'keep-alive',
+        }
+        # A kept-alive connection may have been closed by the node; retry once on a fresh one
+        for attempt in (0, 1):
+            reused = self._conn is not None
+            if self._conn is None:
+                self._conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self._conn.request('POST', '/', body, headers)
+                response = self._conn.getresponse()
+                data = response.read()
+            except (http.client.HTTPException, OSError):
+                self.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            if response.getheader('Connection', '').lower() == 'close':
+                self.close()
+            content_type = response.getheader('Content-Type', '')
+            if 'application/json' not in content_type:
+                raise JSONRPCException({'code': -342, 'message': f"non-JSON HTTP response with '{response.status} {response.reason}' from server"})
+            return json.loads(data.decode('utf-8'), parse_float=decimal.Decimal)
+
+    def call(self, method: str, *params: Any) -> Any:
+        self._id_count += 1
+        response = self._post({'version': '1.1', 'method': method, 'params': list(params), 'id': self._id_count})
+        if response.get('error') is not None:
+            raise JSONRPCException(response['error'])
+        if 'result' not in response:
+            raise JSONRPCException({'code': -343, 'message': 'missing JSON-RPC result'})
+        return response['result']
+
+    def __getattr__(self, name: str):
+        if name.startswith('__') and name.endswith('__'):
+            raise AttributeError(name)
+        return lambda *params: self.call(name, *params)
+
+    def batch(self, calls: Sequence[Tuple[str, Sequence[Any]]]) -> List[Any]:
+        """Send all calls as one JSON-RPC batch; failed items come back as JSONRPCException"""
+        if not calls:
+            return []
+        first_id = self._id_count + 1
+        payload = []
+        for method, params in calls:
+            self._id_count += 1
+            payload.append({'version': '1.1', 'method': method, 'params': list(params), 'id': self._id_count})
+        response = self._post(payload)
+        if not isinstance(response, list):
+            # Nodes that reject the whole batch answer with a single error object
+            error = response.get('error') if isinstance(response, dict) else None
+            raise JSONRPCException(error or {'code': -344, 'message': 'invalid JSON-RPC batch response'})
+        by_id = {item.get('id'): item for item in response if isinstance(item, dict)}
+        results: List[Any] = []
+        for request_id in range(first_id, first_id + len(calls)):
+            item = by_id.get(request_id)
+            if item is None:
+                results.append(JSONRPCException({'code': -345, 'message': f'no response for batch item {request_id}'}))
+            elif item.get('error') is not None:
+                results.append(JSONRPCException(item['error']))
+            else:
+                results.append(item.get('result'))
+        return results
+
+    def get_blocks(self, heights: Sequence[int], verbosity: int = 2) -> List[Any]:
+        """Fetch blocks for `heights` with two batches (hashes, then blocks).
+
+        Returns one entry per height: a (block_hash, block) tuple, or the
+        JSONRPCException for that height.
+        """
+        hashes = self.batch([('getblockhash', [height]) for height in heights])
+        wanted = [block_hash for block_hash in hashes if not isinstance(block_hash, Exception)]
+        blocks = iter(self.batch([('getblock', [block_hash, verbosity]) for block_hash in wanted]))
+        results: List[Any] = []
+        for block_hash in hashes:
+            if isinstance(block_hash, Exception):
+                results.append(block_hash)
+                continue
+            block = next(blocks)
+            results.append(block if isinstance(block, Exception) else (block_hash, block))
+        return results
@@ -0,0 +1,171 @@
+"""Shared setup for the rc001 tests: BlockchainScanner run against fake_node.FakeNode.
+
+The rc001 modules import each other as siblings, so rc001/ goes on sys.path. Each scanner
+indexes from scratch in its own temporary directory; transactions are built here, with
+the envelope layout getOrdTxsB1T.js writes.
+"""
+import configparser
+import json
+import os
+import random
+import sqlite3
+import struct
+import sys
+from typing import List, Optional, Sequence, Tuple
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rc001indexer  # noqa: E402
+from fake_node import FakeNode, _sha256d, _varint  # noqa: E402
+from raw_block import address_params, base58check_encode  # noqa: E402
+
+COIN = 'B1T'
+MINT_PUBKEY_HASH = bytes(range(20))
+MINT_ADDRESS = base58check_encode(bytes([address_params(COIN)['pubkeyhash']]) + MINT_PUBKEY_HASH)
+PARENT_INSCRIPTION_ID = 'ab' * 32 + 'i0'
+
+
+def push(data: bytes) -> bytes:
+    if len(data) < 0x4c:
+        return bytes([len(data)]) + data
+    if len(data) <= 0xff:
+        return b'\x4c' + bytes([len(data)]) + data
+    return b'\x4d' + struct.pack('<H', len(data)) + data
+
+
+def push_number(n: int) -> bytes:
+    if n == 0:
+        return b'\x00'
+    if n <= 16:
+        return bytes([0x50 + n])
+    return push(n.to_bytes((n.bit_length() + 8) // 8, 'little'))
+
+
+def p2pkh(pubkey_hash: bytes) -> bytes:
+    return b'\x76\xa9\x14' + pubkey_hash + b'\x88\xac'
+
+
+def txid(raw: bytes) -> str:
+    return _sha256d(raw)[::-1].hex()
+
+
+def transaction(outpoints: Sequence[Tuple[str, int]], script_sig: bytes, outputs: Sequence[Tuple[int, bytes]]) -> bytes:
+    """Spend `outpoints` (txid, vout), the first with `script_sig`, into `outputs` (sats, scriptPubKey)"""
+    raw = struct.pack('<i', 1) + _varint(len(outpoints))
+    for i, (prev_txid, vout) in enumerate(outpoints):
+        script = script_sig if i == 0 else b'\x51'
+        raw += bytes.fromhex(prev_txid)[::-1] + struct.pack('<I', vout) + _varint(len(script)) + script
+        raw += struct.pack('<I', 0xffffffff)
+    raw += _varint(len(outputs))
+    for value, script_pubkey in outputs:
+        raw += struct.pack('<q', value) + _varint(len(script_pubkey)) + script_pubkey
+    return raw + struct.pack('<I', 0)
+
+
+def spend(outpoints: Sequence[Tuple[str, int]], values: Sequence[int]) -> bytes:
+    """A plain transaction spending `outpoints` into P2PKH outputs of `values` sats"""
+    return transaction(outpoints, b'\x51', [(value, p2pkh(bytes([i + 1]) * 20)) for i, value in enumerate(values)])
+
+
+def envelope(content_type: bytes, pieces: Sequence[bytes], declared: Optional[int] = None) -> bytes:
+    """An envelope scriptSig carrying `pieces` of `declared` (default: all of them)"""
+    declared = len(pieces) if declared is None else declared
+    script = push(b'ord') + push_number(declared) + push(content_type)
+    for i, piece in enumerate(pieces):
+        script += push_number(declared - i - 1) + push(piece)
+    return script + push(b'\x30' * 71) + push(b'\x51' * 40)
+
+
+def inscription_tx(content_type: str, body: bytes, rng: random.Random,
+                   outpoint: Optional[Tuple[str, int]] = None) -> bytes:
+    """A reveal transaction with the whole envelope in its scriptSig and the inscription on output 0"""
+    pieces = [body[i:i + 240] for i in range(0, len(body), 240)]
+    outputs = [(100000, p2pkh(rng.randbytes(20))), (rng.randrange(1, 10 ** 9), p2pkh(rng.randbytes(20)))]
+    return transaction([outpoint or (rng.randbytes(32).hex(), 0)], envelope(content_type.encode('ascii'), pieces),
+                       outputs)
+
+
+def deploy_html(title: str, mint_price: str = '0') -> str:
+    data = json.dumps({'sn': [{'range': '000001-999999'}], 'mint_address': MINT_ADDRESS, 'mint_price': mint_price,
+                       'parent_inscription_id': PARENT_INSCRIPTION_ID, 'emblem_inscription_id': PARENT_INSCRIPTION_ID,
+                       'website': 'https://example.com'})
+    return (f'<!DOCTYPE html><html><head><meta name="p" content="rc001"><meta name="op" content="deploy">'
+            f'<title>{title}</title></head><body><script type="application/json" id="json-data">{data}</script>'
+            f'</body></html>')
+
+
+def mint_html(title: str, sn: str) -> str:
+    return (f'<!DOCTYPE html><html lang="en"><head><meta charset="UTF-8"><meta name="p" content="rc001">'
+            f'<meta name="op" content="mint"><meta name="sn" content="{sn}"><title>{title}</title></head>'
+            f'<body><script src="/content/{PARENT_INSCRIPTION_ID}"></script></body></html>')
+
+
+def deploy_tx(title: str, rng: random.Random, mint_price: str = '0') -> bytes:
+    return inscription_tx('text/html', deploy_html(title, mint_price).encode('utf-8'), rng)
+
+
+def mint_tx(title: str, sn: str, rng: random.Random) -> bytes:
+    return inscription_tx('text/html', mint_html(title, sn).encode('utf-8'), rng)
+
+
+def scan(scanner: rc001indexer.BlockchainScanner) -> None:
+    """Index up to the node's tip, as one pass of the indexer does"""
+    heights = scanner.block_heights[COIN]
+    with scanner.get_rpc_connection(COIN) as rpc:
+        scanner.scan_range(COIN, max(heights['start_block_height'], heights['last_block_height'] + 1),
+                           rpc.getblockcount(), scanner.block_heights, rpc)
+
+
+def indexed() -> Tuple[List[tuple], List[tuple]]:
+    """The collections and items rows of the current scanner's database, without timestamps"""
+    with sqlite3.connect(rc001indexer.DATABASE_FILE) as conn:
+        collections = conn.execute('''SELECT collection_id, name, sanitized_name, mint_address, mint_price, deploy_txid,
+                                             minted_count FROM collections ORDER BY collection_id''').fetchall()
+        items = conn.execute('''SELECT item_id, collection_id, inscription_id, sn, inscription_address, sequence_number
+                                FROM items ORDER BY item_id''').fetchall()
+    return collections, items
+
+
+@pytest.fixture
+def rng():
+    return random.Random(1)
+
+
+@pytest.fixture
+def node():
+    node = FakeNode(COIN, 1)
+    server = node.serve()
+    node.port = server.server_port
+    yield node
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def make_scanner(tmp_path, monkeypatch):
+    """Build scanners indexing a node from scratch, each in its own working directory"""
+    monkeypatch.setattr(rc001indexer, 'MEMPOOL_INTERVAL', 0)
+    scanners = []
+
+    def make(node, name='scanner', **settings):
+        workdir = tmp_path / name
+        (workdir / 'config').mkdir(parents=True)
+        (workdir / 'rc001').mkdir()
+        config = configparser.ConfigParser()
+        config[COIN] = {'rpcuser': 'test', 'rpcpassword': 'test', 'rpchost': '127.0.0.1', 'rpcport': str(node.port)}
+        with open(workdir / 'config' / 'rpc.conf', 'w') as f:
+            config.write(f)
+        # The indexer's paths are relative to rc001/
+        monkeypatch.chdir(workdir / 'rc001')
+        for setting, value in settings.items():
+            monkeypatch.setattr(rc001indexer, setting, value)
+        scanner = rc001indexer.BlockchainScanner()
+        scanner.block_heights = scanner.load_last_block_heights()
+        scanners.append(scanner)
+        return scanner
+
+    yield make
+    for scanner in scanners:
+        scanner.db.close()
@@ -0,0 +1,77 @@
+import sqlite3
+
+import pytest
+
+import backfill
+import rc001indexer
+from conftest import COIN, deploy_tx, envelope, indexed, mint_html, mint_tx, p2pkh, scan, transaction, txid
+
+
+@pytest.fixture
+def chain(node, rng):
+    """Deploys and mints over several blocks, with a duplicate serial and a mint of an unknown collection"""
+    node.mine([deploy_tx('Pets', rng), deploy_tx('Cats', rng, '100000')])
+    node.mine([mint_tx('Pets', '000001', rng), mint_tx('Pets', '000002', rng)])
+    node.mine()
+    node.mine([mint_tx('Pets', '000001', rng), mint_tx('Dogs', '000001', rng), deploy_tx('Dogs', rng)])
+    node.mine([mint_tx('Dogs', '000001', rng), mint_tx('Pets', '000003', rng)])
+    node.mine([deploy_tx('Pets', rng)])
+    return node
+
+
+@pytest.mark.parametrize('raw_blocks', [False, True], ids=['json', 'raw'])
+def test_backfill_indexes_like_a_serial_scan(chain, make_scanner, monkeypatch, raw_blocks):
+    scan(make_scanner(chain, 'json'))
+    expected = indexed()
+    assert [len(rows) for rows in expected] == [3, 4]
+
+    monkeypatch.setattr(rc001indexer, 'RAW_BLOCK_MODE', raw_blocks)
+    monkeypatch.setattr(backfill, 'RAW_BLOCK_MODE', raw_blocks)
+    scan(make_scanner(chain, 'serial'))
+    assert indexed() == expected
+
+    scanner = make_scanner(chain, 'backfill')
+    assert backfill.backfill(COIN, None, 2, 2)
+    assert indexed() == expected
+    assert scanner.load_last_block_heights()[COIN]['last_block_height'] == chain.height
+
+
+def test_scan_in_order_bounds_the_work_in_flight(monkeypatch):
+    monkeypatch.setattr(backfill, 'scan_chunk', lambda first, last: first)
+    submitted = []
+
+    class Pool:
+        def apply_async(self, func, args):
+            submitted.append(args[0])
+            return type('Result', (), {'get': lambda self: func(*args)})()
+
+    chunks = [(first, first) for first in range(10)]
+    results = backfill._scan_in_order(Pool(), chunks, 3)
+    assert next(results) == 0
+    assert len(submitted) == 3
+    assert list(results) == list(range(1, 10))
+
+
+def test_envelope_spending_an_open_partial_continues_it(node, make_scanner, rng):
+    # The first of three pieces; the next transaction spending its output 0 must continue it
+    start = transaction([('22' * 32, 0)], envelope(b'text/plain', [b'a' * 100], 3), [(100000, p2pkh(bytes(20)))])
+    # Carries a whole mint envelope of its own, which a serial scan reads as the continuation
+    inscribed = transaction([(txid(start), 0)], envelope(b'text/html', [mint_html('Pets', '000002').encode('utf-8')]),
+                            [(100000, p2pkh(bytes(20)))])
+    node.mine([deploy_tx('Pets', rng)])
+    node.mine([mint_tx('Pets', '000001', rng), start])
+    node.mine([inscribed])
+
+    def reassembled():
+        with sqlite3.connect(rc001indexer.DATABASE_FILE) as conn:
+            items = conn.execute('SELECT sn, inscription_id FROM items ORDER BY sn').fetchall()
+            partials = conn.execute('SELECT txid, consumed_height FROM partial_inscriptions ORDER BY txid').fetchall()
+        return items, partials
+
+    scan(make_scanner(node, 'serial'))
+    serial = reassembled()
+    assert [sn for sn, _ in serial[0]] == ['000001']
+
+    make_scanner(node, 'backfill')
+    assert backfill.backfill(COIN, None, 2, 1)
+    assert reassembled() == serial
@@ -0,0 +1,55 @@
+import sqlite3
+import time
+
+import rc001indexer
+from conftest import COIN, deploy_tx, inscription_tx, mint_html, mint_tx, scan
+from mempool import MempoolWatcher
+from raw_block import parse_raw_transaction
+from rc001_meta import extract_rc001
+
+
+def test_malformed_title_does_not_block_the_poll(node, make_scanner, rng):
+    node.mine([deploy_tx('Pets', rng)])
+    scanner = make_scanner(node)
+    scan(scanner)
+
+    # A <title> with more than one child has no single string, so the document's title is None
+    bad_txid = node.broadcast(inscription_tx('text/html', mint_html('Pets<b>x</b>', '000002').encode('utf-8'), rng))
+    good_txid = node.broadcast(mint_tx('Pets', '000001', rng))
+
+    watcher = MempoolWatcher(scanner, COIN, rc001indexer.extract_operation)
+    assert watcher.poll() == 1
+    assert watcher.known == {bad_txid, good_txid}
+    with sqlite3.connect(rc001indexer.DATABASE_FILE) as conn:
+        pending = conn.execute('SELECT inscription_id, sn FROM pending_items').fetchall()
+    assert pending == [(f"{good_txid}i0", '000001')]
+
+
+def test_validate_mint_rejects_a_title_without_string(node, make_scanner, rng):
+    node.mine([deploy_tx('Pets', rng)])
+    scanner = make_scanner(node)
+    scan(scanner)
+    doc = extract_rc001(mint_html('Pets<b>x</b>', '000001'))
+    assert doc.title is None
+    collection, reason = scanner.validate_mint(COIN, doc, {'txid': 'ab' * 32, 'vout': []})
+    assert collection is None and 'Title' in reason
+
+
+def test_a_claim_not_seen_in_the_mempool_expires(node, make_scanner, rng, monkeypatch):
+    node.mine([deploy_tx('Pets', rng)])
+    scanner = make_scanner(node)
+    scan(scanner)
+    mints = []
+    for sn in ('000001', '000002'):
+        tx = parse_raw_transaction(mint_tx('Pets', sn, rng), scanner._address_params(COIN))
+        mints.append((rc001indexer.extract_operation(tx), tx))
+    staying, leaving = (tx['txid'] for _, tx in mints)
+    clock = [time.time()]
+    monkeypatch.setattr(time, 'time', lambda: clock[0])
+
+    assert scanner.update_pending_items(COIN, mints, [], {staying, leaving}) == 2
+    # `leaving` drops out of the mempool without the watcher noticing, say while it was restarting
+    for _ in range(3):
+        clock[0] += rc001indexer.PENDING_TTL // 2
+        scanner.update_pending_items(COIN, [], [], {staying})
+    assert scanner.pending_txids(COIN) == {staying}
@@ -0,0 +1,117 @@
+"""raw_block.parse_block against what getblock at verbosity=2 returns for the same blocks.
+
+The expected records are bitcoind's output for mainnet blocks (the genesis block and the
+first transfer, f4184fc5...) and for the address encodings of BIP173/BIP350, trimmed to the
+fields the indexer reads.
+"""
+import hashlib
+import struct
+from decimal import Decimal
+
+from raw_block import parse_block
+
+# Mainnet addresses, as bitcoind renders them
+BITCOIN_PARAMS = {'pubkeyhash': 0x00, 'scripthash': 0x05, 'bech32_hrp': 'bc'}
+
+GENESIS_BLOCK = (
+    '0100000000000000000000000000000000000000000000000000000000000000000000003ba3edfd7a7b12b27ac72c3e67768f617fc81bc3'
+    '888a51323a9fb8aa4b1e5e4a29ab5f49ffff001d1dac2b7c01010000000100000000000000000000000000000000000000000000000000000000'
+    '00000000ffffffff4d04ffff001d0104455468652054696d65732030332f4a616e2f32303039204368616e63656c6c6f72206f6e206272696e'
+    '6b206f66207365636f6e64206261696c6f757420666f722062616e6b73ffffffff0100f2052a01000000434104678afdb0fe5548271967f1a6'
+    '7130b7105cd6a828e03909a67962e0ea1f61deb649f6bc3f4cef38c4f35504e51ec112de5c384df7ba0b8d578a4c702b6bf11d5fac00000000'
+)
+
+# getblock 000000000019d6689c085ae165831e934ff763ae46a2a6c172b3f1b60a8ce26f 2
+GENESIS_VERBOSE = {
+    'hash': '000000000019d6689c085ae165831e934ff763ae46a2a6c172b3f1b60a8ce26f',
+    'height': 0,
+    'tx': [{
+        'txid': '4a5e1e4baab89f3a32518a88c31bc87f618f76673e2cc77ab2127b7afdeda33b',
+        'vin': [{'coinbase': '04ffff001d0104455468652054696d65732030332f4a616e2f32303039204368616e63656c6c6f72206f6e20'
+                             '6272696e6b206f66207365636f6e64206261696c6f757420666f722062616e6b73'}],
+        'vout': [{'value': Decimal('50.00000000'), 'n': 0, 'scriptPubKey': {
+            'hex': '4104678afdb0fe5548271967f1a67130b7105cd6a828e03909a67962e0ea1f61deb649f6bc3f4cef38c4f35504e51ec1'
+                   '12de5c384df7ba0b8d578a4c702b6bf11d5fac',
+            'type': 'pubkey',
+            'addresses': ['1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa']}}],
+    }],
+}
+
+# Block 170's second transaction, the first coins sent from one key to another
+FIRST_TRANSFER = (
+    '0100000001c997a5e56e104102fa209c6a852dd90660a20b2d9c352423edce25857fcd3704000000004847304402204e45e16932b8af5149'
+    '61a1d3a1a25fdf3f4f7732e9d624c6c61548ab5fb8cd410220181522ec8eca07de4860a4acdd12909d831cc56cbbac4622082221a8768d1d09'
+    '01ffffffff0200ca9a3b00000000434104ae1a62fe09c5f51b13905f07f06b99a2f7159b2225f374cd378d71302fa28414e7aab37397f554a7'
+    'df5f142c21c1b7303b8a0626f1baded5c72a704f7e6cd84cac00286bee0000000043410411db93e1dcdb8a016b49840f8c53bc1eb68a382e97'
+    'b1482ecad7b148a6909a5cb2e0eaddfb84ccf9744464f82e160bfa9b8b64f9d4c03f999b8643f656b412a3ac00000000'
+)
+
+# getrawtransaction f4184fc596403b9d638783cf57adfe4c75c605f6356fbc91338530e9831e9e16 1
+FIRST_TRANSFER_VERBOSE = {
+    'txid': 'f4184fc596403b9d638783cf57adfe4c75c605f6356fbc91338530e9831e9e16',
+    'vin': [{
+        'txid': '0437cd7f8525ceed2324359c2d0ba26006d92d856a9c20fa0241106ee5a597c9',
+        'vout': 0,
+        'scriptSig': {
+            'hex': '47304402204e45e16932b8af514961a1d3a1a25fdf3f4f7732e9d624c6c61548ab5fb8cd410220181522ec8eca07de48'
+                   '60a4acdd12909d831cc56cbbac4622082221a8768d1d0901'}}],
+    'vout': [
+        {'value': Decimal('10.00000000'), 'n': 0, 'scriptPubKey': {
+            'hex': '4104ae1a62fe09c5f51b13905f07f06b99a2f7159b2225f374cd378d71302fa28414e7aab37397f554a7df5f142c21c1'
+                   'b7303b8a0626f1baded5c72a704f7e6cd84cac',
+            'type': 'pubkey',
+            'addresses': ['1Q2TWHE3GMdB6BZKafqwxXtWAWgFt5Jvm3']}},
+        {'value': Decimal('40.00000000'), 'n': 1, 'scriptPubKey': {
+            'hex': '410411db93e1dcdb8a016b49840f8c53bc1eb68a382e97b1482ecad7b148a6909a5cb2e0eaddfb84ccf9744464f82e16'
+                   '0bfa9b8b64f9d4c03f999b8643f656b412a3ac',
+            'type': 'pubkey',
+            'addresses': ['12cbQLTFMXRnSzktFkuoG3eHoMeFtpTu3S']}},
+    ],
+}
+
+
+def _sha256d(data: bytes) -> bytes:
+    return hashlib.sha256(hashlib.sha256(data).digest()).digest()
+
+
+def _varint(n: int) -> bytes:
+    return bytes([n]) if n < 0xfd else b'\xfd' + struct.pack('<H', n)
+
+
+def _block(*transactions: bytes) -> bytes:
+    header = struct.pack('<i', 1) + b'\x11' * 32 + b'\x22' * 32 + struct.pack('<III', 0, 0x1d00ffff, 0)
+    return header + _varint(len(transactions)) + b''.join(transactions)
+
+
+def test_genesis_block_matches_getblock():
+    assert parse_block(GENESIS_BLOCK, 0, params=BITCOIN_PARAMS) == dict(GENESIS_VERBOSE, size=len(GENESIS_BLOCK) // 2)
+
+
+def test_transfer_matches_getrawtransaction():
+    block = parse_block(_block(bytes.fromhex(FIRST_TRANSFER)), 170, 'ab' * 32, BITCOIN_PARAMS)
+    assert block['hash'] == 'ab' * 32
+    assert block['previousblockhash'] == '11' * 32
+    assert block['tx'] == [FIRST_TRANSFER_VERBOSE]
+
+
+def test_segwit_txid_and_witness_addresses():
+    outputs = [
+        # BIP173 and BIP350 test vectors
+        (bytes.fromhex('0014751e76e8199196d454941c45d1b3a323f1433bd6'), 'witness_v0_keyhash',
+         'bc1qw508d6qejxtdg4y5r3zarvary0c5xw7kv8f3t4'),
+        (bytes.fromhex('512079be667ef9dcbbac55a06295ce870b07029bfcdb2dce28d959f2815b16f81798'), 'witness_v1_taproot',
+         'bc1p0xlxvlhemja6c4dqv22uapctqupfhlxm9h8z3k2e72q4k9hcz7vqzk5jj0'),
+    ]
+    inputs = _varint(1) + b'\x33' * 32 + struct.pack('<I', 1) + _varint(0) + struct.pack('<I', 0xfffffffd)
+    body = _varint(len(outputs)) + b''.join(struct.pack('<q', 1000) + _varint(len(spk)) + spk for spk, *_ in outputs)
+    witness = _varint(2) + _varint(72) + b'\x30' * 72 + _varint(33) + b'\x02' * 33
+    version, locktime = struct.pack('<i', 2), struct.pack('<I', 0)
+    segwit_tx = version + b'\x00\x01' + inputs + body + witness + locktime
+
+    tx = parse_block(_block(segwit_tx), 1, params=BITCOIN_PARAMS)['tx'][0]
+    # The txid leaves the marker, flag and witness out
+    assert tx['txid'] == _sha256d(version + inputs + body + locktime)[::-1].hex()
+    assert tx['vin'] == [{'txid': '33' * 32, 'vout': 1, 'scriptSig': {'hex': ''}}]
+    assert [(vout['scriptPubKey']['type'], vout['scriptPubKey']['addresses']) for vout in tx['vout']] == \
+           [(script_type, [address]) for _, script_type, address in outputs]
+
@@ -0,0 +1,99 @@
+import time
+from typing import Dict, Optional
+
+from bitcoinrpc.authproxy import JSONRPCException
+
+from rpc_batch import BatchRPCClient
+
+try:
+    import zmq  # pyzmq is optional; without it the zmq mode is unavailable
+except ImportError:
+    zmq = None
+
+TIP_FOLLOW_MODES = ('auto', 'zmq', 'longpoll', 'poll')
+RPC_METHOD_NOT_FOUND = -32601
+
+
+class TipFollower:
+    """Waits until a chain's tip moves past the last indexed height.
+
+    Modes, chosen per chain with `tip_follow` in rpc.conf:
+    - zmq:      wake on the node's `hashblock` notifications (`zmqpubhashblock` in rpc.conf,
+                the same endpoint as -zmqpubhashblock on the node); needs pyzmq
+    - longpoll: block in the node's `waitfornewblock` RPC
+    - poll:     sleep for the whole timeout
+    - auto:     zmq when an endpoint is configured and pyzmq is installed, else longpoll
+    A node without `waitfornewblock` turns longpoll into poll. Every mode returns after
+    `timeout` seconds at the latest, so a missed notification only delays the next check.
+    """
+
+    def __init__(self, rpc_config: Dict[str, str], mode: str = 'auto', timeout: float = 30):
+        mode = rpc_config.get('tip_follow', mode).strip().lower()
+        if mode not in TIP_FOLLOW_MODES:
+            raise ValueError(f"Unknown tip_follow mode {mode!r}, expected one of {', '.join(TIP_FOLLOW_MODES)}")
+        self.timeout = timeout
+        self.endpoint = rpc_config.get('zmqpubhashblock')
+        self.fallback_reason: Optional[str] = None
+        self._socket = None
+        self._context = None
+        if mode in ('auto', 'zmq'):
+            if self.endpoint and zmq is not None:
+                self._context = zmq.Context()
+                self._socket = self._context.socket(zmq.SUB)
+                self._socket.setsockopt(zmq.SUBSCRIBE, b'hashblock')
+                self._socket.connect(self.endpoint)
+                mode = 'zmq'
+            else:
+                if mode == 'zmq':
+                    self.fallback_reason = ('pyzmq is not installed' if self.endpoint
+                                            else 'no zmqpubhashblock endpoint configured')
+                mode = 'longpoll'
+        self.mode = mode
+        # The long-poll holds its HTTP request open for up to `timeout`; keep it off the scanning client
+        self._rpc = BatchRPCClient.from_config(rpc_config, timeout=int(timeout) + 30) if mode == 'longpoll' else None
+
+    def close(self) -> None:
+        if self._rpc is not None:
+            self._rpc.close()
+        if self._socket is not None:
+            self._socket.close(linger=0)
+            self._context.term()
+            self._socket = self._context = None
+
+    def wait(self, known_height: int) -> None:
+        """Return once the node has a block above `known_height`, or after the timeout"""
+        if self.mode == 'zmq':
+            self._wait_zmq()
+        elif self.mode == 'longpoll':
+            self._wait_longpoll(known_height)
+        else:
+            time.sleep(self.timeout)
+
+    def _wait_zmq(self) -> None:
+        # Notifications that arrived while scanning are still queued and wake us at once
+        if self._socket.poll(int(self.timeout * 1000)):
+            while self._socket.poll(0):
+                self._socket.recv_multipart()
+
+    def _wait_longpoll(self, known_height: int) -> None:
+        started = time.monotonic()
+        try:
+            # waitfornewblock only wakes on blocks after the call, so catch one that came in since the scan
+            if self._rpc.getblockcount() > known_height:
+                return
+            tip = self._rpc.waitfornewblock(int(self.timeout * 1000))
+        except JSONRPCException as e:
+            if e.code != RPC_METHOD_NOT_FOUND:
+                raise
+            self.mode = 'poll'
+            self.fallback_reason = 'the node has no waitfornewblock RPC'
+            self._rpc.close()
+            self._rpc = None
+            time.sleep(self.timeout)
+            return
+        except Exception:
+            self._rpc.close()
+            raise
+        # A node that is shutting down answers at once with the old tip; don't spin on it
+        if tip.get('height', known_height) <= known_height and time.monotonic() - started < self.timeout / 2:
+            time.sleep(1)
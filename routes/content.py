@@ -0,0 +1,71 @@
+import os
+import re
+import sqlite3
+import logging
+from flask import Blueprint, jsonify, send_file
+
+# Blueprint serving inscription bodies kept by the rc001 indexer's content store
+content_bp = Blueprint('content', __name__)
+
+logger = logging.getLogger(__name__)
+
+DATABASE_FILE = os.path.abspath(os.path.join(os.path.dirname(__file__), '../rc001/collections/all_collections.db'))
+CONTENT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../rc001/content'))
+INSCRIPTION_ID = re.compile(r'^[0-9a-f]{64}i\d+$')
+CACHE_SECONDS = 365 * 24 * 3600
+
+@content_bp.route('/content/<inscription_id>', methods=['GET'])
+def get_content(inscription_id):
+    """Serve an inscription's body from the content store, cacheable forever (its hash is the ETag)."""
+    if not INSCRIPTION_ID.match(inscription_id):
+        return jsonify({
+            "status": "error",
+            "message": f"Invalid inscription ID '{inscription_id}'"
+        }), 400
+    if not os.path.exists(DATABASE_FILE):
+        return jsonify({
+            "status": "error",
+            "message": "Collections database not initialized yet."
+        }), 404
+    try:
+        with sqlite3.connect(DATABASE_FILE) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'inscription_content'")
+            row = None
+            if cursor.fetchone():
+                cursor.execute("SELECT content_type, sha256 FROM inscription_content WHERE inscription_id = ?",
+                               (inscription_id,))
+                row = cursor.fetchone()
+    except sqlite3.Error as e:
+        logger.error(f"Database error in get_content: {e}")
+        return jsonify({
+            "status": "error",
+            "message": f"Database error: {e}"
+        }), 500
+    if row is None:
+        return jsonify({
+            "status": "error",
+            "message": f"Content of inscription '{inscription_id}' not found"
+        }), 404
+
+    content_type, digest = row
+    path = os.path.join(CONTENT_DIR, digest[:2], digest[2:4], digest)
+    if not os.path.exists(path):
+        logger.error(f"Stored content {digest} of inscription {inscription_id} is missing")
+        return jsonify({
+            "status": "error",
+            "message": f"Content of inscription '{inscription_id}' not found"
+        }), 404
+    # send_file answers If-None-Match and Range requests and hands the file to the server to send
+    response = send_file(path, mimetype=content_type or 'application/octet-stream', conditional=True,
+                         etag=digest, last_modified=None, max_age=CACHE_SECONDS)
+    if content_type:
+        # As inscribed: send_file would add a second charset to a type that has one, or one it never had
+        response.headers['Content-Type'] = content_type
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    # Inscribed documents run in an opaque origin, away from the wallet's storage on this one. No nosniff:
+    # mint pages load their parent with <script src="/content/...">, and parents are often inscribed with
+    # a type that is not JavaScript (text/plain), which nosniff would refuse to run
+    response.headers['Content-Security-Policy'] = 'sandbox allow-scripts'
+    return response
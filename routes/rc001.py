@@ -1,10 +1,9 @@
 import os
 import sqlite3
-import random
-import datetime
+import time
 import base64
 import re
-from flask import Blueprint, jsonify, make_response, request
+from flask import Blueprint, Response, jsonify, make_response, request, stream_with_context
 from collections import OrderedDict
 import logging
 from logging.handlers import RotatingFileHandler
@@ -12,6 +11,9 @@ import subprocess
 import json
 # NEW: reuse existing RPC helper for broadcasting
 from routes.bitcoinRPC import get_rpc_connection
+from routes.sn_allocator import LEASE_TTL, AllReserved, SnAllocator, SoldOut
+from rc001 import collection_stats
+from rc001.events import MAX_EVENTS, read_events
 from bitcoinrpc.authproxy import JSONRPCException
 
 # Configure logging
@@ -27,17 +29,51 @@ logger.addHandler(handler)
 rc001_bp = Blueprint('rc001', __name__)
 
 SUPPORTED_TICKER = 'B1T'
+ITEMS_PAGE_LIMIT = 100  # Items per /collection page unless ?limit= says otherwise
+ITEMS_MAX_LIMIT = 1000
+STREAM_BATCH_ROWS = 500  # Rows read and sent per chunk of a streamed ?dump=
+MAX_VALIDATE_IDS = 5000  # Inscription ids per POST /validate
+MAX_MINT_BATCH = 1000  # Mints per POST /mint_hex_batch
 
 DATABASE_FILE = os.path.abspath(os.path.join(os.path.dirname(__file__), '../rc001/collections/all_collections.db'))
 COLLECTIONS_DIR = os.path.dirname(DATABASE_FILE)
+# Serial numbers handed out by /mint and /mint_hex, kept apart from the indexer's database
+SN_LEASE_FILE = os.path.join(COLLECTIONS_DIR, 'sn_leases.db')
+sn_allocator = SnAllocator(SN_LEASE_FILE)
 
 # Function to sanitize the collection name
 def sanitize_filename(name):
     return re.sub(r'[^\w\-]', '', name)
 
+def minted_count(cursor, collection_row):
+    """Number of minted items, from the counter the indexer keeps on the collection row"""
+    if 'minted_count' in collection_row.keys():
+        return collection_row['minted_count']
+    # Database not migrated by the indexer yet
+    cursor.execute("SELECT COUNT(*) FROM items WHERE collection_id = ? AND inscription_id IS NOT NULL",
+                   (collection_row['collection_id'],))
+    return cursor.fetchone()[0]
+
+def pending_sns(cursor, collection_id):
+    """Serial numbers claimed by unconfirmed mints the indexer saw in the mempool and not minted yet"""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'pending_items'")
+    if cursor.fetchone() is None:
+        # Database not migrated by the indexer yet
+        return set()
+    cursor.execute("""
+        SELECT DISTINCT sn FROM pending_items
+        WHERE collection_id = ? AND expires_at > ?
+        AND sn NOT IN (SELECT sn FROM items WHERE collection_id = ?)
+    """, (collection_id, int(time.time()), collection_id))
+    return {row[0] for row in cursor.fetchall()}
+
+def table_exists(cursor, name):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,))
+    return cursor.fetchone() is not None
+
 @rc001_bp.route('/collections', methods=['GET'])
 def list_collections():
-    """List all collections from the database with their details."""
+    """List all collections with their supply, from one query; ?items=1 also embeds every collection's items."""
     # If the collections DB hasn't been created yet, return an empty set instead of a 500
     if not os.path.exists(DATABASE_FILE):
         logger.warning(f"Collections database not found at {DATABASE_FILE}. Returning empty list.")
@@ -46,15 +82,33 @@ def list_collections():
             "collections": {},
             "message": "Collections database not initialized yet."
         })
+    include_items = request.args.get('items', '').lower() in ('1', 'true', 'yes')
     try:
         with sqlite3.connect(DATABASE_FILE) as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
-            
-            # Fetch B1T collections only
-            cursor.execute("SELECT * FROM collections WHERE UPPER(coin_ticker) = UPPER(?) ORDER BY created_at DESC", (SUPPORTED_TICKER,))
+            has_stats = table_exists(cursor, 'collection_stats')
+            has_pending = table_exists(cursor, 'pending_items')
+            # Databases not migrated by the indexer yet have no counters; supply is then computed here
+            stats_columns = ("s.max_supply, s.minted AS stats_minted, s.left_to_mint, s.percent_minted, s.last_mint_height"
+                             if has_stats else
+                             "NULL AS max_supply, NULL AS stats_minted, NULL AS left_to_mint, NULL AS percent_minted, "
+                             "NULL AS last_mint_height")
+            pending_column = ("""(SELECT COUNT(DISTINCT p.sn) FROM pending_items p
+                                  WHERE p.collection_id = c.collection_id AND p.expires_at > :now
+                                  AND p.sn NOT IN (SELECT i.sn FROM items i WHERE i.collection_id = c.collection_id))"""
+                              if has_pending else "0")
+            cursor.execute(f"""
+                SELECT c.*, {stats_columns}, {pending_column} AS pending,
+                       (SELECT json_group_array(range_value) FROM
+                        (SELECT range_value FROM serial_ranges r WHERE r.collection_id = c.collection_id
+                         ORDER BY range_index)) AS ranges
+                FROM collections c {'LEFT JOIN collection_stats s ON s.collection_id = c.collection_id' if has_stats else ''}
+                WHERE UPPER(c.coin_ticker) = UPPER(:ticker)
+                ORDER BY c.created_at DESC
+            """, {'now': int(time.time()), 'ticker': SUPPORTED_TICKER})
             collections_data = cursor.fetchall()
-            
+
             if not collections_data:
                 return jsonify({
                     "status": "success",
@@ -64,38 +118,23 @@ def list_collections():
 
             collections = {}
             for row in collections_data:
-                collection_id = row['collection_id']
-                sanitized_name = row['sanitized_name']
-                coin_ticker = row['coin_ticker']
-
-                # Calculate max_supply from serial ranges
-                cursor.execute("SELECT range_value FROM serial_ranges WHERE collection_id = ? ORDER BY range_index", 
-                             (collection_id,))
-                ranges = cursor.fetchall()
-                
-                max_supply = 1
-                for range_value, in ranges:
-                    try:
-                        start, end = map(int, range_value.split('-'))
-                        max_supply *= (end - start + 1)
-                    except ValueError:
-                        logger.error(f"Invalid range format for collection {sanitized_name}: '{range_value}'")
-                        return jsonify({
-                            "status": "error",
-                            "message": f"Invalid range format for collection {sanitized_name}: '{range_value}'"
-                        }), 400
-
-                # Count minted items
-                cursor.execute("SELECT COUNT(*) FROM items WHERE collection_id = ? AND inscription_id IS NOT NULL", 
-                             (collection_id,))
-                minted = cursor.fetchone()[0]
-
-                left_to_mint = max_supply - minted
-                percent_minted = round((minted / max_supply) * 100, 2) if max_supply > 0 else 0
+                ranges = json.loads(row['ranges'])
+                pending = row['pending']
+                if row['stats_minted'] is not None:
+                    max_supply = row['max_supply']
+                    minted = row['stats_minted']
+                    percent_minted = row['percent_minted']
+                else:
+                    max_supply = collection_stats.max_supply(ranges)
+                    minted = minted_count(cursor, row)
+                    percent_minted = None
+                    if max_supply is not None:
+                        percent_minted = round((minted / max_supply) * 100, 2) if max_supply > 0 else 0
+                left_to_mint = max(max_supply - minted - pending, 0) if max_supply is not None else None
 
                 # Create ordered dictionary for consistent output
                 ordered_collection_data = OrderedDict([
-                    ('coin_ticker', coin_ticker),
+                    ('coin_ticker', row['coin_ticker']),
                     ('mint_address', row['mint_address']),
                     ('deploy_address', row['deploy_address']),
                     ('mint_price', row['mint_price']),
@@ -106,31 +145,39 @@ def list_collections():
                     ('max_supply', max_supply),
                     ('minted', minted),
                     ('left_to_mint', left_to_mint),
+                    ('pending', pending),
                     ('percent_minted', percent_minted),
+                    ('last_mint_height', row['last_mint_height']),
                     # Add block height information
                     ('block_height', row['created_at']),  # Assuming 'created_at' now stores block height
                 ])
 
                 # Add serial ranges
-                for i, (range_value,) in enumerate(ranges):
+                for i, range_value in enumerate(ranges):
                     ordered_collection_data[f'sn_index_{i}'] = range_value
 
-                # Fetch items with sequence numbers
-                cursor.execute("SELECT sn, inscription_id, inscription_status, inscription_address, sequence_number FROM items WHERE collection_id = ? ORDER BY sequence_number", 
-                             (collection_id,))
-                items = cursor.fetchall()
-                ordered_collection_data['items'] = [
-                    {
+                if include_items:
+                    ordered_collection_data['items'] = []
+                collections[row['sanitized_name']] = ordered_collection_data
+
+            if include_items:
+                # Every listed collection's items in one query; /collection/<coin>/<name> serves one collection
+                names = {row['collection_id']: row['sanitized_name'] for row in collections_data}
+                cursor.execute("""
+                    SELECT i.collection_id, i.sn, i.inscription_id, i.inscription_status, i.inscription_address,
+                           i.sequence_number
+                    FROM items i JOIN collections c ON c.collection_id = i.collection_id
+                    WHERE UPPER(c.coin_ticker) = UPPER(?)
+                    ORDER BY i.collection_id, i.sequence_number
+                """, (SUPPORTED_TICKER,))
+                for item in cursor.fetchall():
+                    collections[names[item['collection_id']]]['items'].append({
                         'sn': item['sn'],
                         'inscription_id': item['inscription_id'],
                         'inscription_status': item['inscription_status'],
                         'inscription_address': item['inscription_address'],
                         'sequence_number': item['sequence_number']
-                    }
-                    for item in items
-                ]
-
-                collections[sanitized_name] = ordered_collection_data
+                    })
 
             return jsonify({
                 "status": "success",
@@ -150,34 +197,30 @@ def list_collections():
             "message": str(e)
         }), 500
 
-def generate_unique_sn(collection_id: int, conn):
-    """Generate a unique SN that is not already minted or older than 24 hours."""
+def generate_unique_sn(collection_row, conn):
+    """Lease a random serial number that is not minted, pending in the mempool or handed out to another minter."""
     cursor = conn.cursor()
-    
-    # Get serial ranges
-    cursor.execute("SELECT range_value FROM serial_ranges WHERE collection_id = ? ORDER BY range_index", 
-                  (collection_id,))
-    ranges = [tuple(map(int, r[0].split('-'))) for r in cursor.fetchall()]
-    
-    # Get existing SNs
-    cursor.execute("""
-        SELECT sn FROM items 
-        WHERE collection_id = ? 
-        AND (inscription_id IS NOT NULL 
-             OR (created_at < ?))
-    """, (collection_id, datetime.datetime.now() - datetime.timedelta(hours=24)))
-    existing_sns = {row[0] for row in cursor.fetchall()}
-
-    while True:
-        if len(ranges) == 1 and len(str(ranges[0][0])) > 2:  # Single range case
-            start, end = ranges[0]
-            sn = f"{random.randint(start, end):06d}"
-        else:  # Segmented ranges
-            sn_parts = [f"{random.randint(start, end):02d}" for start, end in ranges]
-            sn = ''.join(sn_parts)
-        
-        if sn not in existing_sns:
-            return sn
+    return sn_allocator.allocate(conn, collection_row['collection_id'], minted_count(cursor, collection_row),
+                                 pending_sns(cursor, collection_row['collection_id']))
+
+def sn_unavailable(collection_name, error):
+    """Response for a mint request that got no serial number"""
+    if isinstance(error, SoldOut):
+        return jsonify({
+            "status": "error",
+            "message": f"Collection '{collection_name}' is sold out"
+        }), 409
+    response = jsonify({
+        "status": "error",
+        "message": f"Every serial number left in collection '{collection_name}' is reserved by another minter, try again later"
+    })
+    response.headers['Retry-After'] = str(LEASE_TTL)
+    return response, 503
+
+def mint_page(collection_name, parent_inscription_id):
+    """The HTML a mint inscribes, as the parts before and after its serial number"""
+    return (f"""<!DOCTYPE html><html lang=\"en\"><head><meta charset=\"UTF-8\"><meta name=\"viewport\" content=\"width=device-width, initial-scale=1.0\"><meta name=\"p\" content=\"rc001\"><meta name=\"op\" content=\"mint\"><meta name=\"sn\" content=\"""",
+            f"""\"><title>{collection_name}</title></head><body><script src=\"/content/{parent_inscription_id}\"></script></body></html>""")
 
 @rc001_bp.route('/mint/<coin_ticker>/<collection_name>', methods=['GET'])
 def generate_html(coin_ticker, collection_name):
@@ -214,11 +257,14 @@ def generate_html(coin_ticker, collection_name):
                     "message": f"Collection '{collection_name}' not found on coin '{coin_ticker}'"
                 }), 404
 
-            # Generate unique SN
-            sn = generate_unique_sn(collection['collection_id'], conn)
+            try:
+                sn = generate_unique_sn(collection, conn)
+            except (SoldOut, AllReserved) as e:
+                return sn_unavailable(collection_name, e)
 
             # Construct HTML content
-            html_content = f"""<!DOCTYPE html><html lang=\"en\"><head><meta charset=\"UTF-8\"><meta name=\"viewport\" content=\"width=device-width, initial-scale=1.0\"><meta name=\"p\" content=\"rc001\"><meta name=\"op\" content=\"mint\"><meta name=\"sn\" content=\"{sn}\"><title>{collection_name}</title></head><body><script src=\"/content/{collection['parent_inscription_id']}\"></script></body></html>"""
+            before_sn, after_sn = mint_page(collection_name, collection['parent_inscription_id'])
+            html_content = before_sn + sn + after_sn
             response = make_response(html_content)
             response.headers['Content-Type'] = 'text/html;charset=utf-8'
             return response
@@ -286,9 +332,28 @@ def list_inscriptions_by_collection_and_address(coin_ticker, collection_name, ad
             "message": str(e)
         }), 500
 
+def encode_cursor(sequence_number, item_id):
+    """Opaque page cursor: the sort key of the last item returned"""
+    return base64.urlsafe_b64encode(json.dumps([sequence_number, item_id]).encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """(sequence_number, item_id) from a cursor made by encode_cursor; ValueError if it is not one"""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor '{cursor}'") from e
+    if not (isinstance(key, list) and len(key) == 2 and all(isinstance(v, int) for v in key)):
+        raise ValueError(f"Invalid cursor '{cursor}'")
+    return key[0], key[1]
+
 @rc001_bp.route('/collection/<coin_ticker>/<collection_name>', methods=['GET'])
 def list_collection_as_json(coin_ticker, collection_name):
-    """List all entries in the specified collection as JSON."""
+    """List a collection's items in sequence order, a page at a time.
+
+    ?limit= (default ITEMS_PAGE_LIMIT, at most ITEMS_MAX_LIMIT) and ?cursor= (next_cursor of the
+    previous page) page through the items; ?fields=sn,inscription_id picks the item columns.
+    ?dump=json or ?dump=ndjson instead streams every item, read row by row from the database.
+    """
     if str(coin_ticker).upper() != SUPPORTED_TICKER:
         return jsonify({
             "status": "error",
@@ -297,6 +362,27 @@ def list_collection_as_json(coin_ticker, collection_name):
     sanitized_collection_name = sanitize_filename(collection_name)
     logger.info(f"Request for coin_ticker={coin_ticker}, collection_name={collection_name}, sanitized_name={sanitized_collection_name}")
 
+    dump = request.args.get('dump')
+    if dump not in (None, 'json', 'ndjson'):
+        return jsonify({
+            "status": "error",
+            "message": "dump must be json or ndjson"
+        }), 400
+    try:
+        limit = min(max(int(request.args.get('limit', ITEMS_PAGE_LIMIT)), 1), ITEMS_MAX_LIMIT)
+    except ValueError:
+        return jsonify({
+            "status": "error",
+            "message": "limit must be an integer"
+        }), 400
+    try:
+        after = decode_cursor(request.args['cursor']) if request.args.get('cursor') else None
+    except ValueError as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 400
+
     # Gracefully handle missing database
     if not os.path.exists(DATABASE_FILE):
         logger.warning(f"Collections database not found at {DATABASE_FILE}. Cannot list collection data.")
@@ -307,14 +393,7 @@ def list_collection_as_json(coin_ticker, collection_name):
 
     try:
         with sqlite3.connect(DATABASE_FILE) as conn:
-            conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
-            
-            # Log all collections for debugging (B1T only)
-            cursor.execute("SELECT coin_ticker, sanitized_name FROM collections WHERE UPPER(coin_ticker) = UPPER(?)", (SUPPORTED_TICKER,))
-            all_collections = cursor.fetchall()
-            logger.info(f"Available collections: {[(row['coin_ticker'], row['sanitized_name']) for row in all_collections]}")
-            
             cursor.execute("SELECT collection_id FROM collections WHERE UPPER(coin_ticker) = UPPER(?) AND UPPER(sanitized_name) = UPPER(?)", 
                          (SUPPORTED_TICKER, sanitized_collection_name))
             collection = cursor.fetchone()
@@ -325,15 +404,36 @@ def list_collection_as_json(coin_ticker, collection_name):
                     "status": "error",
                     "message": f"Collection '{collection_name}' not found on coin '{coin_ticker}'"
                 }), 404
+            collection_id = collection[0]
 
-            cursor.execute("SELECT * FROM items WHERE collection_id = ?", (collection['collection_id'],))
-            collection_data = [dict(row) for row in cursor.fetchall()]
-            logger.info(f"Found {len(collection_data)} items for {coin_ticker}/{sanitized_collection_name}")
+            columns = [row[1] for row in cursor.execute("PRAGMA table_info(items)")]
+            fields = [f for f in request.args.get('fields', '').split(',') if f] or columns
+            unknown = [f for f in fields if f not in columns]
+            if unknown:
+                return jsonify({
+                    "status": "error",
+                    "message": f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(columns)}"
+                }), 400
+            # Names checked against the table, so they can go into the query; the sort key comes last
+            select = ', '.join(f'"{f}"' for f in fields) + ', sequence_number, item_id'
 
-            return jsonify({
-                "status": "success",
-                "collection": collection_data
-            })
+            if dump is None:
+                # Keyset pagination on (sequence_number, item_id), served by idx_items_collection_sequence
+                if after is None:
+                    cursor.execute(f"""SELECT {select} FROM items WHERE collection_id = ?
+                                       ORDER BY sequence_number, item_id LIMIT ?""", (collection_id, limit + 1))
+                else:
+                    cursor.execute(f"""SELECT {select} FROM items WHERE collection_id = ?
+                                       AND (sequence_number, item_id) > (?, ?)
+                                       ORDER BY sequence_number, item_id LIMIT ?""",
+                                   (collection_id, after[0], after[1], limit + 1))
+                rows = cursor.fetchall()
+                page = rows[:limit]
+                return jsonify({
+                    "status": "success",
+                    "collection": [dict(zip(fields, row)) for row in page],
+                    "next_cursor": encode_cursor(*page[-1][-2:]) if len(rows) > limit else None
+                })
 
     except sqlite3.Error as e:
         logger.error(f"Database error in list_collection_as_json: {e}")
@@ -348,6 +448,57 @@ def list_collection_as_json(coin_ticker, collection_name):
             "message": str(e)
         }), 500
 
+    def stream():
+        # A connection of its own, open for as long as the client reads
+        conn = sqlite3.connect(DATABASE_FILE)
+        try:
+            rows = conn.execute(f"SELECT {select} FROM items WHERE collection_id = ? ORDER BY sequence_number, item_id",
+                                (collection_id,))
+            if dump == 'json':
+                yield '{"status": "success", "collection": ['
+            first = True
+            while True:
+                # One chunk per batch of rows rather than a write per item
+                batch = rows.fetchmany(STREAM_BATCH_ROWS)
+                if not batch:
+                    break
+                lines = [json.dumps(dict(zip(fields, row))) for row in batch]
+                if dump == 'ndjson':
+                    yield '\n'.join(lines) + '\n'
+                else:
+                    yield ('' if first else ',') + ','.join(lines)
+                first = False
+            if dump == 'json':
+                yield ']}'
+        except sqlite3.Error as e:
+            # Headers are sent already; a truncated body is all that is left to signal the error
+            logger.error(f"Database error streaming collection {sanitized_collection_name}: {e}")
+        finally:
+            conn.close()
+
+    mimetype = 'application/x-ndjson' if dump == 'ndjson' else 'application/json'
+    return Response(stream_with_context(stream()), mimetype=mimetype)
+
+# An item and the metadata of its collection, looked up through the UNIQUE index on items.inscription_id
+VALIDATE_QUERY = """
+    SELECT i.inscription_id, i.inscription_address, i.sequence_number,
+           c.coin_ticker, c.sanitized_name, c.deploy_address, c.deploy_txid, c.parent_inscription_id
+    FROM items i JOIN collections c ON c.collection_id = i.collection_id
+    WHERE {match} AND UPPER(c.coin_ticker) = UPPER(?)
+"""
+
+def validation_result(row):
+    return {
+        "coin_ticker": row['coin_ticker'],
+        "collection_name": row['sanitized_name'],
+        # The number is the sequence_number the indexer assigned from the collection's mint counter
+        "number": row['sequence_number'],
+        "deploy_address": row['deploy_address'],
+        "deploy_txid": row['deploy_txid'],
+        "parent_inscription_id": row['parent_inscription_id'],
+        "inscription_address": row['inscription_address']
+    }
+
 @rc001_bp.route('/validate/<inscription_id>', methods=['GET'])
 def validate_inscription(inscription_id):
     """Validate an inscription_id across all collections."""
@@ -362,28 +513,10 @@ def validate_inscription(inscription_id):
         with sqlite3.connect(DATABASE_FILE) as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
-            
-            # Get all collections (B1T only)
-            cursor.execute("SELECT collection_id, coin_ticker, name, sanitized_name, deploy_address, deploy_txid, parent_inscription_id FROM collections WHERE UPPER(coin_ticker) = UPPER(?)", (SUPPORTED_TICKER,))
-            collections = cursor.fetchall()
-
-            for collection in collections:
-                cursor.execute("SELECT inscription_id, inscription_address FROM items WHERE collection_id = ? ORDER BY created_at", 
-                             (collection['collection_id'],))
-                results = cursor.fetchall()
-
-                for index, row in enumerate(results, start=1):
-                    if row['inscription_id'] == inscription_id:
-                        return jsonify({
-                            "status": "success",
-                            "coin_ticker": collection['coin_ticker'],
-                            "collection_name": collection['sanitized_name'],
-                            "number": index,
-                            "deploy_address": collection['deploy_address'],
-                            "deploy_txid": collection['deploy_txid'],
-                            "parent_inscription_id": collection['parent_inscription_id'],
-                            "inscription_address": row['inscription_address']
-                        })
+            cursor.execute(VALIDATE_QUERY.format(match="i.inscription_id = ?"), (inscription_id, SUPPORTED_TICKER))
+            row = cursor.fetchone()
+            if row:
+                return jsonify({"status": "success", **validation_result(row)})
 
             return jsonify({
                 "status": "error",
@@ -403,6 +536,151 @@ def validate_inscription(inscription_id):
             "message": str(e)
         }), 500
 
+@rc001_bp.route('/validate', methods=['POST'])
+def validate_inscriptions():
+    """Validate up to MAX_VALIDATE_IDS inscription ids, sent as {"inscription_ids": [...]}, with one query."""
+    data = request.get_json(silent=True)
+    inscription_ids = data.get('inscription_ids') if isinstance(data, dict) else None
+    if not isinstance(inscription_ids, list) or not all(isinstance(i, str) for i in inscription_ids):
+        return jsonify({
+            "status": "error",
+            "message": "Expected a JSON body with an inscription_ids list of strings"
+        }), 400
+    if len(inscription_ids) > MAX_VALIDATE_IDS:
+        return jsonify({
+            "status": "error",
+            "message": f"At most {MAX_VALIDATE_IDS} inscription ids per request"
+        }), 400
+    if not os.path.exists(DATABASE_FILE):
+        logger.warning(f"Collections database not found at {DATABASE_FILE}. Cannot validate inscriptions.")
+        return jsonify({
+            "status": "error",
+            "message": "Collections database not initialized yet."
+        }), 404
+    try:
+        with sqlite3.connect(DATABASE_FILE) as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            # The ids travel as one JSON parameter, so no limit on SQL variables applies
+            cursor.execute(VALIDATE_QUERY.format(match="i.inscription_id IN (SELECT value FROM json_each(?))"),
+                           (json.dumps(inscription_ids), SUPPORTED_TICKER))
+            results = {row['inscription_id']: validation_result(row) for row in cursor.fetchall()}
+            return jsonify({
+                "status": "success",
+                "results": results,
+                "not_found": [i for i in dict.fromkeys(inscription_ids) if i not in results]
+            })
+
+    except sqlite3.Error as e:
+        logger.error(f"Database error in validate_inscriptions: {e}")
+        return jsonify({
+            "status": "error",
+            "message": f"Database error: {e}"
+        }), 500
+    except Exception as e:
+        logger.error(f"Unexpected error in validate_inscriptions: {e}")
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
+@rc001_bp.route('/status', methods=['GET'])
+def indexer_status():
+    """Report how far the indexer is behind each node, its scan rate, write profile and last error per chain."""
+    if not os.path.exists(DATABASE_FILE):
+        logger.warning(f"Collections database not found at {DATABASE_FILE}. No indexer status available.")
+        return jsonify({
+            "status": "error",
+            "message": "Collections database not initialized yet."
+        }), 404
+    try:
+        with sqlite3.connect(DATABASE_FILE) as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'indexer_status'")
+            if not cursor.fetchone():
+                # Written by indexers that track their write profile; older ones leave no status
+                return jsonify({
+                    "status": "success",
+                    "chains": {}
+                })
+            cursor.execute("SELECT * FROM indexer_status ORDER BY coin_ticker")
+            chains = {
+                row['coin_ticker']: {
+                    'write_profile': row['write_profile'],
+                    'node_height': row['node_height'],
+                    'last_block_height': row['last_block_height'],
+                    'lag': row['lag'],
+                    'blocks_per_second': row['blocks_per_second'],
+                    'last_error': row['last_error'] if 'last_error' in row.keys() else None,
+                    'updated_at': row['updated_at'],
+                }
+                for row in cursor.fetchall()
+            }
+            return jsonify({
+                "status": "success",
+                "chains": chains
+            })
+
+    except sqlite3.Error as e:
+        logger.error(f"Database error in indexer_status: {e}")
+        return jsonify({
+            "status": "error",
+            "message": f"Database error: {e}"
+        }), 500
+    except Exception as e:
+        logger.error(f"Unexpected error in indexer_status: {e}")
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
+@rc001_bp.route('/events', methods=['GET'])
+def list_events():
+    """Indexer changes (deploy, mint, transfer, rollback) after the event id given as ?after=, oldest first."""
+    try:
+        after_id = int(request.args.get('after', 0))
+        limit = min(max(int(request.args.get('limit', 100)), 1), MAX_EVENTS)
+    except ValueError:
+        return jsonify({
+            "status": "error",
+            "message": "after and limit must be integers"
+        }), 400
+    if not os.path.exists(DATABASE_FILE):
+        return jsonify({
+            "status": "success",
+            "events": [],
+            "last_event_id": after_id
+        })
+    try:
+        with sqlite3.connect(DATABASE_FILE) as conn:
+            if not table_exists(conn.cursor(), 'events'):
+                # Database not migrated by the indexer yet
+                return jsonify({
+                    "status": "success",
+                    "events": [],
+                    "last_event_id": after_id
+                })
+            events = read_events(conn, after_id, limit, SUPPORTED_TICKER)
+            return jsonify({
+                "status": "success",
+                "events": events,
+                "last_event_id": events[-1]['event_id'] if events else after_id
+            })
+
+    except sqlite3.Error as e:
+        logger.error(f"Database error in list_events: {e}")
+        return jsonify({
+            "status": "error",
+            "message": f"Database error: {e}"
+        }), 500
+    except Exception as e:
+        logger.error(f"Unexpected error in list_events: {e}")
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
 @rc001_bp.route('/mint_hex/<coin_ticker>/<collection_name>', methods=['GET'])
 def generate_hex(coin_ticker, collection_name):
     """Generate a hex representation of an HTML page with a unique SN."""
@@ -438,11 +716,14 @@ def generate_hex(coin_ticker, collection_name):
                     "message": f"Collection '{collection_name}' not found on coin '{coin_ticker}'"
                 }), 404
 
-            # Generate unique SN
-            sn = generate_unique_sn(collection['collection_id'], conn)
+            try:
+                sn = generate_unique_sn(collection, conn)
+            except (SoldOut, AllReserved) as e:
+                return sn_unavailable(collection_name, e)
 
             # Construct HTML content
-            html_content = f"""<!DOCTYPE html><html lang=\"en\"><head><meta charset=\"UTF-8\"><meta name=\"viewport\" content=\"width=device-width, initial-scale=1.0\"><meta name=\"p\" content=\"rc001\"><meta name=\"op\" content=\"mint\"><meta name=\"sn\" content=\"{sn}\"><title>{collection_name}</title></head><body><script src=\"/content/{collection['parent_inscription_id']}\"></script></body></html>"""
+            before_sn, after_sn = mint_page(collection_name, collection['parent_inscription_id'])
+            html_content = before_sn + sn + after_sn
             hex_content = html_content.encode('utf-8').hex()
 
             return jsonify({
@@ -463,6 +744,70 @@ def generate_hex(coin_ticker, collection_name):
             "message": str(e)
         }), 500
     
+@rc001_bp.route('/mint_hex_batch/<coin_ticker>/<collection_name>', methods=['POST'])
+def generate_hex_batch(coin_ticker, collection_name):
+    """Lease up to MAX_MINT_BATCH distinct SNs, sent as {"count": n}, and return the mint hex of each."""
+    if str(coin_ticker).upper() != SUPPORTED_TICKER:
+        return jsonify({
+            "status": "error",
+            "message": f"Unsupported coin '{coin_ticker}'. Only {SUPPORTED_TICKER} is supported."
+        }), 400
+    data = request.get_json(silent=True)
+    count = data.get('count') if isinstance(data, dict) else None
+    if not isinstance(count, int) or isinstance(count, bool) or not 1 <= count <= MAX_MINT_BATCH:
+        return jsonify({
+            "status": "error",
+            "message": f"Expected a JSON body with a count between 1 and {MAX_MINT_BATCH}"
+        }), 400
+    sanitized_collection_name = sanitize_filename(collection_name)
+
+    if not os.path.exists(DATABASE_FILE):
+        logger.warning(f"Collections database not found at {DATABASE_FILE}. Cannot generate mint hex.")
+        return jsonify({
+            "status": "error",
+            "message": "Collections database not initialized yet."
+        }), 404
+
+    try:
+        with sqlite3.connect(DATABASE_FILE) as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM collections WHERE UPPER(coin_ticker) = UPPER(?) AND UPPER(sanitized_name) = UPPER(?)",
+                           (SUPPORTED_TICKER, sanitized_collection_name))
+            collection = cursor.fetchone()
+            if not collection:
+                logger.error(f"Collection not found in generate_hex_batch: coin_ticker={coin_ticker}, sanitized_name={sanitized_collection_name}")
+                return jsonify({
+                    "status": "error",
+                    "message": f"Collection '{collection_name}' not found on coin '{coin_ticker}'"
+                }), 404
+
+            try:
+                sns = sn_allocator.allocate_many(conn, collection['collection_id'], minted_count(cursor, collection),
+                                                 pending_sns(cursor, collection['collection_id']), count)
+            except (SoldOut, AllReserved) as e:
+                return sn_unavailable(collection_name, e)
+
+        # The page is the same for every mint but its SN, so only the SN is encoded per item
+        before_sn, after_sn = (part.encode('utf-8').hex() for part in mint_page(collection_name, collection['parent_inscription_id']))
+        return jsonify({
+            "status": "success",
+            "mints": [{"sn": sn, "hex": before_sn + sn.encode('utf-8').hex() + after_sn} for sn in sns]
+        })
+
+    except sqlite3.Error as e:
+        logger.error(f"Database error in generate_hex_batch: {e}")
+        return jsonify({
+            "status": "error",
+            "message": f"Database error: {e}"
+        }), 500
+    except Exception as e:
+        logger.error(f"Unexpected error in generate_hex_batch: {e}")
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
 @rc001_bp.route('/mint_rc001/<ticker>', methods=['POST'])
 def mint_rc001(ticker):
     data = request.json
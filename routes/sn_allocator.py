@@ -0,0 +1,359 @@
+"""Serial numbers for /mint, /mint_hex and /mint_hex_batch, picked at random from the ones still free.
+
+Each worker keeps, per collection, a bitmap of the serial number space with a bit set for
+every minted serial. Free bits are counted per block in a Fenwick tree, so the r-th free
+serial is found in O(log n) plus one block scan, and a sold-out collection is known at once.
+The bitmap catches up with new mints by reading items above the last item_id it saw, and is
+rebuilt when a rollback lowered minted_count, or every REBUILD_SECONDS. A space larger than
+MAX_BITMAP_SIZE (a huge range, or several two-digit segments) gets no bitmap: serials are
+drawn at random and checked against the set of taken ones instead.
+
+A serial handed out is leased for LEASE_TTL seconds in a small database of its own (the
+indexer's database is written by the indexer alone, in long transactions). Leases are taken
+under BEGIN IMMEDIATE, so concurrent requests, in any worker, never get the same serial.
+Mints the indexer saw in the mempool are skipped as well.
+"""
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Set
+
+LEASE_TTL = 600  # Seconds a serial number handed out stays reserved for its minter
+REBUILD_SECONDS = 300  # A collection's bitmap is rebuilt from its items at least this often
+BLOCK_BITS = 256  # Serial numbers per block of the free counts
+LEASE_PROBES = 8  # Random picks tried against the leases before reading all of a collection's
+MAX_BITMAP_SIZE = 4_000_000  # Larger serial number spaces are sampled at random instead of kept in a bitmap
+SAMPLE_ATTEMPTS = 64  # Random picks tried in a sampled space before it is taken as all reserved
+
+
+FREE_IN_BYTE = bytes(8 - bin(byte).count('1') for byte in range(256))
+
+
+class SoldOut(Exception):
+    """Every serial number of the collection is minted or pending"""
+
+
+class AllReserved(Exception):
+    """The serial numbers still free are all leased to other minters"""
+
+
+class SnSpace:
+    """The serial numbers a collection's ranges allow, numbered 0..size-1.
+
+    Follows the indexer's check of a mint's serial (compile_sn_validator), which compares
+    zero-padded strings: a first range with bounds longer than two digits ("000001-000500"),
+    or a single range, is one plain number padded to the width of its upper bound; otherwise
+    each range gives a two-digit segment ("01-10", "01-05" gives "0703").
+    """
+
+    def __init__(self, range_values: List[str]):
+        bounds = []
+        for range_value in range_values:
+            parts = range_value.split('-') if isinstance(range_value, str) else []
+            if len(parts) != 2 or not parts[0].isdigit() or not parts[1].isdigit():
+                raise ValueError(f"Invalid serial range '{range_value}'")
+            bounds.append((parts[0], parts[1], len(parts[1])))
+        if not bounds:
+            raise ValueError("Collection has no serial ranges")
+        low, high, width = bounds[0]
+        self.plain = len(bounds) == 1 or (len(low) > 2 and width > 2)
+        if self.plain:
+            # A padded serial is at least `low` as a string when it is at least `low` padded on the right
+            self.low = int(low.ljust(width, '0')) if len(low) <= width else int(high) + 1
+            self.high, self.width = int(high), width
+            self.size = max(self.high - self.low + 1, 0)
+        else:
+            self.segments = [[f"{v:02d}" for v in range(100) if low <= f"{v:02d}".zfill(width) <= high]
+                             for low, high, width in bounds]
+            self.size = 1
+            for values in self.segments:
+                self.size *= len(values)
+
+    def sn(self, index: int) -> str:
+        if self.plain:
+            return str(self.low + index).zfill(self.width)
+        parts = []
+        for values in reversed(self.segments):
+            index, digit = divmod(index, len(values))
+            parts.append(values[digit])
+        return ''.join(reversed(parts))
+
+    def index(self, sn: str) -> Optional[int]:
+        """Position of a serial number in the space, None if it is not in it"""
+        if not isinstance(sn, str) or not sn.isdigit():
+            return None
+        if self.plain:
+            value = int(sn)
+            return value - self.low if self.low <= value <= self.high else None
+        if len(sn) != 2 * len(self.segments):
+            return None
+        index = 0
+        for i, values in enumerate(self.segments):
+            try:
+                index = index * len(values) + values.index(sn[2 * i:2 * i + 2])
+            except ValueError:
+                return None
+        return index
+
+
+class FreeBitmap:
+    """One bit per serial number, set when taken, with free counts per block for rank/select"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.bits = bytearray((size + 7) // 8)
+        self.blocks = (size + BLOCK_BITS - 1) // BLOCK_BITS
+        self.tree = [0] * (self.blocks + 1)  # Fenwick tree of the free count of each block
+        for i in range(1, self.blocks + 1):
+            self.tree[i] += min(BLOCK_BITS, size - (i - 1) * BLOCK_BITS)
+            parent = i + (i & -i)
+            if parent <= self.blocks:
+                self.tree[parent] += self.tree[i]
+        self.free = size
+
+    def _add(self, block: int, delta: int) -> None:
+        i = block + 1
+        while i <= self.blocks:
+            self.tree[i] += delta
+            i += i & -i
+
+    def is_taken(self, index: int) -> bool:
+        return bool(self.bits[index >> 3] & (1 << (index & 7)))
+
+    def take(self, index: int) -> bool:
+        """Mark a serial taken; False if it already was"""
+        if self.is_taken(index):
+            return False
+        self.bits[index >> 3] |= 1 << (index & 7)
+        self._add(index // BLOCK_BITS, -1)
+        self.free -= 1
+        return True
+
+    def release(self, index: int) -> None:
+        if self.is_taken(index):
+            self.bits[index >> 3] &= ~(1 << (index & 7))
+            self._add(index // BLOCK_BITS, 1)
+            self.free += 1
+
+    def random_free(self) -> int:
+        return self.select(random.randrange(self.free))
+
+    def select(self, rank: int) -> int:
+        """Index of the free serial number with `rank` free ones before it"""
+        # Descend the Fenwick tree to the block holding it
+        block, step = 0, 1 << self.blocks.bit_length()
+        while step:
+            if block + step <= self.blocks and self.tree[block + step] <= rank:
+                block += step
+                rank -= self.tree[block]
+            step >>= 1
+        index = block * BLOCK_BITS
+        end = min(index + BLOCK_BITS, self.size)
+        while index < end:
+            byte = self.bits[index >> 3]
+            if index & 7 == 0 and index + 8 <= end:
+                free = FREE_IN_BYTE[byte]
+                if rank >= free:
+                    rank -= free
+                    index += 8
+                    continue
+            if not byte & (1 << (index & 7)):
+                if rank == 0:
+                    return index
+                rank -= 1
+            index += 1
+        raise IndexError("rank out of range")
+
+
+class TakenSet:
+    """The taken serial numbers of a space too large for a FreeBitmap, with free ones found by sampling"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.taken: Set[int] = set()
+        self.free = size
+
+    def is_taken(self, index: int) -> bool:
+        return index in self.taken
+
+    def take(self, index: int) -> bool:
+        """Mark a serial taken; False if it already was"""
+        if index in self.taken:
+            return False
+        self.taken.add(index)
+        self.free -= 1
+        return True
+
+    def release(self, index: int) -> None:
+        if index in self.taken:
+            self.taken.remove(index)
+            self.free += 1
+
+    def random_free(self) -> int:
+        for _ in range(SAMPLE_ATTEMPTS):
+            index = random.randrange(self.size)
+            if index not in self.taken:
+                return index
+        raise AllReserved(f"No free serial number found in {SAMPLE_ATTEMPTS} random picks")
+
+
+class _Collection:
+    def __init__(self, space: SnSpace):
+        self.space = space
+        self.bitmap = FreeBitmap(space.size) if space.size <= MAX_BITMAP_SIZE else TakenSet(space.size)
+        self.last_item_id = 0
+        self.minted_count = 0
+        self.built_at = time.monotonic()
+
+    def take(self, sns: Iterable[str]) -> None:
+        for sn in sns:
+            index = self.space.index(sn)
+            if index is not None:
+                self.bitmap.take(index)
+
+
+class SnAllocator:
+    def __init__(self, lease_file: str, lease_ttl: int = LEASE_TTL):
+        self.lease_file = lease_file
+        self.lease_ttl = lease_ttl
+        self._collections: Dict[int, _Collection] = {}
+        self._lock = threading.Lock()
+        self._lease_table_ready = False
+
+    def _leases(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.lease_file, timeout=10, isolation_level=None)
+        # A lease lost in a power cut only lets its serial be handed out twice, as before leases existed
+        conn.execute('PRAGMA synchronous=NORMAL')
+        if not self._lease_table_ready:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''CREATE TABLE IF NOT EXISTS sn_leases (
+                            collection_id INTEGER,
+                            sn TEXT,
+                            expires_at REAL,
+                            PRIMARY KEY (collection_id, sn)
+                            )''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_sn_leases_expires ON sn_leases(expires_at)')
+            self._lease_table_ready = True
+        return conn
+
+    def _refresh(self, conn: sqlite3.Connection, collection_id: int, minted_count: int) -> _Collection:
+        """The collection's bitmap, up to date with the items the indexer has stored"""
+        state = self._collections.get(collection_id)
+        if (state is None or minted_count < state.minted_count
+                or time.monotonic() - state.built_at > REBUILD_SECONDS):
+            ranges = conn.execute('SELECT range_value FROM serial_ranges WHERE collection_id = ? ORDER BY range_index',
+                                  (collection_id,)).fetchall()
+            state = _Collection(SnSpace([range_value for range_value, in ranges]))
+            self._collections[collection_id] = state
+        rows = conn.execute('SELECT item_id, sn FROM items WHERE collection_id = ? AND item_id > ?',
+                            (collection_id, state.last_item_id)).fetchall()
+        state.take(sn for _, sn in rows)
+        state.last_item_id = max([state.last_item_id] + [item_id for item_id, _ in rows])
+        state.minted_count = minted_count
+        return state
+
+    def _lease(self, leases: sqlite3.Connection, state: _Collection, collection_id: int, now: float,
+               held: List[int]) -> str:
+        """Pick a free serial number no one holds a lease on and lease it, inside the lease transaction"""
+        bitmap = state.bitmap
+        # Few serials are leased at a time, so a random pick rarely is; read them all only after a few misses
+        for _ in range(LEASE_PROBES):
+            if bitmap.free == 0:
+                break
+            index = bitmap.random_free()
+            sn = state.space.sn(index)
+            if leases.execute('INSERT OR IGNORE INTO sn_leases (collection_id, sn, expires_at) VALUES (?, ?, ?)',
+                              (collection_id, sn, now + self.lease_ttl)).rowcount:
+                return sn
+            bitmap.take(index)
+            held.append(index)
+        leased = leases.execute('SELECT sn FROM sn_leases WHERE collection_id = ?', (collection_id,))
+        held += self._hold(state, (sn for sn, in leased))
+        if bitmap.free == 0:
+            raise AllReserved(f"All free serial numbers of collection {collection_id} are reserved")
+        sn = state.space.sn(bitmap.random_free())
+        leases.execute('INSERT INTO sn_leases (collection_id, sn, expires_at) VALUES (?, ?, ?)',
+                       (collection_id, sn, now + self.lease_ttl))
+        return sn
+
+    @contextmanager
+    def _lease_transaction(self):
+        """The lease database in a write transaction, expired leases removed; yields (conn, now)"""
+        leases = self._leases()
+        try:
+            leases.execute('BEGIN IMMEDIATE')
+            now = time.time()
+            leases.execute('DELETE FROM sn_leases WHERE expires_at <= ?', (now,))
+            yield leases, now
+            leases.execute('COMMIT')
+        except BaseException:
+            if leases.in_transaction:
+                leases.execute('ROLLBACK')
+            raise
+        finally:
+            leases.close()
+
+    def allocate(self, conn: sqlite3.Connection, collection_id: int, minted_count: int, pending: Set[str]) -> str:
+        """Lease a random free serial number of a collection.
+
+        `conn` reads the indexer's database; `pending` are the serials of mints waiting in the
+        mempool. Raises SoldOut or AllReserved when there is none to hand out, ValueError when
+        the collection's serial ranges cannot be read.
+        """
+        with self._lock:
+            state = self._refresh(conn, collection_id, minted_count)
+            held = self._hold(state, pending)
+            try:
+                if state.bitmap.free == 0:
+                    raise SoldOut(f"Collection {collection_id} is sold out")
+                with self._lease_transaction() as (leases, now):
+                    return self._lease(leases, state, collection_id, now, held)
+            finally:
+                self._release(state, held)
+
+    def allocate_many(self, conn: sqlite3.Connection, collection_id: int, minted_count: int, pending: Set[str],
+                      count: int) -> List[str]:
+        """Lease up to `count` distinct random free serial numbers of a collection, in one lease transaction.
+
+        Fewer come back when fewer are free; raises like allocate when there is none.
+        """
+        with self._lock:
+            state = self._refresh(conn, collection_id, minted_count)
+            bitmap = state.bitmap
+            held = self._hold(state, pending)
+            try:
+                if bitmap.free == 0:
+                    raise SoldOut(f"Collection {collection_id} is sold out")
+                with self._lease_transaction() as (leases, now):
+                    leased = leases.execute('SELECT sn FROM sn_leases WHERE collection_id = ?', (collection_id,))
+                    held += self._hold(state, (sn for sn, in leased))
+                    if bitmap.free == 0:
+                        raise AllReserved(f"All free serial numbers of collection {collection_id} are reserved")
+                    sns = []
+                    for _ in range(min(count, bitmap.free)):
+                        try:
+                            index = bitmap.random_free()
+                        except AllReserved:
+                            if not sns:
+                                raise
+                            break
+                        bitmap.take(index)
+                        held.append(index)
+                        sns.append(state.space.sn(index))
+                    leases.executemany('INSERT INTO sn_leases (collection_id, sn, expires_at) VALUES (?, ?, ?)',
+                                       [(collection_id, sn, now + self.lease_ttl) for sn in sns])
+                    return sns
+            finally:
+                self._release(state, held)
+
+    @staticmethod
+    def _hold(state: _Collection, sns: Iterable[str]) -> List[int]:
+        """Mark serials taken while picking; returns the ones that were not, to release afterwards"""
+        return [i for i in (state.space.index(sn) for sn in sns) if i is not None and state.bitmap.take(i)]
+
+    @staticmethod
+    def _release(state: _Collection, held: List[int]) -> None:
+        for index in held:
+            state.bitmap.release(index)
@@ -1,6 +1,8 @@
 import { mintPadUI } from './mintpad.js';
 import { inscribeUI } from './inscriber.js';
 
+const MAX_MINT_BATCH = 1000; // Most mints one POST /rc001/mint_hex_batch reserves
+
 export function mintPadBulkUI(selectedWallet) {
     const landingPage = document.getElementById('landing-page');
     landingPage.innerHTML = '';
@@ -95,11 +97,13 @@ export function mintPadBulkUI(selectedWallet) {
             const pendingTransactions = [];
             inscribeButton.textContent = 'Processing';
 
-            const transactionPromises = selectedUtxos.map(utxo => {
-                return retryTransaction(utxo, selectedWallet, mintAddress, collectionName, pendingCollectionDetails, 5);
-            });
-
-            Promise.all(transactionPromises).then(() => {
+            reserveMints(selectedUtxos.length)
+            .then(mints => {
+                const transactionPromises = mints.map((mint, i) => {
+                    return retryTransaction(selectedUtxos[i], mint.hex, selectedWallet, mintAddress, pendingCollectionDetails, 5);
+                });
+                return Promise.all(transactionPromises);
+            }).then(() => {
                 if (pendingTransactions.length > 0) {
                     console.log('Pending Transactions:', pendingTransactions);
                     localStorage.setItem('mintResponse', JSON.stringify({ pendingTransactions }));
@@ -115,40 +119,59 @@ export function mintPadBulkUI(selectedWallet) {
                 reject(error);
             });
 
-            function retryTransaction(utxo, selectedWallet, mintAddress, collectionName, pendingCollectionDetails, retries) {
+            // Reserve one SN per UTXO, in requests of at most MAX_MINT_BATCH
+            function reserveMints(count, mints = []) {
+                const batch = Math.min(count - mints.length, MAX_MINT_BATCH);
+                return fetch(`/rc001/mint_hex_batch/${selectedWallet.ticker}/${collectionName}`, {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json',
+                    },
+                    body: JSON.stringify({ count: batch })
+                })
+                .then(response => response.json())
+                .then(mintData => {
+                    if (mintData.status !== "success") {
+                        // Keep what earlier requests reserved, e.g. when the collection sold out in between
+                        if (mints.length > 0) {
+                            console.warn('Stopped reserving mints: ' + mintData.message);
+                            return mints;
+                        }
+                        throw new Error('Error generating mint hex: ' + mintData.message);
+                    }
+                    mints.push(...mintData.mints);
+                    // Fewer mints come back when fewer SNs are left
+                    if (mintData.mints.length < batch || mints.length >= count) {
+                        return mints;
+                    }
+                    return reserveMints(count, mints);
+                });
+            }
+
+            function retryTransaction(utxo, hexString, selectedWallet, mintAddress, pendingCollectionDetails, retries) {
                 return new Promise((resolve, reject) => {
                     const attemptTransaction = (attempt) => {
-                        fetch(`/rc001/mint_hex/${selectedWallet.ticker}/${collectionName}`)
-                            .then(response => response.json())
-                            .then(mintData => {
-                                if (mintData.status === "success") {
-                                    const hexString = mintData.hex;
-
-                                    const requestBody = {
-                                        receiving_address: selectedWallet.address,
-                                        meme_type: 'text/html',
-                                        hex_data: hexString,
-                                        sending_address: selectedWallet.address,
-                                        privkey: selectedWallet.privkey,
-                                        utxo: utxo.txid,
-                                        vout: utxo.vout,
-                                        script_hex: utxo.script_hex,
-                                        utxo_amount: utxo.value,
-                                        mint_address: mintAddress,
-                                        mint_price: pendingCollectionDetails.mint_price
-                                    };
-
-                                    return fetch(`/rc001/mint_rc001/${selectedWallet.ticker}`, {
-                                        method: 'POST',
-                                        headers: {
-                                            'Content-Type': 'application/json',
-                                        },
-                                        body: JSON.stringify(requestBody)
-                                    });
-                                } else {
-                                    throw new Error('Error generating mint hex: ' + mintData.message);
-                                }
-                            })
+                        const requestBody = {
+                            receiving_address: selectedWallet.address,
+                            meme_type: 'text/html',
+                            hex_data: hexString,
+                            sending_address: selectedWallet.address,
+                            privkey: selectedWallet.privkey,
+                            utxo: utxo.txid,
+                            vout: utxo.vout,
+                            script_hex: utxo.script_hex,
+                            utxo_amount: utxo.value,
+                            mint_address: mintAddress,
+                            mint_price: pendingCollectionDetails.mint_price
+                        };
+
+                        fetch(`/rc001/mint_rc001/${selectedWallet.ticker}`, {
+                            method: 'POST',
+                            headers: {
+                                'Content-Type': 'application/json',
+                            },
+                            body: JSON.stringify(requestBody)
+                        })
                             .then(response => response.json())
                             .then(data => {
                                 if (data.pendingTransactions) {
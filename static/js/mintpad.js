@@ -4,6 +4,7 @@ import { mintPadBulkUI } from './mintPadBulk.js';
 
 // Mapping of coin tickers to their respective Ord explorer URLs
 const ordExplorerUrls = {
+    B1T: '/content/',
     DOGE: 'https://wonky-ord.dogeord.io/content/',
     PEP: 'https://pepinals.com/content/',
     SHIC: 'https://shicinals-ord.com/content/',
@@ -199,7 +200,7 @@ export function mintPadUI(selectedWallet) {
                         collectionDiv.appendChild(stats);
 
                         // Fetch and display a random inscription preview
-                        fetch(`/rc001/collection/${collectionData.coin_ticker}/${collectionName}`)
+                        fetch(`/rc001/collection/${collectionData.coin_ticker}/${collectionName}?dump=json&fields=inscription_id`)
                             .then(response => response.json())
                             .then(data => {
                                 if (data.status === "success" && data.collection.length > 0) {
@@ -309,7 +310,7 @@ export function mintPadUI(selectedWallet) {
         title.style.color = '#00b4ff';
         body.appendChild(title);
 
-        fetch(`/rc001/collection/${collectionData.coin_ticker}/${collectionName}`)
+        fetch(`/rc001/collection/${collectionData.coin_ticker}/${collectionName}?dump=json&fields=inscription_address`)
             .then(response => response.json())
             .then(data => {
                 if (data.status === "success") {
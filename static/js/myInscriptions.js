@@ -1,6 +1,8 @@
 import { initializeWallet } from './main.js';
 import { userSettingsUI } from './userSettings.js';
 
+const MAX_VALIDATE_IDS = 5000; // Most inscription ids one POST /rc001/validate accepts
+
 export function myInscriptionsUI(selectedWallet) {
     const landingPage = document.getElementById('landing-page');
     landingPage.innerHTML = '';
@@ -122,12 +124,50 @@ export function myInscriptionsUI(selectedWallet) {
         body.appendChild(doggyButton);
 
         // Show inscriptions list
+        const inscriptionDivs = {};
         walletInscriptions.forEach(inscription => {
             const inscriptionDiv = doc.createElement('div');
             inscriptionDiv.className = 'inscription-item';
             inscriptionDiv.textContent = `Name: ${inscription.name}`;
             body.appendChild(inscriptionDiv);
+            inscriptionDivs[`${inscription.txid}i0`] = inscriptionDiv;
         });
+
+        validateInscriptions(Object.keys(inscriptionDivs), inscriptionDivs, body);
+    }
+
+    // Look up which inscriptions belong to an rc001 collection, in requests of at most MAX_VALIDATE_IDS
+    function validateInscriptions(inscriptionIds, inscriptionDivs, body, start = 0) {
+        if (start >= inscriptionIds.length) {
+            return Promise.resolve();
+        }
+        const chunk = inscriptionIds.slice(start, start + MAX_VALIDATE_IDS);
+        return fetch('/rc001/validate', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ inscription_ids: chunk })
+        })
+            .then(response => response.json())
+            .then(data => {
+                if (data.status !== 'success') {
+                    throw new Error(data.message);
+                }
+                Object.entries(data.results).forEach(([inscriptionId, result]) => {
+                    const inscriptionDiv = inscriptionDivs[inscriptionId];
+                    if (inscriptionDiv) {
+                        inscriptionDiv.textContent += ` | ${result.collection_name} #${result.number}`;
+                    }
+                });
+            })
+            .catch(error => {
+                // The other chunks are still looked up; say which inscriptions are left unchecked
+                console.error('Error validating inscriptions:', error);
+                const errorDiv = body.ownerDocument.createElement('div');
+                errorDiv.className = 'inscription-item';
+                errorDiv.textContent = `Could not validate inscriptions ${start + 1}-${start + chunk.length}: ${error.message}`;
+                body.insertBefore(errorDiv, inscriptionDivs[chunk[0]]);
+            })
+            .then(() => validateInscriptions(inscriptionIds, inscriptionDivs, body, start + MAX_VALIDATE_IDS));
     }
 
     function showOrdinalsJson(inscriptions) {
@@ -0,0 +1,5 @@
+"""Shared setup for the tests of the Flask app and its routes, which import from the repository root."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
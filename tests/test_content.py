@@ -0,0 +1,58 @@
+import hashlib
+import os
+import sqlite3
+
+import pytest
+from flask import Flask
+
+from routes import content
+
+PARENT_ID = 'ab' * 32 + 'i0'
+PARENT_SCRIPT = b'document.body.dataset.parent = "loaded";'
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """A content store and inscription_content table as the indexer writes them; returns a function adding a body"""
+    monkeypatch.setattr(content, 'DATABASE_FILE', str(tmp_path / 'all_collections.db'))
+    monkeypatch.setattr(content, 'CONTENT_DIR', str(tmp_path / 'content'))
+    with sqlite3.connect(content.DATABASE_FILE) as conn:
+        conn.execute('''CREATE TABLE inscription_content (inscription_id TEXT PRIMARY KEY, coin_ticker TEXT,
+                        content_type TEXT, sha256 TEXT, size INTEGER, height INTEGER)''')
+
+    def add(inscription_id, content_type, body):
+        digest = hashlib.sha256(body).hexdigest()
+        directory = os.path.join(content.CONTENT_DIR, digest[:2], digest[2:4])
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, digest), 'wb') as f:
+            f.write(body)
+        with sqlite3.connect(content.DATABASE_FILE) as conn:
+            conn.execute('INSERT INTO inscription_content VALUES (?, ?, ?, ?, ?, ?)',
+                         (inscription_id, 'B1T', content_type, digest, len(body), 1))
+    return add
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.register_blueprint(content.content_bp)
+    return app.test_client()
+
+
+@pytest.mark.parametrize('content_type', ['text/javascript', 'text/plain;charset=utf-8'])
+def test_parent_script_can_be_loaded_by_a_mint_page(store, client, content_type):
+    store(PARENT_ID, content_type, PARENT_SCRIPT)
+    response = client.get(f'/content/{PARENT_ID}')
+    assert response.status_code == 200
+    assert response.data == PARENT_SCRIPT
+    assert response.headers['Content-Type'] == content_type
+    # nosniff would make the browser refuse a <script src> whose type is not JavaScript
+    assert 'X-Content-Type-Options' not in response.headers
+    assert response.headers['Content-Security-Policy'] == 'sandbox allow-scripts'
+    assert response.headers['ETag'] == f'"{hashlib.sha256(PARENT_SCRIPT).hexdigest()}"'
+
+
+def test_unknown_inscription_is_not_found(store, client):
+    response = client.get(f'/content/{PARENT_ID}')
+    assert response.status_code == 404
+    assert response.get_json()['status'] == 'error'
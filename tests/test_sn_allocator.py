@@ -0,0 +1,50 @@
+import sqlite3
+
+import pytest
+
+from routes import sn_allocator
+from routes.sn_allocator import FreeBitmap, SnAllocator, TakenSet
+
+
+@pytest.fixture
+def indexer_db():
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE serial_ranges (collection_id INTEGER, range_index INTEGER, range_value TEXT)')
+    conn.execute('CREATE TABLE items (item_id INTEGER PRIMARY KEY, collection_id INTEGER, sn TEXT)')
+    yield conn
+    conn.close()
+
+
+def test_a_huge_space_is_sampled_without_a_bitmap(indexer_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(sn_allocator, 'FreeBitmap', None)  # Building one would fail
+    indexer_db.execute("INSERT INTO serial_ranges VALUES (1, 0, '0000000001-9999999999')")
+    indexer_db.executemany('INSERT INTO items (collection_id, sn) VALUES (1, ?)', [('0000000001',), ('0000000002',)])
+    allocator = SnAllocator(str(tmp_path / 'leases.db'))
+
+    sns = allocator.allocate_many(indexer_db, 1, 2, {'0000000003'}, 50)
+    sns.append(allocator.allocate(indexer_db, 1, 2, set()))
+    assert len(set(sns)) == 51
+    assert not {'0000000001', '0000000002', '0000000003'} & set(sns)
+    state = allocator._collections[1]
+    assert isinstance(state.bitmap, TakenSet)
+    # Held serials are released once picked: only the minted ones stay taken
+    assert state.bitmap.taken == {0, 1}
+
+
+def test_a_sampled_space_that_is_nearly_full_is_reported_reserved(monkeypatch):
+    monkeypatch.setattr(sn_allocator, 'MAX_BITMAP_SIZE', 10)
+    space = sn_allocator.SnSpace(['01-99', '01-99'])
+    state = sn_allocator._Collection(space)
+    assert isinstance(state.bitmap, TakenSet) and state.bitmap.free == 99 * 99
+    for index in range(space.size - 1):
+        state.bitmap.take(index)
+    sn_allocator.random.seed(1)
+    with pytest.raises(sn_allocator.AllReserved):
+        state.bitmap.random_free()
+
+
+def test_a_small_space_keeps_its_bitmap(indexer_db, tmp_path):
+    indexer_db.execute("INSERT INTO serial_ranges VALUES (1, 0, '001-500')")
+    allocator = SnAllocator(str(tmp_path / 'leases.db'))
+    assert len(set(allocator.allocate_many(indexer_db, 1, 0, set(), 500))) == 500
+    assert isinstance(allocator._collections[1].bitmap, FreeBitmap)